@@ -0,0 +1,30 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.bulk_generator import BulkGenerator
+
+COUNT = 1_000_000
+LENGTH = 16
+
+def main():
+    max_workers = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, 8, 16, 32, max_workers})
+    baseline = None
+
+    print(f"Выгрузка {COUNT:,} паролей длиной {LENGTH}".replace(",", " "))
+
+    for workers in worker_counts:
+        if workers > max_workers:
+            break
+
+        with open(os.devnull, "w") as output:
+            report = BulkGenerator(workers=workers).run(COUNT, LENGTH, output)
+
+        baseline = baseline or report.passwords_per_second
+        print(report)
+        print(f"Масштабирование: {report.passwords_per_second / baseline:.2f}x\n")
+
+if __name__ == "__main__":
+    main()
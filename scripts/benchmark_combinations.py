@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core import combinatorics
+from src.core.password_generator import PasswordGenerator
+
+LENGTHS = [8, 32, 1000, 10000, 100000]
+ALPHABET_SIZE = 95
+
+# Начиная с Python 3.11 str() для чисел длиннее 4300 цифр запрещен по умолчанию
+if hasattr(sys, "set_int_max_str_digits"):
+    sys.set_int_max_str_digits(0)
+
+def measure(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+def format_big_int(length):
+    # Прежний способ: точное число и подсчет цифр через str()
+    total_combinations = ALPHABET_SIZE ** length
+    power = len(str(total_combinations)) - 1
+    # Деление больших чисел в float переполняется, поэтому мантисса здесь не считается
+    return f"{total_combinations / (10 ** power) if power < 300 else 0:.2f} × 10^{power}"
+
+def main():
+    generator = PasswordGenerator()
+    cache = combinatorics.search_space_cache
+
+    def cold(length):
+        # Без очистки lru_cache формулы "холодный" замер считал бы результат из кэша
+        cache.clear()
+        combinatorics.at_least_one_of_each.cache_clear()
+        result = generator.search_space(length, algorithm=PasswordGenerator.ALGORITHM_SECRETS)
+        return combinatorics.format_combinations(result.bits, result.combinations)
+
+    def warm(length):
+        result = generator.search_space(length, algorithm=PasswordGenerator.ALGORITHM_SECRETS)
+        return combinatorics.format_combinations(result.bits, result.combinations)
+
+    print(f"{'Длина':>8} {'big int + str(), мс':>20} {'лог. шкала, мкс':>16} {'из кэша, мкс':>14}")
+    for length in LENGTHS:
+        repeat = 1 if length >= 10000 else 20
+        old = measure(lambda: format_big_int(length), repeat)
+        new = measure(lambda: cold(length), 200)
+        warm(length)
+        cached = measure(lambda: warm(length), 2000)
+        print(f"{length:>8} {old * 1000:>20.3f} {new * 1e6:>16.1f} {cached * 1e6:>14.1f}")
+
+    print(f"Результат для длины {LENGTHS[-1]}: {warm(LENGTHS[-1])}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.core import domains
+
+SCHEMES = ["", "http://", "https://", "https://user@"]
+SUBDOMAINS = ["", "www.", "accounts.", "mail.", "login.", "m.", "api.v2."]
+SUFFIXES = ["com", "net", "org", "ru", "de", "co.uk", "com.au", "co.jp", "github.io", "рф", "com.ua", "io"]
+PATHS = ["", "/", "/login", "/signin?next=%2Fhome", "/a/b/c#top"]
+PORTS = ["", "", "", ":8080", ":443"]
+
+def build_corpus(count, sites, seed):
+    rng = random.Random(seed)
+    names = [f"site{i}" for i in range(sites)] + ["google", "yandex", "почта", "bücher", "example"]
+    # Популярность сайтов распределена по Ципфу, как в реальной истории браузера
+    weights = [1 / rank for rank in range(1, len(names) + 1)]
+    chosen = rng.choices(names, weights, k=count)
+    return [rng.choice(SCHEMES) + rng.choice(SUBDOMAINS) + name + "." + rng.choice(SUFFIXES)
+            + rng.choice(PORTS) + rng.choice(PATHS) for name in chosen]
+
+def run(corpus, normalize):
+    start = time.perf_counter()
+    for url in corpus:
+        normalize(url)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер нормализации доменов на сгенерированном корпусе адресов")
+    parser.add_argument("-n", "--count", type=int, default=1000000, help="число адресов в корпусе")
+    parser.add_argument("--sites", type=int, default=20000, help="число различных сайтов")
+    parser.add_argument("--seed", type=int, default=1, help="начальное значение генератора корпуса")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.count, args.sites, args.seed)
+    print(f"Корпус: {len(corpus)} адресов, уникальных {len(set(corpus))}")
+
+    start = time.perf_counter()
+    domains.suffix_trie()
+    print(f"Загрузка списка суффиксов: {(time.perf_counter() - start) * 1000:.2f} мс")
+
+    # Без кэша: каждый хост сопоставляется со списком суффиксов заново
+    lookup = domains.registrable_domain.__wrapped__
+    uncached = run(corpus, lambda url: lookup(domains.extract_host(url).lower()))
+    print(f"Без кэша: {uncached:.2f} с, {len(corpus) / uncached:,.0f} адресов/с")
+
+    domains.registrable_domain.cache_clear()
+    cached = run(corpus, domains.normalize_domain)
+    info = domains.registrable_domain.cache_info()
+    print(f"С кэшем на {domains.CACHE_SIZE} записей: {cached:.2f} с, {len(corpus) / cached:,.0f} адресов/с, "
+          f"попаданий {info.hits / len(corpus):.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.password_generator import PasswordGenerator
+
+COUNT = 20000
+LENGTH = 16
+
+ALGORITHMS = [
+    PasswordGenerator.ALGORITHM_SECRETS,
+    PasswordGenerator.ALGORITHM_PHONETIC,
+    PasswordGenerator.ALGORITHM_PATTERN,
+    PasswordGenerator.ALGORITHM_MEMORABLE,
+]
+
+def measure(func):
+    start = time.perf_counter()
+    func()
+    return COUNT / (time.perf_counter() - start)
+
+def main():
+    generator = PasswordGenerator()
+
+    print(f"Пароли длиной {LENGTH}, партия из {COUNT} штук")
+    print(f"{'Алгоритм':<12} {'generate(), п/с':>18} {'generate_many(), п/с':>22} {'Ускорение':>10}")
+
+    for algorithm in ALGORITHMS:
+        generator.set_algorithm(algorithm)
+
+        loop_rate = measure(lambda: [generator.generate(LENGTH) for _ in range(COUNT)])
+        batch_rate = measure(lambda: generator.generate_many(COUNT, LENGTH))
+
+        print(f"{algorithm:<12} {loop_rate:>18,.0f} {batch_rate:>22,.0f} {batch_rate / loop_rate:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.password_generator import PasswordGenerator
+
+LENGTHS = [6, 16, 64, 256, 1024, 4096]
+# Партия меньше порога NumPy, чтобы сравнивать именно стратегии на чистом Python
+BATCH_SIZE = 500
+# Примерно одинаковый объем символов на каждую длину
+TOTAL_CHARS = 400_000
+
+STRATEGIES = [PasswordGenerator.PLACEMENT_SHUFFLE, PasswordGenerator.PLACEMENT_INSERT]
+
+def measure(func, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats
+
+def main():
+    generator = PasswordGenerator()
+
+    print(f"{'Длина':>6} {'Способ':<14} {'shuffle, мкс':>14} {'insert, мкс':>14} {'Ускорение':>10}")
+
+    for length in LENGTHS:
+        single_repeats = max(10, TOTAL_CHARS // length)
+        batch_repeats = max(1, TOTAL_CHARS // (length * BATCH_SIZE))
+
+        single = {}
+        batch = {}
+        for strategy in STRATEGIES:
+            generator.set_placement_strategy(strategy)
+            single[strategy] = measure(lambda: generator.generate(length), single_repeats)
+            batch[strategy] = measure(lambda: generator.generate_many(BATCH_SIZE, length), batch_repeats) / BATCH_SIZE
+
+        for name, results in (("generate", single), ("generate_many", batch)):
+            shuffle_time = results[PasswordGenerator.PLACEMENT_SHUFFLE] * 1e6
+            insert_time = results[PasswordGenerator.PLACEMENT_INSERT] * 1e6
+            print(f"{length:>6} {name:<14} {shuffle_time:>14.1f} {insert_time:>14.1f} "
+                  f"{shuffle_time / insert_time:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.core.master_password import SiteProfile, SCHEME_V2
+from src.core.profile_store import ProfileStore
+
+QUERIES = 10000
+
+def build_store(path, count):
+    store = ProfileStore(path)
+    if len(store) < count:
+        store.save_many(SiteProfile(f"site{i:06d}.example", scheme=SCHEME_V2, length=20)
+                        for i in range(count))
+    return store
+
+def measure(action, arguments):
+    start = time.perf_counter()
+    for argument in arguments:
+        action(argument)
+    return (time.perf_counter() - start) / len(arguments) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер поиска и автодополнения в хранилище профилей")
+    parser.add_argument("-n", "--count", type=int, default=100000, help="число профилей в базе")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "profiles.db")
+        start = time.perf_counter()
+        store = build_store(path, args.count)
+        print(f"Заполнение {args.count} профилей: {time.perf_counter() - start:.2f} с")
+
+        step = max(1, args.count // QUERIES)
+        domains = [f"Site{i:06d}.Example" for i in range(0, args.count, step)]
+        prefixes = [f"site{i:06d}"[:8] for i in range(0, args.count, step)]
+
+        print(f"Поиск профиля: {measure(store.get, domains):.1f} мкс")
+        print(f"Поиск отсутствующего профиля: {measure(store.get, [d + '.missing' for d in domains]):.1f} мкс")
+        print(f"Автодополнение (10 вариантов): {measure(store.complete, prefixes):.1f} мкс")
+        print(f"Автодополнение по одной букве: {measure(store.complete, ['s'] * 1000):.1f} мкс")
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+INSTANCES = 10000
+RUNS = 5
+
+# Импорт измеряется в отдельном процессе, чтобы модули не были уже загружены
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); "
+    "import src.core.password_generator; "
+    "print(time.perf_counter() - start)"
+)
+
+def measure_import():
+    timings = []
+    for _ in range(RUNS):
+        output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=ROOT_DIR,
+                                capture_output=True, text=True, check=True).stdout
+        timings.append(float(output))
+    return min(timings)
+
+def main():
+    print(f"Импорт src.core.password_generator: {measure_import() * 1000:.1f} мс (лучший из {RUNS})")
+
+    from src.core import numpy_backend
+    from src.core.password_generator import PasswordGenerator
+
+    start = time.perf_counter()
+    for _ in range(INSTANCES):
+        PasswordGenerator()
+    elapsed = time.perf_counter() - start
+    print(f"Создание PasswordGenerator(): {elapsed / INSTANCES * 1e6:.2f} мкс на экземпляр")
+
+    generator = PasswordGenerator()
+    print(f"Словарь открыт после создания: {generator.memorable_words._mmap is not None}, "
+          f"NumPy загружен: {numpy_backend.np is not None}")
+
+    generator.set_algorithm(PasswordGenerator.ALGORITHM_MEMORABLE)
+    start = time.perf_counter()
+    generator.generate(0)
+    print(f"Первый запоминаемый пароль (открытие словаря): {(time.perf_counter() - start) * 1000:.2f} мс")
+
+    start = time.perf_counter()
+    PasswordGenerator().get_memorable_words(exclude_similar=True)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    PasswordGenerator().get_memorable_words(exclude_similar=True)
+    second = time.perf_counter() - start
+    print(f"Фильтр похожих символов: первый экземпляр {first * 1000:.2f} мс, "
+          f"следующий {second * 1e6:.1f} мкс")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import argparse
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.core.markov import build_model, DEFAULT_MODEL_PATH, DEFAULT_ORDER
+from src.core.wordlist import parse_words
+
+DEFAULT_SOURCE = os.path.join(ROOT_DIR, "src", "assets", "wordlists", "memorable.txt")
+
+def main():
+    parser = argparse.ArgumentParser(description="Обучение модели произносимых паролей на корпусе слов")
+    parser.add_argument("sources", nargs="*", default=[DEFAULT_SOURCE],
+                        help="текстовые корпуса: одно слово на строку или формат EFF")
+    parser.add_argument("-o", "--output", default=DEFAULT_MODEL_PATH,
+                        help="путь к итоговому файлу .gpmk")
+    parser.add_argument("--order", type=int, default=DEFAULT_ORDER,
+                        help="длина контекста в символах")
+    args = parser.parse_args()
+
+    words = []
+    for source in args.sources:
+        with open(source, "r", encoding="utf-8") as file:
+            words.extend(word for word in parse_words(file) if word.isalpha() and word.isascii())
+
+    transitions = build_model(words, args.output, args.order)
+    print(f"Слов в корпусе: {len(words)}, переходов в модели: {transitions}")
+    print(f"Модель сохранена: {args.output}")
+
+if __name__ == "__main__":
+    main()
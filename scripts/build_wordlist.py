@@ -0,0 +1,30 @@
+import argparse
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.core.wordlist import build_wordlist, parse_words, DEFAULT_WORDLIST_PATH
+
+DEFAULT_SOURCE = os.path.join(ROOT_DIR, "src", "assets", "wordlists", "memorable.txt")
+
+def main():
+    parser = argparse.ArgumentParser(description="Сборка бинарного словаря для запоминаемых паролей")
+    parser.add_argument("sources", nargs="*", default=[DEFAULT_SOURCE],
+                        help="текстовые словари: одно слово на строку или формат EFF")
+    parser.add_argument("-o", "--output", default=DEFAULT_WORDLIST_PATH,
+                        help="путь к итоговому файлу .gpwl")
+    args = parser.parse_args()
+
+    words = []
+    for source in args.sources:
+        with open(source, "r", encoding="utf-8") as file:
+            words.extend(parse_words(file))
+
+    count = build_wordlist(words, args.output)
+    print(f"Слов в исходных файлах: {len(words)}, уникальных: {count}")
+    print(f"Словарь сохранен: {args.output}")
+
+if __name__ == "__main__":
+    main()
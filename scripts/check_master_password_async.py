@@ -0,0 +1,78 @@
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QTimer, QEventLoop, QSettings
+from PyQt5.QtWidgets import QApplication
+
+from src.core.master_password import derive_password
+from src.core.profile_store import ProfileStore
+from src.gui.widgets.master_password_dialog import MasterPasswordDialog
+
+TIMEOUT_MS = 30000
+CLICKS = 5
+
+def main():
+    app = QApplication(sys.argv)
+    # Отдельные настройки и хранилище в памяти: проверка не читает сохраненные
+    # профили пользователя и не записывает в них проверочный сайт
+    settings_dir = tempfile.TemporaryDirectory()
+    settings = QSettings(os.path.join(settings_dir.name, "genpass.ini"), QSettings.IniFormat)
+    dialog = MasterPasswordDialog(settings=settings, store=ProfileStore(":memory:"))
+    dialog.master_input.setText("MyPassword123")
+    dialog.domain_input.setText("google")
+
+    # Счетчик срабатываний таймера показывает, что цикл событий не блокируется
+    ticks = []
+    ticker = QTimer()
+    ticker.timeout.connect(lambda: ticks.append(time.perf_counter()))
+    ticker.start(5)
+
+    loop = QEventLoop()
+    results = []
+    def on_finished(request_id, password):
+        results.append(password)
+        loop.quit()
+
+    start = time.perf_counter()
+    # Серия быстрых нажатий должна схлопнуться в одну актуальную задачу
+    for _ in range(CLICKS):
+        dialog.generate_password()
+    dialog.pending_task.signals.finished.connect(on_finished)
+    dialog.running_task.signals.finished.connect(on_finished)
+    started_ticks = len(ticks)
+    QTimer.singleShot(TIMEOUT_MS, loop.quit)
+    loop.exec_()
+    elapsed = time.perf_counter() - start
+    ticker.stop()
+
+    expected = derive_password("MyPassword123", dialog.current_profile("google"))
+    during = len(ticks) - started_ticks
+    print(f"Вычисление заняло {elapsed * 1000:.0f} мс, тиков таймера за это время: {during}")
+    print(f"Получено результатов: {len(results)}, метка: {dialog.result_label.text()!r}")
+
+    ok = True
+    if during < 3:
+        print("ОШИБКА: цикл событий не обрабатывал события во время вычисления")
+        ok = False
+    if not results or results[-1] != expected:
+        print("ОШИБКА: результат не совпадает с синхронным вычислением")
+        ok = False
+
+    # Дожидаемся отложенных сигналов, чтобы проверить итоговое состояние диалога
+    deadline = time.perf_counter() + TIMEOUT_MS / 1000
+    while (dialog.running_task is not None or dialog.pending_task is not None) and time.perf_counter() < deadline:
+        app.processEvents(QEventLoop.AllEvents, 50)
+    if dialog.result_label.text() != f"Ваш пароль: {expected}":
+        print("ОШИБКА: в диалоге отображается устаревший результат")
+        ok = False
+
+    print("Проверка пройдена" if ok else "Проверка не пройдена")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
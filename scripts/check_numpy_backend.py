@@ -0,0 +1,80 @@
+import os
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core import numpy_backend
+from src.core.charset_profile import CharsetProfile
+from src.core.password_generator import PasswordGenerator
+from src.core.random_pool import RandomPool
+
+COUNT = 50000
+LENGTH = 12
+# Допустимое отклонение доли класса символов между реализациями
+TOLERANCE = 0.01
+
+def class_distribution(passwords, profile):
+    classes = {
+        "upper": profile.upper_set,
+        "lower": profile.lower_set,
+        "digits": profile.digits_set,
+        "special": profile.special_set,
+    }
+    counts = Counter()
+    for password in passwords:
+        for char in password:
+            for name, members in classes.items():
+                if char in members:
+                    counts[name] += 1
+    total = sum(counts.values())
+    return {name: counts[name] / total for name in classes}
+
+def has_required_classes(password, profile):
+    return all(not set(password).isdisjoint(alphabet) for alphabet in profile.classes)
+
+def compare(name, python_passwords, numpy_passwords, profile, check_required):
+    ok = True
+    python_share = class_distribution(python_passwords, profile)
+    numpy_share = class_distribution(numpy_passwords, profile)
+
+    print(f"{name}:")
+    for class_name in python_share:
+        delta = abs(python_share[class_name] - numpy_share[class_name])
+        status = "OK" if delta <= TOLERANCE else "ОШИБКА"
+        ok = ok and delta <= TOLERANCE
+        print(f"  {class_name:<8} python={python_share[class_name]:.4f} "
+              f"numpy={numpy_share[class_name]:.4f} {status}")
+
+    if {len(p) for p in python_passwords} != {len(p) for p in numpy_passwords}:
+        print("  ОШИБКА: неверная длина пароля")
+        ok = False
+    if check_required and not all(has_required_classes(p, profile) for p in numpy_passwords):
+        print("  ОШИБКА: отсутствует обязательный класс символов")
+        ok = False
+    return ok
+
+def main():
+    if not numpy_backend.NUMPY_AVAILABLE:
+        print("NumPy не установлен, проверка пропущена")
+        return 0
+
+    generator = PasswordGenerator()
+    ok = True
+
+    for flags in [(True, True, True, True), (True, False, True, False), (False, True, True, True)]:
+        profile = CharsetProfile.get(*flags)
+
+        python_passwords = generator._generate_with_secrets_batch(RandomPool(), COUNT, LENGTH, *flags)
+        numpy_passwords = numpy_backend.generate_secrets(RandomPool(), COUNT, LENGTH, profile)
+        ok = compare(f"secrets {flags}", python_passwords, numpy_passwords, profile, True) and ok
+
+        python_passwords = generator._generate_pattern_batch(RandomPool(), COUNT, LENGTH, *flags)
+        numpy_passwords = numpy_backend.generate_pattern(RandomPool(), COUNT, LENGTH, profile)
+        ok = compare(f"pattern {flags}", python_passwords, numpy_passwords, profile, False) and ok
+
+    print("Распределения совпадают" if ok else "Распределения расходятся")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
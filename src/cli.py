@@ -0,0 +1,142 @@
+import argparse
+import csv
+import getpass
+import sys
+from src.core import master_password
+from src.core.charset_profile import CharsetProfile
+
+COMMANDS = ("calibrate", "batch")
+
+
+def _save_kdf(kdf):
+    # QtCore не требует графической среды, а настройки общие с приложением
+    from PyQt5.QtCore import QSettings
+    settings = QSettings("GenPass", "PasswordGenerator")
+    settings.setValue("master_kdf", kdf.to_json())
+    settings.setValue("master_kdf_name", kdf.name)
+    settings.sync()
+
+
+def run_calibrate(args):
+    try:
+        kdf, elapsed = master_password.calibrate(args.kdf, args.target_ms, args.memory_mb, args.hash)
+    except ValueError as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Параметры: {kdf!r}")
+    print(f"Время вычисления: {elapsed:.0f} мс (цель {args.target_ms} мс)")
+    print(kdf.to_json())
+    if args.save:
+        _save_kdf(kdf)
+        print("Параметры сохранены в настройках GenPass")
+    return 0
+
+
+def _read_domains(file):
+    for line in file:
+        domain = line.strip()
+        if domain and not domain.startswith("#"):
+            yield domain
+
+
+# Буквы классов символов для политики схемы 2: A - заглавные, a - строчные,
+# 0 - цифры, # - спецсимволы
+CLASS_LETTERS = {
+    "A": CharsetProfile.CLASS_UPPER,
+    "a": CharsetProfile.CLASS_LOWER,
+    "0": CharsetProfile.CLASS_DIGITS,
+    "#": CharsetProfile.CLASS_SPECIAL,
+}
+
+
+def _parse_classes(text):
+    classes = 0
+    for letter in text:
+        if letter not in CLASS_LETTERS:
+            raise ValueError(f"Неизвестный класс символов: {letter}")
+        classes |= CLASS_LETTERS[letter]
+    return classes
+
+
+def _read_master(args):
+    # Мастер-пароль не передается аргументом, чтобы не попасть в историю команд.
+    # getpass читает с терминала, даже если stdin занят списком доменов
+    if args.domains == "-" or sys.stdin.isatty():
+        return getpass.getpass("Мастер-пароль: ")
+    return sys.stdin.readline().rstrip("\r\n")
+
+
+def run_batch(args):
+    try:
+        kdf = master_password.kdf_from_params(args.kdf_params) if args.kdf_params else master_password.LEGACY_KDF
+        if args.workers is not None and args.workers < 1:
+            raise ValueError("Число потоков должно быть положительным")
+        master_password.SiteProfile("", kdf, args.scheme, args.length, _parse_classes(args.classes))
+        master = _read_master(args)
+        if not master:
+            raise ValueError("Мастер-пароль не может быть пустым")
+    except ValueError as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+
+    source = output = None
+    try:
+        source = sys.stdin if args.domains == "-" else open(args.domains, "r", encoding="utf-8")
+        output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+        writer = csv.writer(output, lineterminator="\n")
+        # Пароли содержат запятые и кавычки, поэтому вывод экранируется по правилам CSV
+        passwords = master_password.derive_many(master, _read_domains(source), kdf, args.workers,
+                                                args.scheme, args.length, _parse_classes(args.classes))
+        for domain, password in passwords:
+            writer.writerow((domain, password))
+            output.flush()
+    except (ValueError, OSError) as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if source not in (None, sys.stdin):
+            source.close()
+        if output not in (None, sys.stdout):
+            output.close()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="genpass", description="Команды GenPass без графического интерфейса")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    calibrate = commands.add_parser("calibrate", help="подобрать параметры KDF для мастер-пароля на этом компьютере")
+    calibrate.add_argument("--kdf", choices=list(master_password.KDF_BACKENDS), default=master_password.KDF_PBKDF2,
+                           help="функция формирования ключа")
+    calibrate.add_argument("--target-ms", type=int, default=master_password.CALIBRATION_TARGET_MS,
+                           help="целевое время вычисления одного ключа, мс")
+    calibrate.add_argument("--memory-mb", type=int, default=master_password.CALIBRATION_MEMORY_MB,
+                           help="бюджет памяти для scrypt и Argon2id, МиБ")
+    calibrate.add_argument("--hash", default="sha256", help="хеш-функция для PBKDF2")
+    calibrate.add_argument("--save", action="store_true", help="записать параметры в настройки приложения")
+    calibrate.set_defaults(handler=run_calibrate)
+
+    batch = commands.add_parser("batch", help="вычислить пароли по мастер-паролю для списка доменов")
+    batch.add_argument("domains", help="файл доменов, по одному на строку (- для stdin)")
+    batch.add_argument("-o", "--output", default="-", help="файл CSV с парами domain,password (по умолчанию stdout)")
+    batch.add_argument("-w", "--workers", type=int, default=None, help="число потоков (по умолчанию по числу ядер)")
+    batch.add_argument("--kdf-params", default=None,
+                       help="параметры KDF в JSON, как их выводит calibrate (по умолчанию исходная схема)")
+    batch.add_argument("--scheme", type=int, choices=sorted(master_password.SCHEMES), default=master_password.SCHEME_V1,
+                       help="версия схемы: 1 - исходные 16 символов, 2 - HKDF и выборка без смещения")
+    batch.add_argument("--length", type=int, default=master_password.LEGACY_LENGTH,
+                       help="длина пароля для схемы 2")
+    batch.add_argument("--classes", default="Aa0#", help="классы символов для схемы 2: A, a, 0, #")
+    batch.set_defaults(handler=run_batch)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
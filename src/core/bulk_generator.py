@@ -0,0 +1,112 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from src.core.password_generator import PasswordGenerator
+
+_worker_generator = None
+
+
+def _init_worker(options):
+    # Генератор процесса получает настройки основного: словарь, параметры
+    # парольных фраз и стратегию размещения
+    global _worker_generator
+    _worker_generator = PasswordGenerator()
+    _worker_generator.set_options(options)
+
+
+def _generate_chunk(count, length, use_upper, use_lower, use_digits, use_special,
+                    algorithm, exclude_similar):
+    # Каждый процесс берет энтропию из CSPRNG ОС независимо от остальных
+    passwords = _worker_generator.generate_many(
+        count, length, use_upper, use_lower, use_digits, use_special,
+        algorithm=algorithm, exclude_similar=exclude_similar
+    )
+    # Одна строка передается между процессами дешевле, чем список
+    return count, '\n'.join(passwords) + '\n'
+
+
+class BulkReport:
+    def __init__(self, count, size, elapsed, workers):
+        self.count = count
+        self.size = size
+        self.elapsed = elapsed
+        self.workers = workers
+
+    @property
+    def passwords_per_second(self):
+        return self.count / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def bytes_per_second(self):
+        return self.size / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        count = f"{self.count:,}".replace(",", " ")
+        rate = f"{self.passwords_per_second:,.0f}".replace(",", " ")
+        return (f"Сгенерировано паролей: {count} за {self.elapsed:.2f} с "
+                f"({self.workers} процессов)\n"
+                f"Скорость: {rate} паролей/с, "
+                f"{self.bytes_per_second / (1024 * 1024):.2f} МБ/с")
+
+
+class BulkGenerator:
+    DEFAULT_CHUNK_SIZE = 20000
+
+    def __init__(self, password_generator=None, workers=None, chunk_size=None):
+        self.password_generator = password_generator or PasswordGenerator()
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+
+        if self.workers <= 0:
+            raise ValueError("Количество процессов должно быть положительным")
+        if self.chunk_size <= 0:
+            raise ValueError("Размер порции должен быть положительным")
+
+    def _chunks(self, count):
+        while count > 0:
+            size = min(self.chunk_size, count)
+            yield size
+            count -= size
+
+    def run(self, count, length, writer, use_upper=True, use_lower=True,
+            use_digits=True, use_special=True, algorithm=None, exclude_similar=None):
+        if not any([use_upper, use_lower, use_digits, use_special]):
+            raise ValueError("Должен быть выбран хотя бы один тип символов")
+        if count < 0:
+            raise ValueError("Количество паролей не может быть отрицательным")
+
+        algorithm = algorithm or self.password_generator.current_algorithm
+        if exclude_similar is None:
+            exclude_similar = self.password_generator.exclude_similar
+
+        write = writer.write if hasattr(writer, "write") else writer
+        options = (length, use_upper, use_lower, use_digits, use_special, algorithm, exclude_similar)
+
+        produced = 0
+        size = 0
+        start = time.perf_counter()
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.password_generator.get_options(),)) as executor:
+            chunks = self._chunks(count)
+            pending = set()
+
+            # Ограничиваем число порций в полете, чтобы память не росла с объемом выгрузки
+            for chunk in chunks:
+                pending.add(executor.submit(_generate_chunk, chunk, *options))
+                if len(pending) >= self.workers * 2:
+                    break
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk_count, text = future.result()
+                    write(text)
+                    produced += chunk_count
+                    size += len(text)
+
+                    next_chunk = next(chunks, None)
+                    if next_chunk is not None:
+                        pending.add(executor.submit(_generate_chunk, next_chunk, *options))
+
+        return BulkReport(produced, size, time.perf_counter() - start, self.workers)
@@ -0,0 +1,146 @@
+import string
+from src.core.random_pool import RandomPool
+
+UPPERCASE = string.ascii_uppercase
+LOWERCASE = string.ascii_lowercase
+DIGITS = string.digits
+SPECIAL = "!@#$%^&*()_+-=[]{}|;:,.<>?"
+
+# Символы, которые легко перепутать при чтении: 0/O, 1/l/I/|
+SIMILAR_CHARACTERS = "01IOl|"
+
+
+def exclude_similar_chars(alphabet):
+    return ''.join(c for c in alphabet if c not in SIMILAR_CHARACTERS)
+
+
+def is_similar_free(text):
+    return not any(c in SIMILAR_CHARACTERS for c in text)
+
+
+class CharsetProfile:
+    __slots__ = ("use_upper", "use_lower", "use_digits", "use_special", "exclude_similar",
+                 "uppercase", "lowercase", "digits", "special",
+                 "classes", "alphabet", "table", "rejected", "limit",
+                 "upper_set", "lower_set", "digits_set", "special_set", "class_table",
+                 "_patterns")
+
+    PATTERN_CACHE_SIZE = 128
+
+    CLASS_UPPER = 1
+    CLASS_LOWER = 2
+    CLASS_DIGITS = 4
+    CLASS_SPECIAL = 8
+
+    _cache = {}
+
+    @classmethod
+    def get(cls, use_upper=True, use_lower=True, use_digits=True, use_special=True,
+            exclude_similar=False):
+        key = (bool(use_upper), bool(use_lower), bool(use_digits), bool(use_special),
+               bool(exclude_similar))
+        profile = cls._cache.get(key)
+        if profile is None:
+            profile = cls(*key)
+            cls._cache[key] = profile
+        return profile
+
+    def __init__(self, use_upper, use_lower, use_digits, use_special, exclude_similar=False):
+        if not any([use_upper, use_lower, use_digits, use_special]):
+            raise ValueError("Должен быть выбран хотя бы один тип символов")
+
+        setattr_ = super().__setattr__
+        setattr_("use_upper", use_upper)
+        setattr_("use_lower", use_lower)
+        setattr_("use_digits", use_digits)
+        setattr_("use_special", use_special)
+        setattr_("exclude_similar", exclude_similar)
+
+        prepare = exclude_similar_chars if exclude_similar else str
+        setattr_("uppercase", prepare(UPPERCASE))
+        setattr_("lowercase", prepare(LOWERCASE))
+        setattr_("digits", prepare(DIGITS))
+        setattr_("special", prepare(SPECIAL))
+
+        classes = []
+        if use_upper:
+            classes.append(self.uppercase)
+        if use_lower:
+            classes.append(self.lowercase)
+        if use_digits:
+            classes.append(self.digits)
+        if use_special:
+            classes.append(self.special)
+        setattr_("classes", tuple(classes))
+        setattr_("alphabet", ''.join(classes))
+
+        table, rejected, limit = RandomPool.translation_table(self.alphabet)
+        setattr_("table", table)
+        setattr_("rejected", rejected)
+        setattr_("limit", limit)
+
+        setattr_("upper_set", frozenset(self.uppercase))
+        setattr_("lower_set", frozenset(self.lowercase))
+        setattr_("digits_set", frozenset(self.digits))
+        setattr_("special_set", frozenset(self.special))
+
+        # Таблица байт -> бит класса символа для bytes.translate
+        class_table = bytearray(256)
+        for alphabet, bit in ((self.uppercase, self.CLASS_UPPER), (self.lowercase, self.CLASS_LOWER),
+                              (self.digits, self.CLASS_DIGITS), (self.special, self.CLASS_SPECIAL)):
+            for char in alphabet:
+                class_table[ord(char)] = bit
+        setattr_("class_table", bytes(class_table))
+
+        setattr_("_patterns", {})
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CharsetProfile неизменяем")
+
+    @property
+    def key(self):
+        return (self.use_upper, self.use_lower, self.use_digits, self.use_special, self.exclude_similar)
+
+    def __eq__(self, other):
+        if not isinstance(other, CharsetProfile):
+            return NotImplemented
+        return self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return (f"CharsetProfile(use_upper={self.use_upper}, use_lower={self.use_lower}, "
+                f"use_digits={self.use_digits}, use_special={self.use_special}, "
+                f"exclude_similar={self.exclude_similar})")
+
+    @property
+    def translation(self):
+        return self.table, self.rejected, self.limit
+
+    def pattern_alphabets(self):
+        return {
+            'L': self.uppercase,
+            'l': self.lowercase,
+            'd': self.digits,
+            's': self.special,
+        }
+
+    def pattern(self, length):
+        pattern = self._patterns.get(length)
+        if pattern is None:
+            pattern = ""
+
+            if self.use_upper:
+                pattern += "L" * (length // 4 + (1 if length % 4 > 0 else 0))
+            if self.use_lower:
+                pattern += "l" * (length // 4 + (1 if length % 4 > 1 else 0))
+            if self.use_digits:
+                pattern += "d" * (length // 4 + (1 if length % 4 > 2 else 0))
+            if self.use_special:
+                pattern += "s" * (length // 4)
+
+            pattern = pattern[:length]
+            if len(self._patterns) < self.PATTERN_CACHE_SIZE:
+                self._patterns[length] = pattern
+        return pattern
@@ -0,0 +1,148 @@
+import functools
+import itertools
+import math
+import threading
+from collections import OrderedDict
+
+LOG10_2 = math.log10(2)
+
+# До этого размера пространства число комбинаций хранится точно
+EXACT_BITS = 64
+# До этого размера промежуточные суммы считаются в целых числах без потери точности
+EXACT_SUM_BITS = 4096
+CACHE_SIZE = 1024
+
+
+class Count:
+    # Число комбинаций в логарифмической форме; точное значение - только для малых чисел
+    def __init__(self, bits, exact=None):
+        self.bits = bits
+        self.exact = exact if exact is not None and bits <= EXACT_BITS else None
+
+    @classmethod
+    def from_int(cls, value):
+        if value <= 0:
+            return cls(-math.inf, 0)
+        return cls(math.log2(value), value)
+
+    @property
+    def log10(self):
+        return self.bits * LOG10_2
+
+    def __mul__(self, other):
+        exact = None
+        if self.exact is not None and other.exact is not None:
+            exact = self.exact * other.exact
+        return Count(self.bits + other.bits, exact)
+
+    def __str__(self):
+        return format_combinations(self.bits, self.exact)
+
+    def __repr__(self):
+        return f"Count(bits={self.bits:.2f}, exact={self.exact!r})"
+
+
+def power(base, exponent):
+    if base <= 0:
+        return Count(-math.inf if exponent else 0.0, 0 if exponent else 1)
+    bits = exponent * math.log2(base)
+    # Большая степень не вычисляется вовсе: достаточно логарифма
+    return Count(bits, base ** exponent if bits <= EXACT_BITS else None)
+
+
+def product(counts):
+    result = Count(0.0, 1)
+    for count in counts:
+        result = result * count
+    return result
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def at_least_one_of_each(sizes, length):
+    # Строки длины length над объединением непересекающихся классов, содержащие
+    # хотя бы один символ каждого класса (включения-исключения по подмножествам):
+    # C = sum((-1)^|S| * (N - N_S)^length)
+    total = sum(sizes)
+    if total <= 0:
+        return Count(-math.inf, 0)
+
+    subsets = [subset for size in range(len(sizes) + 1)
+               for subset in itertools.combinations(sizes, size)]
+    if length * math.log2(total) <= EXACT_SUM_BITS:
+        return Count.from_int(sum((-1) ** len(subset) * (total - sum(subset)) ** length
+                                  for subset in subsets))
+
+    # Для длинных строк слагаемые нормируются на N^length: доли меньше единицы
+    # и быстро затухают, поэтому сумма в float не теряет точности
+    ratio = math.fsum((-1) ** len(subset) * ((total - sum(subset)) / total) ** length
+                      for subset in subsets)
+    return Count(length * math.log2(total) + math.log2(ratio))
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def multinomial(counts):
+    # Число различных расстановок символов с заданным количеством каждого класса
+    length = sum(counts)
+    bits = (math.lgamma(length + 1) - sum(math.lgamma(count + 1) for count in counts)) / math.log(2)
+    if bits <= EXACT_BITS + 1:
+        exact = math.factorial(length)
+        for count in counts:
+            exact //= math.factorial(count)
+        return Count.from_int(exact)
+    return Count(bits)
+
+
+def format_combinations(bits, exact=None):
+    if exact is None and bits * LOG10_2 < 6:
+        exact = round(2 ** bits)
+    if exact is not None and exact < 1_000_000:
+        if exact < 1000:
+            return str(exact)
+        return f"{exact:,}".replace(",", " ")
+
+    log10 = bits * LOG10_2
+    power_of_ten = math.floor(log10)
+    return f"{10 ** (log10 - power_of_ten):.2f} × 10^{power_of_ten}"
+
+
+class LRUCache:
+    def __init__(self, maxsize=CACHE_SIZE):
+        if maxsize <= 0:
+            raise ValueError("Размер кэша должен быть положительным")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Общий для процесса кэш размеров пространства паролей: ключ - алгоритм,
+# длина, флаги и размеры алфавитов, поэтому смена словаря или исключение
+# похожих символов не требуют явной очистки
+search_space_cache = LRUCache()
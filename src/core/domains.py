@@ -0,0 +1,144 @@
+import functools
+import ipaddress
+import os
+import threading
+from src.core.wordlist import get_resource_path
+
+DEFAULT_PSL_PATH = get_resource_path(os.path.join("src", "assets", "psl", "public_suffix_list.dat"))
+CACHE_SIZE = 16384
+
+# Ключи узла префиксного дерева: дочерние узлы хранятся по меткам домена,
+# а признаки правила - под ключами, которые не могут быть меткой
+_RULE = 0
+_EXCEPTION = 1
+_WILDCARD = "*"
+
+
+# Кодек idna в Python медленный (десятки микросекунд на метку), а метки
+# вроде "рф" повторяются у множества доменов, поэтому преобразования кэшируются
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _to_ascii(label):
+    return label.encode("idna").decode("ascii") if not label.isascii() else label.lower()
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _to_unicode(label):
+    if not label.startswith("xn--"):
+        return label
+    try:
+        return label.encode("ascii").decode("idna")
+    except UnicodeError:
+        return label
+
+
+def parse_rules(lines):
+    for line in lines:
+        rule = line.split()[0] if line.strip() else ""
+        if rule and not rule.startswith("//"):
+            yield rule
+
+
+def compile_trie(rules):
+    # Дерево строится по меткам справа налево: "co.uk" -> uk -> co
+    root = {}
+    for rule in rules:
+        exception = rule.startswith("!")
+        labels = rule.lstrip("!").split(".")
+        node = root
+        for label in reversed(labels):
+            label = label if label == _WILDCARD else _to_ascii(label)
+            node = node.setdefault(label, {})
+        node[_EXCEPTION if exception else _RULE] = True
+    return root
+
+
+_trie_lock = threading.Lock()
+_tries = {}
+
+
+def suffix_trie(path=None):
+    # Список разбирается при первом обращении, а не при импорте модуля
+    path = os.path.abspath(path or DEFAULT_PSL_PATH)
+    trie = _tries.get(path)
+    if trie is None:
+        with _trie_lock:
+            trie = _tries.get(path)
+            if trie is None:
+                with open(path, "r", encoding="utf-8") as file:
+                    trie = _tries[path] = compile_trie(parse_rules(file))
+    return trie
+
+
+def public_suffix_length(labels, trie):
+    # Число меток публичного суффикса для меток домена в обратном порядке.
+    # Без совпадений действует правило "*": суффиксом считается последняя метка
+    matched = 1
+    node = trie
+    for depth, label in enumerate(labels, 1):
+        child = node.get(label)
+        if child is not None and child.get(_EXCEPTION):
+            return depth - 1
+        wildcard = node.get(_WILDCARD)
+        if wildcard is not None and wildcard.get(_RULE):
+            matched = depth
+        if child is None:
+            break
+        if child.get(_RULE):
+            matched = depth
+        node = child
+    return matched
+
+
+def extract_host(text):
+    # Из адреса остается только имя хоста: схема, учетные данные, порт,
+    # путь, параметры и якорь отбрасываются
+    host = text.strip()
+    if "://" in host:
+        host = host.split("://", 1)[1]
+    for separator in "/?#":
+        host = host.split(separator, 1)[0]
+    host = host.rsplit("@", 1)[-1]
+    if host.startswith("["):
+        return host[1:].split("]", 1)[0]
+    if host.count(":") == 1:
+        host = host.split(":", 1)[0]
+    return host.strip().rstrip(".")
+
+
+def normalize_domain(text):
+    host = extract_host(text)
+    if not host:
+        raise ValueError("Не удалось выделить домен из адреса")
+    return registrable_domain(host.lower())
+
+
+# Кэшируется результат для хоста, а не для исходной строки: адреса одного
+# сайта отличаются путями и параметрами, а хостов у него единицы
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def registrable_domain(host):
+    # Адрес IPv4 оканчивается цифрой, а IPv6 содержит двоеточие; доменов
+    # верхнего уровня из цифр нет, поэтому остальные хосты не разбираются
+    if ":" in host or host[-1].isdigit():
+        try:
+            return str(ipaddress.ip_address(host))
+        except ValueError:
+            pass
+
+    if host.isascii():
+        labels = host.split(".")
+    else:
+        try:
+            labels = [_to_ascii(label) for label in host.split(".")]
+        except UnicodeError:
+            raise ValueError(f"Некорректное имя домена: {host}")
+    if not all(labels):
+        raise ValueError(f"Некорректное имя домена: {host}")
+
+    # Регистрируемый домен - публичный суффикс и еще одна метка слева
+    suffix = public_suffix_length(reversed(labels), suffix_trie())
+    labels = labels[-(suffix + 1):]
+    registrable = ".".join(labels)
+    if "xn--" not in registrable:
+        return registrable
+    # Результат возвращается в Unicode, чтобы кириллические домены оставались читаемыми
+    return ".".join(_to_unicode(label) for label in labels)
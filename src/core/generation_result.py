@@ -0,0 +1,23 @@
+from src.core.combinatorics import LOG10_2
+
+
+class GenerationResult:
+    def __init__(self, password, algorithm, bits, entropy=None, combinations=None):
+        self.password = password
+        self.algorithm = algorithm
+        # Двоичный логарифм числа различных паролей, которые мог выдать генератор
+        self.bits = bits
+        # Энтропия Шеннона; для равномерных алгоритмов совпадает с bits
+        self.entropy = bits if entropy is None else entropy
+        # Точное число комбинаций, если оно достаточно мало, иначе None
+        self.combinations = combinations
+
+    @property
+    def log10(self):
+        return self.bits * LOG10_2
+
+    def __str__(self):
+        return self.password or ""
+
+    def __repr__(self):
+        return f"GenerationResult(algorithm={self.algorithm!r}, bits={self.bits:.2f}, entropy={self.entropy:.2f})"
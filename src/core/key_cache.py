@@ -0,0 +1,108 @@
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = 300
+DEFAULT_MAX_ENTRIES = 32
+
+
+def _wipe(buffer):
+    # Запись нулей на место, без выделения нового буфера
+    buffer[:] = bytes(len(buffer))
+
+
+class KeyCache:
+    # Кэш производных ключей на время сеанса. Ключ записи - HMAC от мастер-пароля,
+    # домена и параметров KDF на случайном ключе сеанса, поэтому по содержимому
+    # кэша нельзя перебирать мастер-пароли. Сами ключи лежат в bytearray и
+    # затираются нулями при вытеснении, истечении срока и очистке
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, clock=time.monotonic):
+        self.set_ttl(ttl)
+        self.set_max_entries(max_entries)
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._secret = secrets.token_bytes(32)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def set_ttl(self, ttl):
+        # Нулевой срок отключает кэш
+        if ttl < 0:
+            raise ValueError("Время жизни записей не может быть отрицательным")
+        self.ttl = ttl
+
+    def set_max_entries(self, max_entries):
+        if max_entries <= 0:
+            raise ValueError("Размер кэша должен быть положительным")
+        self.max_entries = max_entries
+        if hasattr(self, "_data"):
+            with self._lock:
+                self._trim()
+
+    def _digest(self, master, profile, length):
+        mac = hmac.new(self._secret, digestmod=hashlib.sha256)
+        # Части с префиксом длины, чтобы ("ab", "c") и ("a", "bc") не совпадали
+        for part in (master.encode(), profile.salt, profile.kdf.to_json().encode(), str(length).encode()):
+            mac.update(len(part).to_bytes(4, "big"))
+            mac.update(part)
+        return mac.digest()
+
+    def _trim(self):
+        while len(self._data) > self.max_entries:
+            _, (buffer, _) = self._data.popitem(last=False)
+            _wipe(buffer)
+
+    def get(self, master, profile, length):
+        if not self.ttl:
+            return None
+        digest = self._digest(master, profile, length)
+        with self._lock:
+            entry = self._data.get(digest)
+            if entry is not None and entry[1] <= self.clock():
+                del self._data[digest]
+                _wipe(entry[0])
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(digest)
+            self.hits += 1
+            return bytes(entry[0])
+
+    def put(self, master, profile, length, key):
+        if not self.ttl:
+            return
+        digest = self._digest(master, profile, length)
+        with self._lock:
+            previous = self._data.pop(digest, None)
+            if previous is not None:
+                _wipe(previous[0])
+            self._data[digest] = (bytearray(key), self.clock() + self.ttl)
+            self._trim()
+
+    def expire(self):
+        now = self.clock()
+        with self._lock:
+            for digest in [digest for digest, (_, expires) in self._data.items() if expires <= now]:
+                _wipe(self._data.pop(digest)[0])
+
+    def clear(self):
+        with self._lock:
+            for buffer, _ in self._data.values():
+                _wipe(buffer)
+            self._data.clear()
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Общий кэш процесса: диалог мастер-пароля создается заново при каждом открытии
+session_cache = KeyCache()
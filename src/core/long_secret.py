@@ -0,0 +1,127 @@
+import base64
+import binascii
+import math
+from src.core.random_pool import RandomPool
+
+ENCODING_HEX = "hex"
+ENCODING_BASE32 = "base32"
+ENCODING_BASE64 = "base64"
+ENCODING_Z85 = "z85"
+
+_B85_ALPHABET = b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz!#$%&()*+-;<=>?@^_`{|}~"
+_Z85_ALPHABET = b"0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ.-:+=^!/*?&<>()[]{}@%$#"
+_B85_TO_Z85 = bytes.maketrans(_B85_ALPHABET, _Z85_ALPHABET)
+
+
+def _encode_hex(data):
+    return binascii.hexlify(data)
+
+
+def _encode_base32(data):
+    return base64.b32encode(data)
+
+
+def _encode_base64(data):
+    return base64.urlsafe_b64encode(data)
+
+
+def _encode_z85(data):
+    # Z85 отличается от base64.b85encode только алфавитом
+    return base64.b85encode(data).translate(_B85_TO_Z85)
+
+
+# (байт во входной группе, символов в выходной группе, кодировщик, размер алфавита)
+ENCODINGS = {
+    ENCODING_HEX: (1, 2, _encode_hex, 16),
+    ENCODING_BASE32: (5, 8, _encode_base32, 32),
+    ENCODING_BASE64: (3, 4, _encode_base64, 64),
+    ENCODING_Z85: (4, 5, _encode_z85, 85),
+}
+
+# Около 48 КиБ случайных данных за один шаг: кратно размеру группы всех кодировок
+BLOCK_GROUPS = 4096
+
+
+def _check_length(length):
+    if length < 0:
+        raise ValueError("Длина секрета не может быть отрицательной")
+
+
+def generate_encoded(length, encoding, pool=None):
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Неподдерживаемая кодировка: {encoding}")
+    _check_length(length)
+
+    group_bytes, group_chars, encode, _ = ENCODINGS[encoding]
+    pool = pool or RandomPool()
+
+    # Результат пишется напрямую в заранее выделенный буфер, без склейки строк
+    output = bytearray(length)
+    view = memoryview(output)
+    block_chars = BLOCK_GROUPS * group_chars
+    position = 0
+    while position < length:
+        chars = min(block_chars, length - position)
+        groups = -(-chars // group_chars)
+        encoded = encode(pool.take(groups * group_bytes))
+        view[position:position + chars] = encoded[:chars]
+        position += chars
+    view.release()
+
+    return output.decode("ascii")
+
+
+def generate_from_alphabet(length, profile, pool=None):
+    _check_length(length)
+    # Без места для каждого выбранного класса секрет вышел бы длиннее запрошенного
+    if length < len(profile.classes):
+        raise ValueError(f"Длина секрета должна быть не меньше числа типов символов ({len(profile.classes)})")
+    pool = pool or RandomPool()
+
+    output = bytearray(length)
+    view = memoryview(output)
+    table, rejected, limit = profile.translation
+
+    position = 0
+    while position < length:
+        missing = length - position
+        chunk = pool.take(min(-(-missing * 256 // limit) + 8, RandomPool.DEFAULT_CHUNK_SIZE))
+        accepted = chunk.translate(table, rejected)[:missing]
+        view[position:position + len(accepted)] = accepted
+        position += len(accepted)
+    view.release()
+
+    # Обязательные символы каждого класса ставятся на случайные различные позиции
+    for position, alphabet in zip(pool.sample(length, len(profile.classes)), profile.classes):
+        output[position] = ord(alphabet[pool.below(len(alphabet))])
+
+    return output.decode("ascii")
+
+
+def combinations(length, encoding):
+    group_bytes, group_chars, _, alphabet_size = ENCODINGS[encoding]
+    if encoding != ENCODING_Z85:
+        return alphabet_size ** length
+
+    # Символы Z85 неравномерны: каждая группа из 5 символов несет ровно 32 бита,
+    # а неполная группа из r символов различает ceil(2^32 / 85^(5 - r)) префиксов
+    full_groups, remainder = divmod(length, group_chars)
+    total = 1 << (8 * group_bytes * full_groups)
+    if remainder:
+        space = 1 << (8 * group_bytes)
+        total *= -(-space // alphabet_size ** (group_chars - remainder))
+    return total
+
+
+def combinations_log2(length, encoding):
+    # То же, что combinations, но без построения целого числа из тысяч цифр
+    group_bytes, group_chars, _, alphabet_size = ENCODINGS[encoding]
+    if encoding != ENCODING_Z85:
+        return length * math.log2(alphabet_size)
+
+    full_groups, remainder = divmod(length, group_chars)
+    bits = 8 * group_bytes * full_groups
+    if remainder:
+        space = 1 << (8 * group_bytes)
+        bits += math.log2(-(-space // alphabet_size ** (group_chars - remainder)))
+    return bits
@@ -0,0 +1,278 @@
+import functools
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_right
+from src.core.wordlist import get_resource_path
+
+# Формат файла: заголовок, алфавит (дополненный до кратного 4 размера),
+# таблица из S + 1 смещений uint32 для всех контекстов, накопленные частоты
+# переходов uint32 и коды следующих символов uint8 (little-endian).
+# Контекст - последние order символов, код 0 обозначает начало слова
+MAGIC = b"GPMK"
+VERSION = 1
+_HEADER = struct.Struct("<4sHBBI")
+
+DEFAULT_ORDER = 2
+DEFAULT_MODEL_PATH = get_resource_path(os.path.join("src", "assets", "models", "phonetic.gpmk"))
+
+
+def _context_count(order, alphabet_size):
+    return (alphabet_size + 1) ** order
+
+
+def build_model(words, path, order=DEFAULT_ORDER):
+    words = [word.strip().lower() for word in words if word.strip()]
+    alphabet = "".join(sorted(set("".join(words))))
+    if not alphabet:
+        raise ValueError("Корпус не содержит ни одного слова")
+    if not alphabet.isascii() or len(alphabet) > 255:
+        raise ValueError("Алфавит корпуса должен состоять из ASCII-символов")
+
+    codes = {char: code for code, char in enumerate(alphabet, 1)}
+    base = len(alphabet) + 1
+    size = _context_count(order, len(alphabet))
+    counts = [dict() for _ in range(size)]
+
+    for word in words:
+        context = 0
+        for char in word:
+            code = codes[char]
+            counts[context][code] = counts[context].get(code, 0) + 1
+            context = context * base % size + code
+
+    offsets = array("I", [0])
+    cumulative = array("I")
+    next_codes = bytearray()
+    for transitions in counts:
+        total = 0
+        for code in sorted(transitions):
+            total += transitions[code]
+            cumulative.append(total)
+            next_codes.append(code)
+        offsets.append(len(cumulative))
+    if sys.byteorder != "little":
+        offsets.byteswap()
+        cumulative.byteswap()
+
+    encoded_alphabet = alphabet.encode("ascii")
+    with open(path, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, order, len(alphabet), len(cumulative)))
+        file.write(encoded_alphabet.ljust(-(-len(encoded_alphabet) // 4) * 4, b"\0"))
+        file.write(offsets.tobytes())
+        file.write(cumulative.tobytes())
+        file.write(next_codes)
+
+    return len(cumulative)
+
+
+class _Tables:
+    # Таблицы переходов для конкретного набора исключенных символов
+    def __init__(self, offsets, cumulative, codes):
+        self.offsets = offsets
+        self.cumulative = cumulative
+        self.codes = codes
+
+
+_shared_lock = threading.Lock()
+_shared_models = {}
+
+
+def shared_model(path=None):
+    path = os.path.abspath(path or DEFAULT_MODEL_PATH)
+    with _shared_lock:
+        model = _shared_models.get(path)
+        if model is None:
+            model = _shared_models[path] = MarkovModel(path)
+        return model
+
+
+class MarkovModel:
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_MODEL_PATH
+        self.order = None
+        self.alphabet = None
+        self._file = None
+        self._mmap = None
+        self._tables = {}
+        self._lock = threading.RLock()
+
+    def _open(self):
+        if self._mmap is not None:
+            return
+
+        with self._lock:
+            if self._mmap is None:
+                self._map_file()
+
+    def _map_file(self):
+        file = open(self.path, "rb")
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            file.close()
+            raise
+
+        magic, version, order, alphabet_size, transitions = _HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC or version != VERSION:
+            mapped.close()
+            file.close()
+            raise ValueError(f"Неверный формат файла модели: {self.path}")
+
+        start = _HEADER.size
+        alphabet = bytes(mapped[start:start + alphabet_size]).decode("ascii")
+        start += -(-alphabet_size // 4) * 4
+        offsets_end = start + 4 * (_context_count(order, alphabet_size) + 1)
+        cumulative_end = offsets_end + 4 * transitions
+
+        view = memoryview(mapped)
+        if sys.byteorder == "little":
+            offsets = view[start:offsets_end].cast("I")
+            cumulative = view[offsets_end:cumulative_end].cast("I")
+        else:
+            offsets = array("I", view[start:offsets_end])
+            cumulative = array("I", view[offsets_end:cumulative_end])
+            offsets.byteswap()
+            cumulative.byteswap()
+
+        self.order = order
+        self.alphabet = alphabet
+        self._file = file
+        self._tables[""] = _Tables(offsets, cumulative, view[cumulative_end:cumulative_end + transitions])
+        self._mmap = mapped
+
+    def close(self):
+        with self._lock:
+            if self._mmap is None:
+                return
+            for tables in self._tables.values():
+                for buffer in (tables.offsets, tables.cumulative, tables.codes):
+                    if isinstance(buffer, memoryview):
+                        buffer.release()
+            self._tables.clear()
+            self.statistics.cache_clear()
+            self._mmap.close()
+            self._file.close()
+            self._file = self._mmap = None
+
+    def tables(self, excluded=""):
+        self._open()
+        excluded = "".join(sorted(set(excluded) & set(self.alphabet)))
+        tables = self._tables.get(excluded)
+        if tables is None:
+            with self._lock:
+                tables = self._tables.get(excluded)
+                if tables is None:
+                    tables = self._tables[excluded] = self._filter(excluded)
+        return tables
+
+    def _filter(self, excluded):
+        # Переходы в исключенные символы удаляются, частоты накапливаются заново
+        source = self._tables[""]
+        banned = {self.alphabet.index(char) + 1 for char in excluded}
+        offsets = array("I", [0])
+        cumulative = array("I")
+        codes = bytearray()
+        for context in range(len(source.offsets) - 1):
+            total = previous = 0
+            for index in range(source.offsets[context], source.offsets[context + 1]):
+                count = source.cumulative[index] - previous
+                previous = source.cumulative[index]
+                if source.codes[index] not in banned:
+                    total += count
+                    cumulative.append(total)
+                    codes.append(source.codes[index])
+            offsets.append(len(cumulative))
+        return _Tables(offsets, cumulative, bytes(codes))
+
+    def _resolve(self, offsets, context):
+        # Тупиковый контекст сокращается до последнего символа, а затем до начала
+        # слова; правило детерминировано, поэтому вероятности остаются точными
+        base = len(self.alphabet) + 1
+        if offsets[context] == offsets[context + 1]:
+            context %= base
+            if offsets[context] == offsets[context + 1]:
+                context = 0
+        return context
+
+    def sample(self, pool, length, excluded=""):
+        tables = self.tables(excluded)
+        offsets, cumulative, codes = tables.offsets, tables.cumulative, tables.codes
+        alphabet = self.alphabet
+        base = len(alphabet) + 1
+        size = base ** self.order
+
+        chars = []
+        context = 0
+        for _ in range(length):
+            context = self._resolve(offsets, context)
+            start, end = offsets[context], offsets[context + 1]
+            total = cumulative[end - 1]
+            # Двоичный поиск по накопленным частотам превращает равномерное
+            # число от CSPRNG в символ с вероятностью, пропорциональной частоте
+            index = bisect_right(cumulative, pool.below(total), start, end)
+            code = codes[index]
+            chars.append(alphabet[code - 1])
+            context = context * base % size + code
+
+        return "".join(chars)
+
+    @functools.lru_cache(maxsize=128)
+    def statistics(self, length, excluded="", tracked=""):
+        # Точные энтропия Шеннона (бит) и число различных строк длины length.
+        # Для символов из tracked дополнительно строится распределение их
+        # количества в строке: probabilities[k] и counts[k]
+        tables = self.tables(excluded)
+        offsets, cumulative, codes = tables.offsets, tables.cumulative, tables.codes
+        base = len(self.alphabet) + 1
+        size = base ** self.order
+        tracked_codes = {self.alphabet.index(char) + 1 for char in tracked if char in self.alphabet}
+
+        entropy = 0.0
+        # Состояние: контекст -> (вероятности по k, число строк по k)
+        states = {0: ([1.0], [1])}
+        for _ in range(length):
+            next_states = {}
+            for context, (probabilities, counts) in states.items():
+                context = self._resolve(offsets, context)
+                start, end = offsets[context], offsets[context + 1]
+                total = cumulative[end - 1]
+                weight = sum(probabilities)
+                previous = 0
+                for index in range(start, end):
+                    count = cumulative[index] - previous
+                    previous = cumulative[index]
+                    share = count / total
+                    entropy += weight * share * math.log2(total / count)
+
+                    code = codes[index]
+                    shift = 1 if code in tracked_codes else 0
+                    target = context * base % size + code
+                    state = next_states.get(target)
+                    if state is None:
+                        state = next_states[target] = ([], [])
+                    target_probabilities, target_counts = state
+                    needed = len(probabilities) + shift
+                    if len(target_probabilities) < needed:
+                        target_probabilities.extend([0.0] * (needed - len(target_probabilities)))
+                        target_counts.extend([0] * (needed - len(target_counts)))
+                    for k, probability in enumerate(probabilities):
+                        target_probabilities[k + shift] += probability * share
+                        target_counts[k + shift] += counts[k]
+            states = next_states
+
+        probabilities = [0.0]
+        counts = [0]
+        for state_probabilities, state_counts in states.values():
+            if len(probabilities) < len(state_probabilities):
+                probabilities.extend([0.0] * (len(state_probabilities) - len(probabilities)))
+                counts.extend([0] * (len(state_counts) - len(counts)))
+            for k, probability in enumerate(state_probabilities):
+                probabilities[k] += probability
+                counts[k] += state_counts[k]
+
+        return entropy, tuple(probabilities), tuple(counts)
@@ -0,0 +1,443 @@
+import collections
+import hashlib
+import hmac
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.core.charset_profile import CharsetProfile, UPPERCASE, LOWERCASE, DIGITS, SPECIAL
+from src.core.domains import normalize_domain
+
+try:
+    from argon2.low_level import Type as _Argon2Type, hash_secret_raw as _argon2_hash_raw
+    ARGON2_AVAILABLE = True
+except ImportError:
+    _Argon2Type = _argon2_hash_raw = None
+    ARGON2_AVAILABLE = False
+
+KDF_PBKDF2 = "pbkdf2"
+KDF_SCRYPT = "scrypt"
+KDF_ARGON2ID = "argon2id"
+
+KEY_LENGTH = 32
+
+# Схема 1 - исходное отображение ключа в 16 символов, схема 2 - HKDF-расширение
+# ключа и выборка без смещения с настраиваемыми длиной и классами символов
+SCHEME_V1 = 1
+SCHEME_V2 = 2
+
+LEGACY_LENGTH = 16
+MIN_LENGTH = 4
+MAX_LENGTH = 128
+CLASS_ALL = (CharsetProfile.CLASS_UPPER | CharsetProfile.CLASS_LOWER
+             | CharsetProfile.CLASS_DIGITS | CharsetProfile.CLASS_SPECIAL)
+# Задач в очереди пакетного вычисления на один поток
+BATCH_WINDOW = 4
+
+
+class KDF:
+    name = None
+
+    def derive(self, secret, salt, length=KEY_LENGTH):
+        raise NotImplementedError
+
+    def params(self):
+        raise NotImplementedError
+
+    def to_json(self):
+        return json.dumps(self.params(), sort_keys=True)
+
+    def _key(self):
+        return tuple(sorted(self.params().items()))
+
+    def __eq__(self, other):
+        return isinstance(other, KDF) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        arguments = ", ".join(f"{name}={value!r}" for name, value in self.params().items() if name != "name")
+        return f"{type(self).__name__}({arguments})"
+
+
+class PBKDF2(KDF):
+    name = KDF_PBKDF2
+
+    def __init__(self, hash_name="sha256", iterations=100000):
+        try:
+            hashlib.new(hash_name)
+        except (ValueError, TypeError):
+            raise ValueError(f"Неподдерживаемая хеш-функция: {hash_name}")
+        if iterations < 1:
+            raise ValueError("Число итераций PBKDF2 должно быть положительным")
+        self.hash_name = hash_name
+        self.iterations = int(iterations)
+
+    def derive(self, secret, salt, length=KEY_LENGTH):
+        return hashlib.pbkdf2_hmac(self.hash_name, secret, salt, self.iterations, dklen=length)
+
+    def params(self):
+        return {"name": self.name, "hash_name": self.hash_name, "iterations": self.iterations}
+
+
+class Scrypt(KDF):
+    name = KDF_SCRYPT
+
+    def __init__(self, n=2 ** 15, r=8, p=1):
+        if n < 2 or n & (n - 1):
+            raise ValueError("Параметр N для scrypt должен быть степенью двойки больше 1")
+        if r < 1 or p < 1:
+            raise ValueError("Параметры r и p для scrypt должны быть положительными")
+        self.n = int(n)
+        self.r = int(r)
+        self.p = int(p)
+
+    @property
+    def memory(self):
+        # Объем памяти, который OpenSSL проверяет перед вычислением, в байтах
+        return 128 * self.r * (self.n + self.p + 2)
+
+    def derive(self, secret, salt, length=KEY_LENGTH):
+        return hashlib.scrypt(secret, salt=salt, n=self.n, r=self.r, p=self.p,
+                              maxmem=self.memory + (1 << 20), dklen=length)
+
+    def params(self):
+        return {"name": self.name, "n": self.n, "r": self.r, "p": self.p}
+
+
+class Argon2id(KDF):
+    name = KDF_ARGON2ID
+
+    def __init__(self, time_cost=3, memory_cost=65536, parallelism=4):
+        if time_cost < 1 or parallelism < 1:
+            raise ValueError("Параметры time_cost и parallelism для Argon2id должны быть положительными")
+        if memory_cost < 8 * parallelism:
+            raise ValueError("Параметр memory_cost для Argon2id должен быть не меньше 8 КиБ на поток")
+        self.time_cost = int(time_cost)
+        self.memory_cost = int(memory_cost)
+        self.parallelism = int(parallelism)
+
+    @property
+    def memory(self):
+        return self.memory_cost * 1024
+
+    def derive(self, secret, salt, length=KEY_LENGTH):
+        if not ARGON2_AVAILABLE:
+            raise ValueError("Argon2id недоступен: установите пакет argon2-cffi")
+        # Argon2 требует соль не короче 8 байт, а домен бывает короче,
+        # поэтому солью служит SHA-256 от домена
+        return _argon2_hash_raw(secret, hashlib.sha256(salt).digest(), self.time_cost,
+                                self.memory_cost, self.parallelism, length, _Argon2Type.ID)
+
+    def params(self):
+        return {"name": self.name, "time_cost": self.time_cost,
+                "memory_cost": self.memory_cost, "parallelism": self.parallelism}
+
+
+KDF_BACKENDS = {
+    KDF_PBKDF2: PBKDF2,
+    KDF_SCRYPT: Scrypt,
+    KDF_ARGON2ID: Argon2id,
+}
+
+
+def available_backends():
+    return [name for name in KDF_BACKENDS if name != KDF_ARGON2ID or ARGON2_AVAILABLE]
+
+
+def kdf_from_params(params):
+    if isinstance(params, str):
+        params = json.loads(params)
+    params = dict(params)
+    name = params.pop("name", None)
+    if name not in KDF_BACKENDS:
+        raise ValueError(f"Неизвестная функция формирования ключа: {name}")
+    try:
+        return KDF_BACKENDS[name](**params)
+    except TypeError:
+        raise ValueError(f"Неверные параметры для {name}: {params}")
+
+
+# Исходная схема: 100 000 итераций PBKDF2-HMAC-SHA256. Уже выданные пароли
+# должны воспроизводиться побитово, поэтому параметры не меняются
+LEGACY_KDF = PBKDF2("sha256", 100000)
+
+
+class SiteProfile:
+    def __init__(self, domain, kdf=None, scheme=SCHEME_V1, length=LEGACY_LENGTH, classes=CLASS_ALL, counter=1):
+        if counter < 1:
+            raise ValueError("Номер пароля должен быть положительным")
+        if scheme not in SCHEMES:
+            raise ValueError(f"Неизвестная версия схемы: {scheme}")
+        if scheme == SCHEME_V2:
+            if not classes or classes & ~CLASS_ALL:
+                raise ValueError("Должен быть выбран хотя бы один тип символов")
+            if not MIN_LENGTH <= length <= MAX_LENGTH:
+                raise ValueError(f"Длина пароля должна быть от {MIN_LENGTH} до {MAX_LENGTH}")
+        self.domain = domain
+        self.kdf = kdf or LEGACY_KDF
+        self.scheme = scheme
+        # Схема 1 всегда выдает 16 символов всех четырех классов
+        self.length = length if scheme == SCHEME_V2 else LEGACY_LENGTH
+        self.classes = classes if scheme == SCHEME_V2 else CLASS_ALL
+        # Номер пароля позволяет сменить пароль сайта, не меняя мастер-пароль
+        self.counter = counter
+
+    @property
+    def salt(self):
+        # Первый пароль сайта солится одним доменом, как в исходной схеме;
+        # нулевой байт отделяет номер, так как в домене он встретиться не может
+        if self.counter == 1:
+            return self.domain.encode()
+        return self.domain.encode() + b"\0" + str(self.counter).encode()
+
+    @property
+    def charset(self):
+        return CharsetProfile.get(bool(self.classes & CharsetProfile.CLASS_UPPER),
+                                  bool(self.classes & CharsetProfile.CLASS_LOWER),
+                                  bool(self.classes & CharsetProfile.CLASS_DIGITS),
+                                  bool(self.classes & CharsetProfile.CLASS_SPECIAL))
+
+    def __repr__(self):
+        return (f"SiteProfile(domain={self.domain!r}, kdf={self.kdf!r}, scheme={self.scheme}, "
+                f"length={self.length}, classes={self.classes}, counter={self.counter})")
+
+
+def canonical_domain(domain, scheme):
+    # В схеме 2 солью служит регистрируемый домен: "Google.com", "www.google.com"
+    # и адрес страницы входа дают один пароль. Схема 1 солится строкой
+    # как есть, иначе изменились бы уже выданные пароли
+    if scheme == SCHEME_V1:
+        return domain
+    return normalize_domain(domain)
+
+
+def legacy_profile(domain):
+    return SiteProfile(domain, LEGACY_KDF)
+
+
+def derive_key(master, profile, length=KEY_LENGTH, cache=None):
+    if cache is not None:
+        key = cache.get(master, profile, length)
+        if key is not None:
+            return key
+    key = profile.kdf.derive(master.encode(), profile.salt, length)
+    if cache is not None:
+        cache.put(master, profile, length, key)
+    return key
+
+
+def legacy_mapping(key, profile=None):
+    # Отображение 32-байтового ключа в пароль из 16 символов по блокам классов;
+    # сохранено без изменений, включая смещение от взятия остатка
+    key_hex = key.hex()
+
+    password = ""
+    for start, alphabet in ((0, UPPERCASE), (8, LOWERCASE), (16, DIGITS), (24, SPECIAL)):
+        for i in range(start, start + 8, 2):
+            password += alphabet[int(key_hex[i:i+2], 16) % len(alphabet)]
+
+    password_chars = list(password)
+    for i in range(len(password_chars) - 1):
+        # Индекс обмена берется из i-го шестнадцатеричного символа ключа, j > i
+        j = i + 1 + (int(key_hex[i % 16], 16) % (len(password_chars) - i - 1))
+        password_chars[i], password_chars[j] = password_chars[j], password_chars[i]
+
+    return ''.join(password_chars)
+
+
+_HKDF_HASH = hashlib.sha256
+_HKDF_SALT = b"genpass/v2"
+# HKDF-Expand выдает не больше 255 блоков хеша за один вызов
+_HKDF_MAX_OUTPUT = 255 * _HKDF_HASH().digest_size
+
+
+def hkdf_extract(salt, key):
+    return hmac.new(salt, key, _HKDF_HASH).digest()
+
+
+def hkdf_expand(prk, info, length):
+    # RFC 5869: T(i) = HMAC(PRK, T(i-1) | info | i)
+    if length > _HKDF_MAX_OUTPUT:
+        raise ValueError("Слишком большой объем данных для HKDF-Expand")
+    output = bytearray()
+    block = b""
+    counter = 1
+    while len(output) < length:
+        block = hmac.new(prk, block + info + bytes([counter]), _HKDF_HASH).digest()
+        output += block
+        counter += 1
+    return bytes(output[:length])
+
+
+class _KeyStream:
+    # Детерминированный поток байтов из HKDF. Числа без смещения получаются
+    # отбрасыванием байтов >= limit, как в RandomPool.below, но правило
+    # зафиксировано здесь: от него зависят уже выданные пароли схемы 2
+    def __init__(self, key, info):
+        self._prk = hkdf_extract(_HKDF_SALT, key)
+        self._info = info
+        self._segment = 0
+        self._buffer = b""
+        self._pos = 0
+
+    def _refill(self):
+        # Отбраковка может потребовать больше одного вызова HKDF-Expand,
+        # поэтому номер сегмента добавляется к info
+        self._buffer = hkdf_expand(self._prk, self._info + self._segment.to_bytes(4, "big"), _HKDF_MAX_OUTPUT)
+        self._segment += 1
+        self._pos = 0
+
+    def below(self, n):
+        limit = 256 - 256 % n
+        while True:
+            if self._pos >= len(self._buffer):
+                self._refill()
+            value = self._buffer[self._pos]
+            self._pos += 1
+            if value < limit:
+                return value % n
+
+
+def v2_mapping(key, profile):
+    # Сначала по одному символу каждого выбранного класса, остальное из общего
+    # алфавита, затем перемешивание Фишера - Йетса; все индексы без смещения
+    charset = profile.charset
+    info = b"password" + bytes([profile.scheme, profile.length, profile.classes])
+    stream = _KeyStream(key, info)
+
+    chars = [alphabet[stream.below(len(alphabet))] for alphabet in charset.classes]
+    alphabet = charset.alphabet
+    chars.extend(alphabet[stream.below(len(alphabet))] for _ in range(profile.length - len(chars)))
+    for i in range(len(chars) - 1, 0, -1):
+        j = stream.below(i + 1)
+        chars[i], chars[j] = chars[j], chars[i]
+    return "".join(chars)
+
+
+SCHEMES = {
+    SCHEME_V1: legacy_mapping,
+    SCHEME_V2: v2_mapping,
+}
+
+
+def derive_password(master, profile, cache=None):
+    if isinstance(profile, str):
+        profile = legacy_profile(profile)
+    return SCHEMES[profile.scheme](derive_key(master, profile, cache=cache), profile)
+
+
+CALIBRATION_TARGET_MS = 250
+CALIBRATION_MEMORY_MB = 64
+# Пробное вычисление должно быть достаточно долгим, чтобы погрешность
+# таймера и накладные расходы вызова не искажали пропорцию
+CALIBRATION_PROBE_MS = 50
+CALIBRATION_REPEATS = 3
+
+SCRYPT_R = 8
+SCRYPT_MIN_N = 2 ** 10
+PBKDF2_MIN_ITERATIONS = 1000
+ARGON2_MAX_PARALLELISM = 4
+
+_CALIBRATION_SECRET = b"genpass-calibration"
+_CALIBRATION_SALT = b"calibration.example"
+
+
+def measure(kdf, repeats=CALIBRATION_REPEATS):
+    # Лучшее из нескольких измерений, в миллисекундах
+    best = math.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        kdf.derive(_CALIBRATION_SECRET, _CALIBRATION_SALT)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _calibrate_pbkdf2(target_ms, memory_mb, hash_name):
+    iterations = PBKDF2_MIN_ITERATIONS
+    elapsed = measure(PBKDF2(hash_name, iterations))
+    while elapsed < CALIBRATION_PROBE_MS:
+        iterations *= 2
+        elapsed = measure(PBKDF2(hash_name, iterations))
+    # Время PBKDF2 линейно по числу итераций
+    iterations = int(iterations * target_ms / elapsed) // 1000 * 1000
+    return PBKDF2(hash_name, max(PBKDF2_MIN_ITERATIONS, iterations))
+
+
+def _calibrate_scrypt(target_ms, memory_mb, hash_name):
+    # N - наибольшая степень двойки, помещающаяся в бюджет памяти
+    n = SCRYPT_MIN_N
+    while Scrypt(n * 2, SCRYPT_R).memory <= memory_mb * 1024 * 1024:
+        n *= 2
+    elapsed = measure(Scrypt(n, SCRYPT_R))
+    while elapsed > target_ms and n > SCRYPT_MIN_N:
+        n //= 2
+        elapsed = measure(Scrypt(n, SCRYPT_R))
+    # Оставшееся до цели время добирается параметром p: в OpenSSL ветви
+    # выполняются последовательно и не требуют дополнительной памяти
+    return Scrypt(n, SCRYPT_R, max(1, int(target_ms / elapsed)))
+
+
+def _calibrate_argon2id(target_ms, memory_mb, hash_name):
+    if not ARGON2_AVAILABLE:
+        raise ValueError("Argon2id недоступен: установите пакет argon2-cffi")
+    parallelism = min(ARGON2_MAX_PARALLELISM, os.cpu_count() or 1)
+    memory_cost = memory_mb * 1024
+    elapsed = measure(Argon2id(1, memory_cost, parallelism))
+    while elapsed > target_ms and memory_cost > 16 * 1024:
+        memory_cost //= 2
+        elapsed = measure(Argon2id(1, memory_cost, parallelism))
+    return Argon2id(max(1, int(target_ms / elapsed)), memory_cost, parallelism)
+
+
+_CALIBRATORS = {
+    KDF_PBKDF2: _calibrate_pbkdf2,
+    KDF_SCRYPT: _calibrate_scrypt,
+    KDF_ARGON2ID: _calibrate_argon2id,
+}
+
+
+def calibrate(name=KDF_PBKDF2, target_ms=CALIBRATION_TARGET_MS, memory_mb=CALIBRATION_MEMORY_MB,
+              hash_name="sha256"):
+    # Подбирает параметры под целевое время вычисления на этой машине и
+    # возвращает (kdf, фактическое время в мс) для записи в профиль
+    if name not in _CALIBRATORS:
+        raise ValueError(f"Неизвестная функция формирования ключа: {name}")
+    if target_ms <= 0:
+        raise ValueError("Целевое время должно быть положительным")
+    if memory_mb <= 0:
+        raise ValueError("Бюджет памяти должен быть положительным")
+
+    kdf = _CALIBRATORS[name](target_ms, memory_mb, hash_name)
+    return kdf, measure(kdf)
+
+
+def _derive_one(master, domain, kdf, scheme, length, classes):
+    profile = SiteProfile(canonical_domain(domain, scheme), kdf, scheme, length, classes)
+    return domain, derive_password(master, profile)
+
+
+def derive_many(master, domains, kdf=None, workers=None, scheme=SCHEME_V1, length=LEGACY_LENGTH,
+                classes=CLASS_ALL):
+    # Пароли для списка доменов в исходном порядке. PBKDF2 и scrypt отпускают
+    # GIL, поэтому потоки загружают все ядра без накладных расходов процессов.
+    # В работе держится не больше нескольких задач на поток, так что входной
+    # список может быть сколь угодно длинным, а результаты идут потоком
+    kdf = kdf or LEGACY_KDF
+    workers = workers or os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("Число потоков должно быть положительным")
+    # Политика проверяется до запуска потоков, а не на первом домене
+    SiteProfile("", kdf, scheme, length, classes)
+
+    window = workers * BATCH_WINDOW
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = collections.deque()
+        for domain in domains:
+            pending.append(executor.submit(_derive_one, master, domain, kdf, scheme, length, classes))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,151 @@
+import importlib.util
+
+# Сам NumPy импортируется при первой векторной партии: импорт занимает
+# около 0.1 с и не нужен, если пользователь генерирует пароли по одному
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+np = None
+
+
+def _load():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+
+# Для небольших партий накладные расходы NumPy больше выигрыша
+MIN_BATCH_SIZE = 1000
+
+
+def is_enabled(count):
+    return NUMPY_AVAILABLE and count >= MIN_BATCH_SIZE
+
+
+def _codes(alphabet):
+    return np.frombuffer(alphabet.encode("ascii"), dtype=np.uint8)
+
+
+def _sample_indices(pool, size, total):
+    # Векторизованная выборка без смещения: байты >= limit отбрасываются
+    limit = 256 - 256 % size
+    result = np.empty(total, dtype=np.uint8)
+    filled = 0
+    while filled < total:
+        missing = total - filled
+        raw = np.frombuffer(pool.take(-(-missing * 256 // limit) + 64), dtype=np.uint8)
+        accepted = raw[raw < limit][:missing]
+        result[filled:filled + len(accepted)] = accepted % size
+        filled += len(accepted)
+    return result
+
+
+def _sample_codes(pool, alphabet, total):
+    return _codes(alphabet)[_sample_indices(pool, len(alphabet), total)]
+
+
+def _permutations(pool, count, length):
+    # Случайная перестановка каждой строки через сортировку 64-битных ключей
+    keys = np.frombuffer(pool.take(count * length * 8), dtype=np.uint64).reshape(count, length)
+    return np.argsort(keys, axis=1, kind="stable")
+
+
+def _decode(matrix):
+    count, length = matrix.shape
+    data = np.ascontiguousarray(matrix).tobytes().decode("ascii")
+    return [data[i * length:(i + 1) * length] for i in range(count)]
+
+
+def generate_secrets(pool, count, length, profile):
+    _load()
+    if count == 0:
+        return []
+
+    classes = profile.classes
+    length = max(length, len(classes))
+
+    matrix = _sample_codes(pool, profile.alphabet, count * length).reshape(count, length)
+
+    # Обязательные символы встают на k случайных различных позиций строки,
+    # что эквивалентно добавлению их в конец и перемешиванию
+    positions = _permutations(pool, count, length)[:, :len(classes)]
+    rows = np.arange(count)
+    for column, alphabet in enumerate(classes):
+        matrix[rows, positions[:, column]] = _sample_codes(pool, alphabet, count)
+
+    return _decode(matrix)
+
+
+def generate_pattern(pool, count, length, profile):
+    _load()
+    pattern = profile.pattern(length)
+    if count == 0 or not pattern:
+        return [pattern] * count
+
+    symbols = np.frombuffer(pattern.encode("ascii"), dtype=np.uint8)
+    layout = symbols[_permutations(pool, count, len(pattern))]
+
+    matrix = np.empty(layout.shape, dtype=np.uint8)
+    for symbol, alphabet in profile.pattern_alphabets().items():
+        mask = layout == ord(symbol)
+        total = int(mask.sum())
+        if total:
+            matrix[mask] = _sample_codes(pool, alphabet, total)
+
+    return _decode(matrix)
+
+
+# Пароли длиннее этого значения оцениваются поштучно, чтобы не раздувать матрицу
+MAX_STRENGTH_WIDTH = 256
+
+
+def check_strength(passwords, class_table, strength_tables, fallback):
+    _load()
+    length_scores, class_scores = strength_tables
+    count = len(passwords)
+    scores = np.zeros(count, dtype=np.int64)
+
+    encoded = []
+    rows = []
+    for index, password in enumerate(passwords):
+        try:
+            data = password.encode("ascii")
+        except UnicodeEncodeError:
+            data = None
+        if data is None or len(data) > MAX_STRENGTH_WIDTH:
+            scores[index] = fallback(password)
+        else:
+            encoded.append(data)
+            rows.append(index)
+
+    if encoded:
+        lengths = np.fromiter((len(data) for data in encoded), dtype=np.int64, count=len(encoded))
+        width = max(int(lengths.max()), 1)
+
+        # Матрица с дополнением значением 256, которое не совпадает ни с одним байтом
+        matrix = np.full((len(encoded), width), 256, dtype=np.uint16)
+        flat = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        starts = np.cumsum(lengths) - lengths
+        row_index = np.repeat(np.arange(len(encoded)), lengths)
+        column_index = np.arange(len(flat)) - np.repeat(starts, lengths)
+        matrix[row_index, column_index] = flat
+
+        lookup = np.zeros(257, dtype=np.uint8)
+        lookup[:256] = np.frombuffer(class_table, dtype=np.uint8)
+        classes = lookup[matrix]
+        class_mask = np.zeros(len(encoded), dtype=np.int64)
+        for bit in (1, 2, 4, 8):
+            class_mask |= np.where((classes == bit).any(axis=1), bit, 0)
+
+        ordered = np.sort(matrix, axis=1)
+        unique = 1 + (ordered[:, 1:] != ordered[:, :-1]).sum(axis=1)
+        unique -= (lengths < width).astype(np.int64)
+        unique[lengths == 0] = 0
+
+        ratio = np.divide(unique, lengths, out=np.zeros(len(encoded)), where=lengths > 0)
+        total = (np.asarray(length_scores)[np.minimum(lengths, 16)]
+                 + np.asarray(class_scores)[class_mask]
+                 + np.floor(ratio * 10).astype(np.int64))
+        total = np.where(lengths < 6, np.minimum(total, 30), total)
+        total = total + np.where(lengths > 16, np.minimum(10, (lengths - 16) // 2), 0)
+        scores[np.asarray(rows)] = np.minimum(total, 100)
+
+    return scores.astype(np.uint8).tobytes()
@@ -1,297 +1,781 @@
+import functools
+import itertools
+import math
 import secrets
-import string
-import random
+from array import array
+from src.core import combinatorics, long_secret, numpy_backend
+from src.core.generation_result import GenerationResult
+from src.core.markov import shared_model
+from src.core.random_pool import RandomPool
+from src.core.uniqueness import UniquenessTracker
+from src.core.wordlist import shared_wordlist
+from src.core.charset_profile import (CharsetProfile, UPPERCASE, LOWERCASE, DIGITS, SPECIAL,
+                                     SIMILAR_CHARACTERS, is_similar_free)
+
+_system_random = secrets.SystemRandom()
 
 class PasswordGenerator:
     ALGORITHM_SECRETS = "secrets"
     ALGORITHM_PHONETIC = "phonetic"
     ALGORITHM_PATTERN = "pattern"
     ALGORITHM_MEMORABLE = "memorable"
+    ALGORITHM_PASSPHRASE = "passphrase"
+    ALGORITHM_HEX = long_secret.ENCODING_HEX
+    ALGORITHM_BASE32 = long_secret.ENCODING_BASE32
+    ALGORITHM_BASE64 = long_secret.ENCODING_BASE64
+    ALGORITHM_Z85 = long_secret.ENCODING_Z85
+
+    ENCODED_ALGORITHMS = (ALGORITHM_HEX, ALGORITHM_BASE32, ALGORITHM_BASE64, ALGORITHM_Z85)
+
+    # Верхняя граница длины для режима длинных секретов
+    MAX_SECRET_LENGTH = 16 * 1024 * 1024
+
+    # Размер пространства паролей в битах, соответствующий максимальной оценке надежности
+    STRENGTH_FULL_BITS = 100
+
+    PLACEMENT_SHUFFLE = "shuffle"
+    PLACEMENT_INSERT = "insert"
+
+    PASSPHRASE_MIN_WORDS = 4
+    PASSPHRASE_MAX_WORDS = 10
+
+    CASING_LOWER = "lower"
+    CASING_UPPER = "upper"
+    CASING_CAPITALIZE = "capitalize"
+    CASING_RANDOM = "random"
+
+    INJECT_END = "end"
+    INJECT_RANDOM = "random"
     
     def __init__(self):
-        self.uppercase = string.ascii_uppercase
-        self.lowercase = string.ascii_lowercase
-        self.digits = string.digits
-        self.special = "!@#$%^&*()_+-=[]{}|;:,.<>?"
+        self.uppercase = UPPERCASE
+        self.lowercase = LOWERCASE
+        self.digits = DIGITS
+        self.special = SPECIAL
         self.current_algorithm = self.ALGORITHM_SECRETS
+        self.exclude_similar = False
+        self.placement_strategy = self.PLACEMENT_SHUFFLE
+        self.unique_error_rate = 0.001
+        self.unique_memory_budget = 64 * 1024 * 1024
+        self.last_uniqueness_report = None
+        self.passphrase_word_count = 6
+        self.passphrase_separators = "-"
+        self.passphrase_casing = self.CASING_CAPITALIZE
+        self.passphrase_injection = self.INJECT_END
         
-        self.memorable_words = [
-            "apple", "banana", "orange", "grape", "melon", "car", "house", "book", 
-            "phone", "computer", "dog", "cat", "bird", "fish", "tree", "flower", 
-            "sun", "moon", "star", "cloud", "river", "lake", "ocean", "mountain", 
-            "forest", "city", "road", "bridge", "door", "window", "table", "chair",
-            "ability", "able", "about", "above", "accept", "according", "account", "across", 
-            "action", "activity", "actually", "address", "administration", "admit", "adult", 
-            "affect", "after", "again", "against", "agency", "agent", "ago", "agree", 
-            "agreement", "ahead", "allow", "almost", "alone", "along", "already", "also", 
-            "although", "always", "american", "among", "amount", "analysis", "animal", 
-            "another", "answer", "anyone", "anything", "appear", "apply", "approach", "area", 
-            "argue", "around", "arrive", "article", "artist", "assume", "attack", "attention", 
-            "attorney", "audience", "author", "authority", "available", "avoid", "away", "baby", 
-            "back", "ball", "bank", "base", "beat", "beautiful", "because", "become", "before", 
-            "begin", "behavior", "behind", "believe", "benefit", "best", "better", "between", 
-            "beyond", "billion", "black", "blood", "blue", "board", "body", "book", "born", 
-            "both", "break", "bring", "brother", "budget", "build", "building", "business", 
-            "call", "camera", "campaign", "cancer", "candidate", "capital", "card", "care", 
-            "career", "carry", "case", "catch", "cause", "cell", "center", "central", 
-            "century", "certain", "certainly", "chair", "challenge", "chance", "change", 
-            "character", "charge", "check", "child", "choice", "choose", "church", "citizen", 
-            "city", "civil", "claim", "class", "clear", "clearly", "close", "coach", "cold", 
-            "collection", "college", "color", "come", "commercial", "common", "community", 
-            "company", "compare", "computer", "concern", "condition", "conference", "congress", 
-            "consider", "consumer", "contain", "continue", "control", "cost", "could", "country", 
-            "couple", "course", "court", "cover", "create", "crime", "cultural", "culture", 
-            "current", "customer", "dark", "data", "daughter", "dead", "deal", "death", 
-            "debate", "decade", "decide", "decision", "deep", "defense", "degree", "democratic", 
-            "describe", "design", "despite", "detail", "determine", "develop", "development", 
-            "difference", "different", "difficult", "dinner", "direction", "director", "discover", 
-            "discuss", "discussion", "disease", "doctor", "door", "down", "draw", "dream", 
-            "drive", "drop", "drug", "during", "each", "early", "east", "easy", "economic", 
-            "economy", "edge", "education", "effect", "effort", "eight", "either", "election", 
-            "else", "employee", "energy", "enjoy", "enough", "enter", "entire", "environment", 
-            "environmental", "especially", "establish", "even", "evening", "event", "ever", 
-            "every", "everybody", "everyone", "everything", "evidence", "exactly", "example", 
-            "executive", "exist", "expect", "experience", "expert", "explain", "face", "fact", 
-            "factor", "fail", "fall", "family", "fast", "father", "fear", "federal", "feel", 
-            "feeling", "field", "fight", "figure", "fill", "film", "final", "finally", 
-            "financial", "find", "fine", "finger", "finish", "fire", "firm", "first", "fish", 
-            "five", "floor", "focus", "follow", "food", "foot", "force", "foreign", "forget", 
-            "form", "former", "forward", "four", "free", "friend", "from", "front", "full", 
-            "fund", "future", "game", "garden", "general", "generation", "girl", "give", 
-            "glass", "goal", "good", "government", "great", "green", "ground", "group", "grow", 
-            "growth", "guess", "hand", "hang", "happen", "happy", "hard", "have", "head", 
-            "health", "hear", "heart", "heat", "heavy", "help", "here", "herself", "high", 
-            "himself", "history", "hold", "home", "hope", "hospital", "hotel", "hour", "house", 
-            "however", "huge", "human", "hundred", "husband", "idea", "identify", "image", 
-            "imagine", "impact", "important", "improve", "include", "including", "increase", 
-            "indeed", "indicate", "individual", "industry", "information", "inside", "instead", 
-            "institution", "interest", "interesting", "international", "interview", "into", 
-            "investment", "involve", "issue", "item", "itself", "join", "just", "keep", "kill", 
-            "kind", "kitchen", "know", "knowledge", "land", "language", "large", "last", "late", 
-            "later", "laugh", "lawyer", "lead", "leader", "learn", "least", "leave", "left", 
-            "legal", "less", "letter", "level", "life", "light", "like", "likely", "line", 
-            "list", "listen", "little", "live", "local", "long", "look", "lose", "loss", 
-            "love", "machine", "magazine", "main", "maintain", "major", "majority", "make", 
-            "manage", "management", "manager", "many", "market", "marriage", "material", 
-            "matter", "maybe", "mean", "measure", "media", "medical", "meet", "meeting", 
-            "member", "memory", "mention", "message", "method", "middle", "might", "military", 
-            "million", "mind", "minute", "miss", "mission", "model", "modern", "moment", 
-            "money", "month", "more", "morning", "most", "mother", "mouth", "move", "movement", 
-            "movie", "much", "music", "must", "myself", "name", "nation", "national", "natural", 
-            "nature", "near", "nearly", "necessary", "need", "network", "never", "news", 
-            "newspaper", "next", "nice", "night", "none", "north", "note", "nothing", "notice", 
-            "number", "occur", "offer", "office", "officer", "official", "often", "once", 
-            "only", "onto", "open", "operation", "opportunity", "option", "order", "other", 
-            "others", "outside", "over", "owner", "page", "pain", "painting", "paper", 
-            "parent", "part", "participant", "particular", "particularly", "partner", "party", 
-            "pass", "past", "patient", "pattern", "peace", "people", "perform", "performance", 
-            "perhaps", "period", "person", "personal", "phone", "physical", "pick", "picture", 
-            "piece", "place", "plan", "plant", "play", "player", "point", "police", "policy", 
-            "political", "politics", "poor", "popular", "population", "position", "positive", 
-            "possible", "power", "practice", "prepare", "present", "president", "pressure", 
-            "pretty", "prevent", "price", "private", "probably", "problem", "process", "produce", 
-            "product", "production", "professional", "professor", "program", "project", 
-            "property", "protect", "prove", "provide", "public", "pull", "purpose", "push", 
-            "quality", "question", "quickly", "quite", "race", "radio", "raise", "range", 
-            "rate", "rather", "reach", "read", "ready", "real", "reality", "realize", "really", 
-            "reason", "receive", "recent", "recently", "recognize", "record", "reduce", 
-            "reflect", "region", "relate", "relationship", "religious", "remain", "remember", 
-            "remove", "report", "represent", "require", "research", "resource", "respond", 
-            "response", "responsibility", "rest", "result", "return", "reveal", "rich", "right", 
-            "rise", "risk", "road", "rock", "role", "room", "rule", "safe", "same", "save", 
-            "scene", "school", "science", "scientist", "score", "season", "seat", "second", 
-            "section", "security", "seek", "seem", "sell", "send", "senior", "sense", "series", 
-            "serious", "serve", "service", "seven", "several", "shake", "share", "shoot", 
-            "short", "shot", "should", "shoulder", "show", "side", "sign", "significant", 
-            "similar", "simple", "simply", "since", "sing", "single", "sister", "site", 
-            "situation", "size", "skill", "skin", "small", "smile", "social", "society", 
-            "soldier", "some", "somebody", "someone", "something", "sometimes", "song", "soon", 
-            "sort", "sound", "source", "south", "southern", "space", "speak", "special", 
-            "specific", "speech", "spend", "sport", "spring", "staff", "stage", "stand", 
-            "standard", "star", "start", "state", "statement", "station", "stay", "step", 
-            "still", "stock", "stop", "store", "story", "strategy", "street", "strong", 
-            "structure", "student", "study", "stuff", "style", "subject", "success", "successful", 
-            "such", "suddenly", "suffer", "suggest", "summer", "support", "sure", "surface", 
-            "system", "table", "take", "talk", "task", "teach", "teacher", "team", "technology", 
-            "television", "tell", "tend", "term", "test", "than", "thank", "that", "their", 
-            "them", "themselves", "then", "theory", "there", "these", "they", "thing", "think", 
-            "third", "this", "those", "though", "thought", "thousand", "threat", "three", 
-            "through", "throughout", "throw", "thus", "time", "today", "together", "tonight", 
-            "total", "tough", "toward", "town", "trade", "traditional", "training", "travel", 
-            "treat", "treatment", "tree", "trial", "trip", "trouble", "true", "truth", "turn", 
-            "type", "under", "understand", "unit", "until", "upon", "uses", "value", "various", 
-            "very", "victim", "view", "violence", "visit", "voice", "vote", "wait", "walk", 
-            "wall", "want", "watch", "water", "weapon", "wear", "week", "weight", "well", 
-            "west", "western", "what", "whatever", "when", "where", "whether", "which", "while", 
-            "white", "whole", "whom", "whose", "wide", "wife", "will", "wind", "window", "wish", 
-            "with", "within", "without", "woman", "wonder", "word", "work", "worker", "world", 
-            "worry", "would", "write", "writer", "wrong", "yard", "yeah", "year", "young", "your", 
-            "yourself"
-        ]
+        # Словарь общий для процесса и открывается через mmap только при первом
+        # запросе запоминаемого пароля, поэтому создание генератора ничего не стоит
+        self.memorable_words = shared_wordlist()
+        self.phonetic_model = shared_model()
         
     def set_algorithm(self, algorithm):
         if algorithm not in [self.ALGORITHM_SECRETS, self.ALGORITHM_PHONETIC, 
-                            self.ALGORITHM_PATTERN, self.ALGORITHM_MEMORABLE]:
+                            self.ALGORITHM_PATTERN, self.ALGORITHM_MEMORABLE,
+                            self.ALGORITHM_PASSPHRASE, *self.ENCODED_ALGORITHMS]:
             raise ValueError(f"Неподдерживаемый алгоритм: {algorithm}")
         
         self.current_algorithm = algorithm
         return True
+
+    def set_placement_strategy(self, strategy):
+        if strategy not in [self.PLACEMENT_SHUFFLE, self.PLACEMENT_INSERT]:
+            raise ValueError(f"Неподдерживаемая стратегия размещения: {strategy}")
+
+        self.placement_strategy = strategy
+        return True
+
+    def set_exclude_similar(self, exclude_similar):
+        self.exclude_similar = bool(exclude_similar)
+        return True
+
+    def set_passphrase_options(self, word_count=None, separators=None, casing=None, injection=None):
+        if word_count is not None and not self.PASSPHRASE_MIN_WORDS <= word_count <= self.PASSPHRASE_MAX_WORDS:
+            raise ValueError(f"Количество слов должно быть от {self.PASSPHRASE_MIN_WORDS} "
+                             f"до {self.PASSPHRASE_MAX_WORDS}")
+        if separators is not None:
+            # Буквы и цифры в разделителях сделали бы разбиение фразы неоднозначным
+            separators = ''.join(dict.fromkeys(separators))
+            if not separators or any(not char.isascii() or char.isalnum() or not char.isprintable()
+                                     for char in separators):
+                raise ValueError("Разделители должны быть печатными ASCII-символами, кроме букв и цифр")
+        if casing is not None and casing not in [self.CASING_LOWER, self.CASING_UPPER,
+                                                 self.CASING_CAPITALIZE, self.CASING_RANDOM]:
+            raise ValueError(f"Неподдерживаемый регистр слов: {casing}")
+        if injection is not None and injection not in [self.INJECT_END, self.INJECT_RANDOM]:
+            raise ValueError(f"Неподдерживаемая позиция вставки: {injection}")
+
+        if word_count is not None:
+            self.passphrase_word_count = word_count
+        if separators is not None:
+            self.passphrase_separators = separators
+        if casing is not None:
+            self.passphrase_casing = casing
+        if injection is not None:
+            self.passphrase_injection = injection
+        return True
+
+    def get_memorable_words(self, exclude_similar=False, casing=CASING_CAPITALIZE):
+        if not exclude_similar:
+            return self.memorable_words
+        # Проверяются все формы, в которых слово может попасть в пароль
+        forms = {
+            self.CASING_LOWER: (str.lower,),
+            self.CASING_UPPER: (str.upper,),
+            self.CASING_CAPITALIZE: (str.capitalize,),
+            self.CASING_RANDOM: (str.lower, str.capitalize),
+        }[casing]
+        return self.memorable_words.filtered(
+            lambda word: all(is_similar_free(form(word)) for form in forms),
+            key=("similar_free", casing)
+        )
+
+    def get_passphrase_separators(self, exclude_similar=False):
+        separators = self.passphrase_separators
+        if exclude_similar:
+            separators = ''.join(char for char in separators if char not in SIMILAR_CHARACTERS)
+            if not separators:
+                raise ValueError("Все разделители относятся к похожим символам")
+        return separators
+
+    def get_passphrase_symbols(self, exclude_similar=False):
+        # Символы-разделители не вставляются, чтобы разные фразы не совпадали
+        special = CharsetProfile.get(exclude_similar=exclude_similar).special
+        return ''.join(char for char in special if char not in self.passphrase_separators)
+
+    def passphrase_combinations(self, use_digits=True, use_special=True, exclude_similar=None):
+        if exclude_similar is None:
+            exclude_similar = self.exclude_similar
+
+        word_count = self.passphrase_word_count
+        words_count = len(self.get_memorable_words(exclude_similar, self.passphrase_casing))
+        total = words_count ** word_count
+        if self.passphrase_casing == self.CASING_RANDOM:
+            total *= 2 ** word_count
+        total *= len(self.get_passphrase_separators(exclude_similar)) ** (word_count - 1)
+
+        positions = word_count if self.passphrase_injection == self.INJECT_RANDOM else 1
+        if use_digits:
+            total *= len(CharsetProfile.get(exclude_similar=exclude_similar).digits) * positions
+        if use_special:
+            total *= len(self.get_passphrase_symbols(exclude_similar)) * positions
+        return total
+
+    def set_wordlist(self, path):
+        wordlist = shared_wordlist(path)
+        len(wordlist)
         
+        self.memorable_words = wordlist
+        return True
+
+    def get_options(self):
+        # Настройки из простых значений: словарь можно передать в другой процесс
+        # и восстановить там генератор с тем же поведением через set_options
+        return {
+            "algorithm": self.current_algorithm,
+            "exclude_similar": self.exclude_similar,
+            "placement_strategy": self.placement_strategy,
+            "wordlist": self.memorable_words.path,
+            "passphrase_word_count": self.passphrase_word_count,
+            "passphrase_separators": self.passphrase_separators,
+            "passphrase_casing": self.passphrase_casing,
+            "passphrase_injection": self.passphrase_injection,
+        }
+
+    def set_options(self, options):
+        self.set_algorithm(options["algorithm"])
+        self.set_exclude_similar(options["exclude_similar"])
+        self.set_placement_strategy(options["placement_strategy"])
+        self.set_wordlist(options["wordlist"])
+        self.set_passphrase_options(options["passphrase_word_count"], options["passphrase_separators"],
+                                    options["passphrase_casing"], options["passphrase_injection"])
+        return True
+
     def generate(self, length, use_upper=True, use_lower=True, 
                 use_digits=True, use_special=True):
         if not any([use_upper, use_lower, use_digits, use_special]):
             raise ValueError("Должен быть выбран хотя бы один тип символов")
         
+        exclude_similar = self.exclude_similar
+        
         if self.current_algorithm == self.ALGORITHM_SECRETS:
-            return self._generate_with_secrets(length, use_upper, use_lower, use_digits, use_special)
+            return self._generate_with_secrets(length, use_upper, use_lower, use_digits, use_special, exclude_similar)
         elif self.current_algorithm == self.ALGORITHM_PHONETIC:
-            return self._generate_phonetic(length, use_upper, use_digits, use_special)
+            return self._generate_phonetic(length, use_upper, use_digits, use_special, exclude_similar)
         elif self.current_algorithm == self.ALGORITHM_PATTERN:
-            return self._generate_pattern(length, use_upper, use_lower, use_digits, use_special)
+            return self._generate_pattern(length, use_upper, use_lower, use_digits, use_special, exclude_similar)
         elif self.current_algorithm == self.ALGORITHM_MEMORABLE:
-            return self._generate_memorable(use_digits, use_special)
+            return self._generate_memorable(use_digits, use_special, exclude_similar)
+        elif self.current_algorithm == self.ALGORITHM_PASSPHRASE:
+            return self._generate_passphrase(use_digits, use_special, exclude_similar)
+        elif self.current_algorithm in self.ENCODED_ALGORITHMS:
+            return long_secret.generate_encoded(length, self.current_algorithm)
         else:
-            return self._generate_with_secrets(length, use_upper, use_lower, use_digits, use_special)
-            
-    def _generate_with_secrets(self, length, use_upper, use_lower, use_digits, use_special):
-        chars = ""
-        required_chars = []
+            return self._generate_with_secrets(length, use_upper, use_lower, use_digits, use_special, exclude_similar)
+
+    def generate_result(self, length, use_upper=True, use_lower=True,
+                        use_digits=True, use_special=True):
+        password = self.generate(length, use_upper, use_lower, use_digits, use_special)
+        result = self.search_space(length, use_upper, use_lower, use_digits, use_special)
+        result.password = password
+        return result
+
+    def search_space(self, length, use_upper=True, use_lower=True,
+                     use_digits=True, use_special=True, algorithm=None,
+                     exclude_similar=None):
+        # Размер пространства паролей считается в битах по тем же алфавитам и
+        # ограничениям, что использует генерация, без построения больших чисел
+        algorithm = algorithm or self.current_algorithm
+        if exclude_similar is None:
+            exclude_similar = self.exclude_similar
+
+        key = (algorithm, length, use_upper, use_lower, use_digits, use_special,
+               self._alphabet_sizes(algorithm, exclude_similar))
+        cached = combinatorics.search_space_cache.get(key)
+        if cached is None:
+            cached = self._count_search_space(algorithm, length, use_upper, use_lower,
+                                              use_digits, use_special, exclude_similar)
+            combinatorics.search_space_cache.put(key, cached)
+
+        count, entropy = cached
+        return GenerationResult(None, algorithm, count.bits, entropy, count.exact)
+
+    def _alphabet_sizes(self, algorithm, exclude_similar):
+        # Все параметры, от которых зависит размер пространства помимо длины и флагов
+        profile = CharsetProfile.get(exclude_similar=exclude_similar)
+        sizes = (len(profile.uppercase), len(profile.lowercase), len(profile.digits), len(profile.special))
+        if algorithm == self.ALGORITHM_PHONETIC:
+            return sizes + (self.phonetic_model.path, exclude_similar)
+        elif algorithm == self.ALGORITHM_MEMORABLE:
+            return sizes + (len(self.get_memorable_words(exclude_similar)),)
+        elif algorithm == self.ALGORITHM_PASSPHRASE:
+            return sizes + (len(self.get_memorable_words(exclude_similar, self.passphrase_casing)),
+                            self.passphrase_word_count, self.get_passphrase_separators(exclude_similar),
+                            self.passphrase_casing, self.passphrase_injection)
+        elif algorithm in self.ENCODED_ALGORITHMS:
+            return ()
+        return sizes
+
+    def _count_search_space(self, algorithm, length, use_upper, use_lower, use_digits, use_special,
+                            exclude_similar):
+        entropy = None
+        if algorithm in self.ENCODED_ALGORITHMS:
+            bits = long_secret.combinations_log2(length, algorithm)
+            exact = long_secret.combinations(length, algorithm) if bits <= combinatorics.EXACT_BITS else None
+            count = combinatorics.Count(bits, exact)
+        elif algorithm == self.ALGORITHM_PHONETIC:
+            entropy, total = self.phonetic_entropy(length, use_upper, use_digits, use_special, exclude_similar)
+            count = combinatorics.Count.from_int(total)
+        elif algorithm == self.ALGORITHM_MEMORABLE:
+            profile = CharsetProfile.get(exclude_similar=exclude_similar)
+            count = combinatorics.power(len(self.get_memorable_words(exclude_similar)), 2)
+            if use_digits:
+                count *= combinatorics.power(len(profile.digits), 2)
+            if use_special:
+                count *= combinatorics.power(len(profile.special), 1)
+        elif algorithm == self.ALGORITHM_PASSPHRASE:
+            count = combinatorics.Count.from_int(self.passphrase_combinations(use_digits, use_special, exclude_similar))
+        elif algorithm == self.ALGORITHM_PATTERN:
+            profile = CharsetProfile.get(use_upper, use_lower, use_digits, use_special, exclude_similar)
+            pattern = profile.pattern(length)
+            counts = [(len(alphabet), pattern.count(symbol))
+                      for symbol, alphabet in profile.pattern_alphabets().items() if symbol in pattern]
+            # Шаблон перемешивается, поэтому учитываются все различные расстановки классов
+            count = combinatorics.multinomial(tuple(class_count for _, class_count in counts))
+            count *= combinatorics.product(combinatorics.power(size, class_count) for size, class_count in counts)
+        else:
+            profile = CharsetProfile.get(use_upper, use_lower, use_digits, use_special, exclude_similar)
+            # В пароле гарантирован хотя бы один символ каждого выбранного класса
+            count = combinatorics.at_least_one_of_each(tuple(len(alphabet) for alphabet in profile.classes),
+                                                       max(length, len(profile.classes)))
+        return count, entropy
+
+    def generate_secret(self, length, use_upper=True, use_lower=True,
+                        use_digits=True, use_special=True, algorithm=None,
+                        exclude_similar=None):
+        if not 0 <= length <= self.MAX_SECRET_LENGTH:
+            raise ValueError(f"Длина секрета должна быть от 0 до {self.MAX_SECRET_LENGTH}")
+
+        algorithm = algorithm or self.current_algorithm
+        if exclude_similar is None:
+            exclude_similar = self.exclude_similar
+
+        if algorithm in self.ENCODED_ALGORITHMS:
+            return long_secret.generate_encoded(length, algorithm)
+        if algorithm != self.ALGORITHM_SECRETS:
+            raise ValueError(f"Режим длинных секретов не поддерживает алгоритм: {algorithm}")
+
+        profile = CharsetProfile.get(use_upper, use_lower, use_digits, use_special, exclude_similar)
+        return long_secret.generate_from_alphabet(length, profile)
+
+    def generate_many(self, count, length, use_upper=True, use_lower=True,
+                      use_digits=True, use_special=True, algorithm=None,
+                      exclude_similar=None, unique=False):
+        if not any([use_upper, use_lower, use_digits, use_special]):
+            raise ValueError("Должен быть выбран хотя бы один тип символов")
+        if count < 0:
+            raise ValueError("Количество паролей не может быть отрицательным")
+
+        algorithm = algorithm or self.current_algorithm
+        if exclude_similar is None:
+            exclude_similar = self.exclude_similar
+
+        # Энтропия для всей партии запрашивается у ОС одним чтением
+        pool = RandomPool()
+        pool.reserve(self._estimate_batch_bytes(count, length, algorithm))
+
+        if unique:
+            return self._generate_unique_batch(pool, algorithm, count, length,
+                                               use_upper, use_lower, use_digits, use_special, exclude_similar)
+
+        return self._generate_batch(pool, algorithm, count, length,
+                                    use_upper, use_lower, use_digits, use_special, exclude_similar)
+
+    def iter_passwords(self, length, use_upper=True, use_lower=True,
+                       use_digits=True, use_special=True, algorithm=None,
+                       exclude_similar=None, chunk_size=256):
+        if not any([use_upper, use_lower, use_digits, use_special]):
+            raise ValueError("Должен быть выбран хотя бы один тип символов")
+        if chunk_size <= 0:
+            raise ValueError("Размер порции должен быть положительным")
+
+        algorithm = algorithm or self.current_algorithm
+        if exclude_similar is None:
+            exclude_similar = self.exclude_similar
+
+        # Буфер случайных байтов пополняется по мере потребления,
+        # поэтому память не растет с количеством выданных паролей
+        pool = RandomPool(self._estimate_batch_bytes(chunk_size, length, algorithm))
+
+        while True:
+            yield from self._generate_batch(pool, algorithm, chunk_size, length,
+                                            use_upper, use_lower, use_digits, use_special,
+                                            exclude_similar)
+
+    def _generate_batch(self, pool, algorithm, count, length,
+                        use_upper, use_lower, use_digits, use_special, exclude_similar=False):
+        if self._uses_numpy(algorithm, count):
+            profile = CharsetProfile.get(use_upper, use_lower, use_digits, use_special, exclude_similar)
+            if algorithm == self.ALGORITHM_PATTERN:
+                return numpy_backend.generate_pattern(pool, count, length, profile)
+            return numpy_backend.generate_secrets(pool, count, length, profile)
+
+        if algorithm in self.ENCODED_ALGORITHMS:
+            return [long_secret.generate_encoded(length, algorithm, pool) for _ in range(count)]
+        elif algorithm == self.ALGORITHM_PHONETIC:
+            return self._generate_phonetic_batch(pool, count, length, use_upper, use_digits, use_special,
+                                                 exclude_similar)
+        elif algorithm == self.ALGORITHM_PATTERN:
+            return self._generate_pattern_batch(pool, count, length, use_upper, use_lower, use_digits, use_special,
+                                                exclude_similar)
+        elif algorithm == self.ALGORITHM_MEMORABLE:
+            return self._generate_memorable_batch(pool, count, use_digits, use_special, exclude_similar)
+        elif algorithm == self.ALGORITHM_PASSPHRASE:
+            return self._generate_passphrase_batch(pool, count, use_digits, use_special, exclude_similar)
+        else:
+            return self._generate_with_secrets_batch(pool, count, length, use_upper, use_lower, use_digits, use_special,
+                                                     exclude_similar)
+
+    def _generate_unique_batch(self, pool, algorithm, count, length,
+                               use_upper, use_lower, use_digits, use_special, exclude_similar):
+        tracker = UniquenessTracker(count, self.unique_error_rate, self.unique_memory_budget)
+        # Защита от бесконечного цикла, если пространство паролей меньше партии
+        max_attempts = count * 20 + 1000
+
+        passwords = []
+        attempts = 0
+        while len(passwords) < count:
+            if attempts >= max_attempts:
+                raise ValueError("Не удалось сгенерировать требуемое количество уникальных паролей")
+
+            missing = count - len(passwords)
+            for password in self._generate_batch(pool, algorithm, missing, length,
+                                                 use_upper, use_lower, use_digits, use_special,
+                                                 exclude_similar):
+                attempts += 1
+                if tracker.add(password):
+                    passwords.append(password)
+
+        self.last_uniqueness_report = tracker.report(passwords, attempts)
+        return passwords
+
+    def _uses_numpy(self, algorithm, count):
+        return (algorithm in (self.ALGORITHM_SECRETS, self.ALGORITHM_PATTERN)
+                and numpy_backend.is_enabled(count))
+
+    def _estimate_batch_bytes(self, count, length, algorithm):
+        # Запас на отбраковку байтов при выборке без смещения и на перемешивание
+        if algorithm == self.ALGORITHM_MEMORABLE:
+            per_password = 16
+        elif algorithm == self.ALGORITHM_PASSPHRASE:
+            per_password = 5 * self.passphrase_word_count + 8
+        elif algorithm in self.ENCODED_ALGORITHMS:
+            per_password = length + 8
+        elif self._uses_numpy(algorithm, count):
+            # Векторная перестановка тратит 8 байт ключа на позицию
+            per_password = 11 * length + 16
+        else:
+            per_password = 3 * length + 16
+        return count * per_password
+
+    def _generate_with_secrets_batch(self, pool, count, length, use_upper, use_lower, use_digits, use_special,
+                                     exclude_similar=False):
+        profile = CharsetProfile.get(use_upper, use_lower, use_digits, use_special, exclude_similar)
+        required = [pool.choices(alphabet, count) for alphabet in profile.classes]
+
+        if self.placement_strategy == self.PLACEMENT_INSERT:
+            size = max(length, len(profile.classes))
+            fill = pool.choices(profile.alphabet, count * size, profile.translation)
+
+            passwords = []
+            for n in range(count):
+                positions = pool.sample(size, len(required))
+                placements = [(position, column[n]) for position, column in zip(positions, required)]
+                passwords.append(self._place_required(fill[n * size:(n + 1) * size], placements))
+
+            return passwords
+
+        fill_length = max(0, length - len(profile.classes))
+        fill = pool.choices(profile.alphabet, count * fill_length, profile.translation)
+
+        passwords = []
+        for n in range(count):
+            password_list = list(fill[n * fill_length:(n + 1) * fill_length])
+            password_list.extend(column[n] for column in required)
+            pool.shuffle(password_list)
+            passwords.append(''.join(password_list))
+
+        return passwords
+
+    def _generate_phonetic_batch(self, pool, count, length, use_upper, use_digits, use_special,
+                                 exclude_similar=False):
+        return [self._phonetic_password(pool, length, use_upper, use_digits, use_special, exclude_similar)
+                for _ in range(count)]
+
+    def _generate_pattern_batch(self, pool, count, length, use_upper, use_lower, use_digits, use_special,
+                                exclude_similar=False):
+        profile = CharsetProfile.get(use_upper, use_lower, use_digits, use_special, exclude_similar)
+        pattern = profile.pattern(length)
+
+        # Символы каждого класса выбираются сразу для всей партии
+        pools = {}
+        for symbol, alphabet in profile.pattern_alphabets().items():
+            per_password = pattern.count(symbol)
+            if per_password:
+                pools[symbol] = iter(pool.choices(alphabet, count * per_password))
+
+        passwords = []
+        for _ in range(count):
+            pattern_list = list(pattern)
+            pool.shuffle(pattern_list)
+            passwords.append(''.join(next(pools[symbol]) for symbol in pattern_list))
+
+        return passwords
+
+    def _generate_memorable_batch(self, pool, count, use_digits, use_special, exclude_similar=False):
+        words = self.get_memorable_words(exclude_similar)
+        words_count = len(words)
+        profile = CharsetProfile.get(exclude_similar=exclude_similar)
+        digits = pool.choices(profile.digits, count * 2) if use_digits else ""
+        special = pool.choices(profile.special, count) if use_special else ""
+
+        passwords = []
+        for n in range(count):
+            word1 = words[pool.below(words_count)].capitalize()
+            word2 = words[pool.below(words_count)].capitalize()
+
+            result = word1 + word2
+
+            if use_digits:
+                result += digits[n * 2:n * 2 + 2]
+
+            if use_special:
+                result += special[n]
+
+            passwords.append(result)
+
+        return passwords
+
+    def _generate_passphrase_batch(self, pool, count, use_digits, use_special, exclude_similar=False):
+        word_count = self.passphrase_word_count
+        casing = self.passphrase_casing
+        words = self.get_memorable_words(exclude_similar, casing)
+        separators = self.get_passphrase_separators(exclude_similar)
+        random_position = self.passphrase_injection == self.INJECT_RANDOM
+
+        # Индексы слов всей партии извлекаются из пула одним чтением
+        indices = pool.below_many(len(words), count * word_count)
+        flips = pool.choices("01", count * word_count) if casing == self.CASING_RANDOM else ""
+        gaps = pool.choices(separators, count * (word_count - 1)) if len(separators) > 1 else ""
+        digits = pool.choices(CharsetProfile.get(exclude_similar=exclude_similar).digits, count) if use_digits else ""
+        symbols = pool.choices(self.get_passphrase_symbols(exclude_similar), count) if use_special else ""
+        positions = pool.below_many(word_count, count * 2) if random_position else None
+        last = word_count - 1
+
+        passwords = []
+        for n in range(count):
+            start = n * word_count
+            chosen = [words[i] for i in indices[start:start + word_count]]
+
+            if casing == self.CASING_UPPER:
+                chosen = [word.upper() for word in chosen]
+            elif casing == self.CASING_CAPITALIZE:
+                chosen = [word.capitalize() for word in chosen]
+            elif casing == self.CASING_RANDOM:
+                chosen = [word.capitalize() if flips[start + i] == "1" else word
+                          for i, word in enumerate(chosen)]
+
+            if use_digits:
+                chosen[positions[n * 2] if random_position else last] += digits[n]
+            if use_special:
+                chosen[positions[n * 2 + 1] if random_position else last] += symbols[n]
+
+            if gaps:
+                gap_start = n * last
+                parts = [chosen[0]]
+                for i in range(1, word_count):
+                    parts.append(gaps[gap_start + i - 1])
+                    parts.append(chosen[i])
+                passwords.append(''.join(parts))
+            else:
+                passwords.append(separators.join(chosen))
+
+        return passwords
+
+    def _generate_with_secrets(self, length, use_upper, use_lower, use_digits, use_special, exclude_similar=False):
+        profile = CharsetProfile.get(use_upper, use_lower, use_digits, use_special, exclude_similar)
+        chars = profile.alphabet
+        required_chars = [secrets.choice(alphabet) for alphabet in profile.classes]
         
-        if use_upper:
-            chars += self.uppercase
-            required_chars.append(secrets.choice(self.uppercase))
-        if use_lower:
-            chars += self.lowercase
-            required_chars.append(secrets.choice(self.lowercase))
-        if use_digits:
-            chars += self.digits
-            required_chars.append(secrets.choice(self.digits))
-        if use_special:
-            chars += self.special
-            required_chars.append(secrets.choice(self.special))
+        if self.placement_strategy == self.PLACEMENT_INSERT:
+            size = max(length, len(required_chars))
+            fill = ''.join(secrets.choice(chars) for _ in range(size))
+            positions = _system_random.sample(range(size), len(required_chars))
+            return self._place_required(fill, list(zip(positions, required_chars)))
             
         password_list = [secrets.choice(chars) for _ in range(length - len(required_chars))]
         
         password_list.extend(required_chars)
         
-        secrets.SystemRandom().shuffle(password_list)
+        _system_random.shuffle(password_list)
         
         password = ''.join(password_list)
         return password
     
-    def _generate_phonetic(self, length, use_upper, use_digits, use_special):
-        vowels = "aeiou"
-        consonants = "bcdfghjklmnpqrstvwxyz"
-        
-        password = []
-        for i in range(0, length, 2):
-            if i < length:
-                password.append(random.choice(consonants))
-            if i + 1 < length:
-                password.append(random.choice(vowels))
-        
-        if use_digits or use_special:
-            positions = random.sample(range(len(password)), min(4, len(password)))
-            
-            for i, pos in enumerate(positions):
-                if i < 2 and use_digits and pos < len(password):
-                    password[pos] = random.choice(self.digits)
-                elif use_special and pos < len(password):
-                    password[pos] = random.choice(self.special)
-        
+    def _generate_phonetic(self, length, use_upper, use_digits, use_special, exclude_similar=False):
+        return self._phonetic_password(RandomPool(), length, use_upper, use_digits, use_special, exclude_similar)
+
+    @staticmethod
+    def _phonetic_layout(length, use_digits, use_special):
+        # Буквы, цифры и спецсимволы в произносимом пароле заданной длины
+        digits = min(2, length) if use_digits else 0
+        special = min(length - digits, 2 if use_digits else 4) if use_special else 0
+        return length - digits - special, digits, special
+
+    def _phonetic_password(self, pool, length, use_upper, use_digits, use_special, exclude_similar=False):
+        letters, digits_count, special_count = self._phonetic_layout(length, use_digits, use_special)
+        profile = CharsetProfile.get(exclude_similar=exclude_similar)
+        excluded = SIMILAR_CHARACTERS if exclude_similar else ""
+
+        chars = list(self.phonetic_model.sample(pool, letters, excluded))
+
         if use_upper:
-            capital_positions = random.sample(range(len(password)), min(2, len(password)))
-            for pos in capital_positions:
-                if pos < len(password) and password[pos].isalpha():
-                    password[pos] = password[pos].upper()
-        
-        result = ''.join(password)
-        
-        if len(result) > length:
-            result = result[:length]
-            
-        return result
-    
-    def _generate_pattern(self, length, use_upper, use_lower, use_digits, use_special):
-        pattern = ""
-        
+            eligible = [i for i, char in enumerate(chars) if self._can_capitalize(char, exclude_similar)]
+            capitals = min(2, len(eligible))
+            for i in pool.sample(len(eligible), capitals):
+                chars[eligible[i]] = chars[eligible[i]].upper()
+
+        # Цифры и спецсимволы занимают случайные различные позиции пароля
+        positions = pool.sample(length, digits_count + special_count)
+        inserted = ([profile.digits[pool.below(len(profile.digits))] for _ in range(digits_count)]
+                    + [profile.special[pool.below(len(profile.special))] for _ in range(special_count)])
+        password = [None] * length
+        for position, char in zip(positions, inserted):
+            password[position] = char
+        letters_iter = iter(chars)
+        password = [char if char is not None else next(letters_iter) for char in password]
+        return ''.join(password)
+
+    def phonetic_entropy(self, length, use_upper=True, use_digits=True, use_special=True, exclude_similar=None):
+        # Точная энтропия Шеннона в битах и число различных паролей
+        if exclude_similar is None:
+            exclude_similar = self.exclude_similar
+
+        letters, digits_count, special_count = self._phonetic_layout(length, use_digits, use_special)
+        profile = CharsetProfile.get(exclude_similar=exclude_similar)
+        model = self.phonetic_model
+        excluded = SIMILAR_CHARACTERS if exclude_similar else ""
+        tracked = ""
         if use_upper:
-            pattern += "L" * (length // 4 + (1 if length % 4 > 0 else 0))
-        if use_lower:
-            pattern += "l" * (length // 4 + (1 if length % 4 > 1 else 0))
-        if use_digits:
-            pattern += "d" * (length // 4 + (1 if length % 4 > 2 else 0))
-        if use_special:
-            pattern += "s" * (length // 4)
-            
-        if not pattern:
-            pattern = "Llds"
-            
-        pattern = pattern[:length]
-        pattern_list = list(pattern)
-        random.shuffle(pattern_list)
-        pattern = ''.join(pattern_list)
+            model.tables()
+            tracked = ''.join(char for char in model.alphabet if not self._can_capitalize(char, exclude_similar))
+
+        bits, probabilities, counts = model.statistics(letters, excluded, tracked)
+
+        # k - число букв, которые нельзя сделать заглавными
+        capital_bits = 0.0
+        total = 0
+        for k, (probability, count) in enumerate(zip(probabilities, counts)):
+            eligible = letters - k
+            variants = math.comb(eligible, min(2, eligible)) if use_upper else 1
+            capital_bits += probability * math.log2(variants)
+            total += count * variants
+
+        arrangements = math.factorial(length) // (math.factorial(letters) * math.factorial(digits_count)
+                                                  * math.factorial(special_count))
+        inserted = len(profile.digits) ** digits_count * len(profile.special) ** special_count
+        bits += capital_bits + math.log2(arrangements * inserted)
+        return bits, total * arrangements * inserted
+
+    def _generate_pattern(self, length, use_upper, use_lower, use_digits, use_special, exclude_similar=False):
+        profile = CharsetProfile.get(use_upper, use_lower, use_digits, use_special, exclude_similar)
+        alphabets = profile.pattern_alphabets()
+
+        pattern_list = list(profile.pattern(length))
+        _system_random.shuffle(pattern_list)
         
-        result = []
-        for char in pattern:
-            if char == 'L':
-                result.append(secrets.choice(self.uppercase))
-            elif char == 'l':
-                result.append(secrets.choice(self.lowercase))
-            elif char == 'd':
-                result.append(secrets.choice(self.digits))
-            elif char == 's':
-                result.append(secrets.choice(self.special))
+        result = [secrets.choice(alphabets[char]) for char in pattern_list]
         
         return ''.join(result)
     
-    def _generate_memorable(self, use_digits, use_special):
-        word1 = random.choice(self.memorable_words).capitalize()
-        word2 = random.choice(self.memorable_words).capitalize()
+    def _generate_memorable(self, use_digits, use_special, exclude_similar=False):
+        words = self.get_memorable_words(exclude_similar)
+        profile = CharsetProfile.get(exclude_similar=exclude_similar)
+        
+        word1 = secrets.choice(words).capitalize()
+        word2 = secrets.choice(words).capitalize()
         
         result = word1 + word2
         
         if use_digits:
-            digits = ''.join(secrets.choice(self.digits) for _ in range(2))
+            digits = ''.join(secrets.choice(profile.digits) for _ in range(2))
             result += digits
             
         if use_special:
-            special = secrets.choice(self.special)
+            special = secrets.choice(profile.special)
             result += special
             
         return result
+
+    def _generate_passphrase(self, use_digits, use_special, exclude_similar=False):
+        return self._generate_passphrase_batch(RandomPool(), 1, use_digits, use_special, exclude_similar)[0]
+
+    @staticmethod
+    def _place_required(fill, placements):
+        # Обязательные символы занимают k случайных различных позиций, остальные
+        # позиции уже заполнены; это эквивалентно добавлению и перемешиванию
+        placements.sort()
+        pieces = []
+        start = 0
+        for position, char in placements:
+            pieces.append(fill[start:position])
+            pieces.append(char)
+            start = position + 1
+        pieces.append(fill[start:])
+        return ''.join(pieces)
+
+    @staticmethod
+    def _can_capitalize(char, exclude_similar):
+        if not char.isalpha():
+            return False
+        # Заглавные i и o превращаются в похожие на 1 и 0 символы
+        return not exclude_similar or char.upper() not in SIMILAR_CHARACTERS
         
     def check_strength(self, password):
-        length_score = 0
-        if len(password) >= 16:
-            length_score = 40
-        elif len(password) >= 12:
-            length_score = 30
-        elif len(password) >= 10:
-            length_score = 25
-        elif len(password) >= 8:
-            length_score = 15
-        elif len(password) >= 6:
-            length_score = 5
-        else:
-            length_score = 0
+        profile = CharsetProfile.get()
+        unique_chars = set(password)
+        
+        class_mask = 0
+        if not unique_chars.isdisjoint(profile.upper_set):
+            class_mask |= CharsetProfile.CLASS_UPPER
+        if not unique_chars.isdisjoint(profile.lower_set):
+            class_mask |= CharsetProfile.CLASS_LOWER
+        if not unique_chars.isdisjoint(profile.digits_set):
+            class_mask |= CharsetProfile.CLASS_DIGITS
+        if not unique_chars.isdisjoint(profile.special_set):
+            class_mask |= CharsetProfile.CLASS_SPECIAL
         
+        return self._strength_score(len(password), class_mask, len(unique_chars))
+
+    def check_strength_many(self, passwords, use_numpy=None, chunk_size=65536):
+        if use_numpy is None:
+            use_numpy = numpy_backend.NUMPY_AVAILABLE
+        
+        class_table = CharsetProfile.get().class_table
+        scores = array('B')
+        passwords = iter(passwords)
+        
+        while True:
+            chunk = list(itertools.islice(passwords, chunk_size))
+            if not chunk:
+                break
+            
+            if use_numpy and numpy_backend.is_enabled(len(chunk)):
+                scores.extend(numpy_backend.check_strength(
+                    chunk, class_table, self.strength_tables(), self.check_strength
+                ))
+                continue
+            
+            score = self._strength_score
+            append = scores.append
+            for password in chunk:
+                try:
+                    data = password.encode('ascii')
+                except UnicodeEncodeError:
+                    append(self.check_strength(password))
+                    continue
+                
+                # translate переводит байты в биты классов, а сумма различных битов
+                # дает маску классов за один проход
+                append(score(len(data), sum(set(data.translate(class_table))), len(set(data))))
+        
+        return scores
+
+    @classmethod
+    def strength_from_bits(cls, bits):
+        # Линейная шкала: пространство из 2^STRENGTH_FULL_BITS паролей и больше - 100%
+        return max(0, min(100, int(bits * 100 / cls.STRENGTH_FULL_BITS)))
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def strength_tables(cls):
+        # Таблицы строятся один раз на процесс при первой пакетной оценке
+        length_scores = tuple(cls._length_score(length) for length in range(17))
+        class_scores = tuple(cls._class_score(mask) for mask in range(16))
+        return length_scores, class_scores
+
+    @staticmethod
+    def _length_score(length):
+        if length >= 16:
+            return 40
+        elif length >= 12:
+            return 30
+        elif length >= 10:
+            return 25
+        elif length >= 8:
+            return 15
+        elif length >= 6:
+            return 5
+        else:
+            return 0
+
+    @staticmethod
+    def _class_score(class_mask):
         char_types_used = 0
         char_type_score = 0
         
-        if any(c in self.uppercase for c in password):
+        if class_mask & CharsetProfile.CLASS_UPPER:
             char_types_used += 1
             char_type_score += 10
         
-        if any(c in self.lowercase for c in password):
+        if class_mask & CharsetProfile.CLASS_LOWER:
             char_types_used += 1
             char_type_score += 10
         
-        if any(c in self.digits for c in password):
+        if class_mask & CharsetProfile.CLASS_DIGITS:
             char_types_used += 1
             char_type_score += 10
         
-        if any(c in self.special for c in password):
+        if class_mask & CharsetProfile.CLASS_SPECIAL:
             char_types_used += 1
             char_type_score += 15
         
@@ -303,17 +787,23 @@ class PasswordGenerator:
         elif char_types_used == 2:
             diversity_bonus = 5
         
-        entropy_bonus = 0
-        unique_chars_ratio = len(set(password)) / len(password) if password else 0
+        return char_type_score + diversity_bonus
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _strength_score(length, class_mask, unique_count):
+        unique_chars_ratio = unique_count / length if length else 0
         entropy_bonus = int(unique_chars_ratio * 10)
         
-        total_score = length_score + char_type_score + diversity_bonus + entropy_bonus
+        total_score = (PasswordGenerator._length_score(length)
+                       + PasswordGenerator._class_score(class_mask)
+                       + entropy_bonus)
         
-        if len(password) < 6:
+        if length < 6:
             total_score = min(total_score, 30)
         
-        if len(password) > 16:
-            extra_length_bonus = min(10, (len(password) - 16) // 2)
+        if length > 16:
+            extra_length_bonus = min(10, (length - 16) // 2)
             total_score += extra_length_bonus
         
-        return min(total_score, 100) 
\ No newline at end of file
+        return min(total_score, 100)
@@ -0,0 +1,139 @@
+import os
+import sqlite3
+import threading
+import time
+from src.core.domains import extract_host, normalize_domain
+from src.core.master_password import SCHEME_V1, SCHEME_V2, SiteProfile, kdf_from_params
+
+SCHEMA_VERSION = 1
+COMPLETION_LIMIT = 10
+
+# Верхняя граница для диапазонного поиска по префиксу: символ больше любого
+# символа домена, поэтому условие normalized < prefix + PREFIX_END отбирает
+# все ключи с этим префиксом через индекс, в отличие от LIKE
+PREFIX_END = "\U0010ffff"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY,
+    domain TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    counter INTEGER NOT NULL DEFAULT 1,
+    length INTEGER NOT NULL,
+    classes INTEGER NOT NULL,
+    kdf TEXT NOT NULL,
+    scheme INTEGER NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS profiles_key ON profiles (normalized, scheme);
+"""
+
+# Запросы - константы с параметрами: модуль sqlite3 держит кэш
+# подготовленных выражений и не разбирает SQL при повторных вызовах
+# Точное совпадение со строкой домена важнее совпадения по регистрируемому
+# домену: набранный "accounts.google.com" находит свой профиль схемы 1,
+# а не профиль схемы 2 для всего google.com
+_FIND = ("SELECT id, domain, counter, length, classes, kdf, scheme FROM profiles "
+         "WHERE normalized = ? OR (normalized = ? AND scheme != ?) "
+         "ORDER BY normalized = ? DESC, updated DESC LIMIT 1")
+_COMPLETE = ("SELECT domain FROM profiles WHERE normalized >= ? AND normalized < ? "
+             "ORDER BY normalized LIMIT ?")
+_UPSERT = ("INSERT INTO profiles (domain, normalized, counter, length, classes, kdf, scheme, updated) "
+           "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+           "ON CONFLICT (normalized, scheme) DO UPDATE SET domain = excluded.domain, counter = excluded.counter, "
+           "length = excluded.length, classes = excluded.classes, kdf = excluded.kdf, "
+           "scheme = excluded.scheme, updated = excluded.updated")
+_DELETE = "DELETE FROM profiles WHERE id = ?"
+_COUNT = "SELECT COUNT(*) FROM profiles"
+
+
+def default_store_path():
+    base = os.environ.get("APPDATA") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "GenPass", "profiles.db")
+
+
+def normalize_key(domain, scheme):
+    # Схема 1 солится строкой домена как есть, поэтому ее профили различаются
+    # по всей строке без учета регистра. В схеме 2 ключ - регистрируемый домен,
+    # так что "www.google.com" и адрес страницы входа находят один профиль
+    raw = domain.strip().casefold()
+    if scheme == SCHEME_V1:
+        return raw
+    try:
+        return normalize_domain(domain)
+    except ValueError:
+        return raw
+
+
+class ProfileStore:
+    # Профили сайтов для мастер-пароля. В базе хранятся только параметры
+    # вычисления, ни мастер-пароль, ни производные ключи не сохраняются
+    def __init__(self, path=None):
+        self.path = path or default_store_path()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL позволяет читать без блокировки во время записи, а NORMAL
+        # в этом режиме не теряет согласованность при сбое
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise ValueError(f"Файл профилей создан более новой версией GenPass: {self.path}")
+        with self._connection:
+            self._connection.executescript(_SCHEMA)
+            self._connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def _find(self, domain):
+        raw = normalize_key(domain, SCHEME_V1)
+        return self._connection.execute(
+            _FIND, (raw, normalize_key(domain, SCHEME_V2), SCHEME_V1, raw)).fetchone()
+
+    def get(self, domain):
+        with self._lock:
+            row = self._find(domain)
+        if row is None:
+            return None
+        _, domain, counter, length, classes, kdf, scheme = row
+        return SiteProfile(domain, kdf_from_params(kdf), scheme, length, classes, counter)
+
+    def save(self, profile):
+        row = (profile.domain, normalize_key(profile.domain, profile.scheme), profile.counter, profile.length,
+               profile.classes, profile.kdf.to_json(), profile.scheme, time.time())
+        with self._lock, self._connection:
+            self._connection.execute(_UPSERT, row)
+
+    def save_many(self, profiles):
+        now = time.time()
+        rows = [(profile.domain, normalize_key(profile.domain, profile.scheme), profile.counter, profile.length,
+                 profile.classes, profile.kdf.to_json(), profile.scheme, now) for profile in profiles]
+        with self._lock, self._connection:
+            self._connection.executemany(_UPSERT, rows)
+
+    def delete(self, domain):
+        with self._lock, self._connection:
+            row = self._find(domain)
+            if row is None:
+                return False
+            self._connection.execute(_DELETE, (row[0],))
+            return True
+
+    def complete(self, prefix, limit=COMPLETION_LIMIT):
+        # Недописанный домен нельзя свести к регистрируемому, поэтому
+        # от префикса отбрасываются только схема и регистр
+        prefix = extract_host(prefix).casefold()
+        if not prefix:
+            return []
+        with self._lock:
+            rows = self._connection.execute(_COMPLETE, (prefix, prefix + PREFIX_END, limit)).fetchall()
+        # Профили схем 1 и 2 одного домена подсказываются один раз
+        return list(dict.fromkeys(row[0] for row in rows))
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(_COUNT).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
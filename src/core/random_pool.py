@@ -0,0 +1,129 @@
+import os
+from array import array
+
+
+class RandomPool:
+    DEFAULT_CHUNK_SIZE = 64 * 1024
+
+    _tables = {}
+
+    def __init__(self, chunk_size=None):
+        self.chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+        self._buffer = b""
+        self._pos = 0
+        self.reads = 0
+
+    def reserve(self, size):
+        # Одно чтение из ОС на всю партию: остаток буфера сохраняется
+        available = len(self._buffer) - self._pos
+        if available >= size:
+            return
+        self._buffer = self._buffer[self._pos:] + os.urandom(max(size - available, self.chunk_size))
+        self._pos = 0
+        self.reads += 1
+
+    def take(self, size):
+        if self._pos + size > len(self._buffer):
+            self.reserve(size)
+        chunk = self._buffer[self._pos:self._pos + size]
+        self._pos += size
+        return chunk
+
+    def below(self, n):
+        if n <= 0:
+            raise ValueError("Верхняя граница должна быть положительной")
+        if n == 1:
+            return 0
+
+        if n <= 256:
+            limit = 256 - 256 % n
+            while True:
+                if self._pos >= len(self._buffer):
+                    self.reserve(1)
+                value = self._buffer[self._pos]
+                self._pos += 1
+                if value < limit:
+                    return value % n
+
+        width = ((n - 1).bit_length() + 7) // 8
+        space = 1 << (8 * width)
+        limit = space - space % n
+        while True:
+            value = int.from_bytes(self.take(width), "big")
+            if value < limit:
+                return value % n
+
+    @classmethod
+    def translation_table(cls, alphabet):
+        entry = cls._tables.get(alphabet)
+        if entry is None:
+            size = len(alphabet)
+            if not 0 < size <= 256:
+                raise ValueError("Размер алфавита должен быть от 1 до 256 символов")
+            encoded = alphabet.encode("ascii")
+            limit = 256 - 256 % size
+            # Байт b < limit отображается в символ alphabet[b % size], остальные отбрасываются
+            table = bytes(encoded[b % size] if b < limit else 0 for b in range(256))
+            rejected = bytes(range(limit, 256))
+            entry = (table, rejected, limit)
+            cls._tables[alphabet] = entry
+        return entry
+
+    def choices(self, alphabet, k, translation=None):
+        if k <= 0:
+            return ""
+
+        table, rejected, limit = translation or self.translation_table(alphabet)
+        result = b""
+        while len(result) < k:
+            missing = k - len(result)
+            needed = -(-missing * 256 // limit) + 8
+            result += self.take(needed).translate(table, rejected)
+        return result[:k].decode("ascii")
+
+    def sample(self, n, k):
+        k = min(k, n)
+        if k * 4 < n:
+            # Для малого k отбор с повтором дешевле, чем список из n позиций
+            chosen = []
+            seen = set()
+            while len(chosen) < k:
+                position = self.below(n)
+                if position not in seen:
+                    seen.add(position)
+                    chosen.append(position)
+            return chosen
+
+        positions = list(range(n))
+        for i in range(k):
+            j = i + self.below(n - i)
+            positions[i], positions[j] = positions[j], positions[i]
+        return positions[:k]
+
+    def shuffle(self, items):
+        for i in range(len(items) - 1, 0, -1):
+            j = self.below(i + 1)
+            items[i], items[j] = items[j], items[i]
+
+    def below_many(self, n, k):
+        if n <= 0:
+            raise ValueError("Верхняя граница должна быть положительной")
+        if k <= 0:
+            return []
+
+        bits = (n - 1).bit_length()
+        if bits > 64:
+            return [self.below(n) for _ in range(k)]
+        typecode = "B" if bits <= 8 else "H" if bits <= 16 else "I" if bits <= 32 else "Q"
+        width = array(typecode).itemsize
+
+        space = 1 << (8 * width)
+        limit = space - space % n
+        # Все значения партии берутся из одного чтения буфера с запасом на отбраковку
+        result = []
+        while len(result) < k:
+            missing = k - len(result)
+            values = array(typecode, self.take((-(-missing * space // limit) + 4) * width))
+            result.extend(value % n for value in values if value < limit)
+        del result[k:]
+        return result
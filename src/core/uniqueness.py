@@ -0,0 +1,133 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001, memory_budget=None):
+        if capacity <= 0:
+            raise ValueError("Емкость фильтра должна быть положительной")
+        if not 0 < error_rate < 1:
+            raise ValueError("Вероятность ложного срабатывания должна быть от 0 до 1")
+
+        bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        if memory_budget is not None:
+            bits = min(bits, memory_budget * 8)
+        bits = max(bits, 64)
+
+        self.capacity = capacity
+        self.size = bits
+        self.hash_count = max(1, round(bits / capacity * math.log(2)))
+        self.bits = bytearray((bits + 7) // 8)
+
+    @property
+    def memory(self):
+        return len(self.bits)
+
+    @property
+    def expected_error_rate(self):
+        # Оценка при полном заполнении фильтра до расчетной емкости
+        return (1 - math.exp(-self.hash_count * self.capacity / self.size)) ** self.hash_count
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        # Двойное хеширование: k позиций из двух независимых 64-битных значений
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item):
+        bits = self.bits
+        present = True
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                present = False
+                bits[position >> 3] |= mask
+        return not present
+
+
+class UniquenessReport:
+    def __init__(self, method, requested, attempts, rejected, collisions, memory, error_rate=None):
+        self.method = method
+        self.requested = requested
+        self.attempts = attempts
+        self.rejected = rejected
+        self.collisions = collisions
+        self.memory = memory
+        self.error_rate = error_rate
+
+    @property
+    def false_positives(self):
+        return self.rejected - self.collisions
+
+    @property
+    def collision_rate(self):
+        return self.collisions / self.attempts if self.attempts else 0.0
+
+    @property
+    def regeneration_rate(self):
+        return self.rejected / self.attempts if self.attempts else 0.0
+
+    def __str__(self):
+        text = (f"Метод: {self.method}, запрошено: {self.requested}, сгенерировано: {self.attempts}\n"
+                f"Повторов: {self.collisions} ({self.collision_rate:.4%}), "
+                f"перегенерировано: {self.rejected} ({self.regeneration_rate:.4%})")
+        if self.error_rate is not None:
+            text += (f"\nЛожных срабатываний фильтра: {self.false_positives}, "
+                     f"расчетная вероятность: {self.error_rate:.2e}, память: {self.memory} байт")
+        return text
+
+
+class UniquenessTracker:
+    METHOD_EXACT = "exact"
+    METHOD_BLOOM = "bloom"
+
+    # До этого размера партии точное множество дешевле и проще фильтра Блума
+    EXACT_LIMIT = 1_000_000
+
+    def __init__(self, count, error_rate=0.001, memory_budget=None):
+        self.count = count
+        self.rejected_count = 0
+        self.rejected = []
+        if count <= self.EXACT_LIMIT:
+            self.method = self.METHOD_EXACT
+            self.seen = set()
+            self.bloom = None
+        else:
+            self.method = self.METHOD_BLOOM
+            self.seen = None
+            self.bloom = BloomFilter(count, error_rate, memory_budget)
+            # При слишком малом бюджете фильтр отклонял бы почти все кандидаты
+            if self.bloom.expected_error_rate > 0.5:
+                raise ValueError("Недостаточно памяти для фильтра Блума такой емкости")
+
+    def add(self, password):
+        if self.bloom is None:
+            if password in self.seen:
+                self.rejected_count += 1
+                return False
+            self.seen.add(password)
+            return True
+
+        # Фильтр не дает ложноотрицательных ответов, поэтому принятые пароли
+        # гарантированно уникальны; положительный ответ ведет к перегенерации
+        if not self.bloom.add(password):
+            self.rejected_count += 1
+            self.rejected.append(password)
+            return False
+        return True
+
+    def report(self, passwords, attempts):
+        if self.bloom is None:
+            return UniquenessReport(self.method, self.count, attempts, self.rejected_count,
+                                    self.rejected_count, 0)
+
+        # Точная перепроверка отклоненных кандидатов одним проходом по результату
+        duplicated = set(self.rejected).intersection(passwords)
+        collisions = sum(1 for password in self.rejected if password in duplicated)
+        return UniquenessReport(self.method, self.count, attempts, self.rejected_count,
+                                collisions, self.bloom.memory, self.bloom.expected_error_rate)
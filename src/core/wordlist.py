@@ -0,0 +1,174 @@
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+
+# Формат файла: заголовок, таблица из count + 1 смещений uint32 (little-endian)
+# и упакованный UTF-8 блок со словами без разделителей
+MAGIC = b"GPWL"
+VERSION = 1
+_HEADER = struct.Struct("<4sHI")
+
+
+def get_resource_path(relative_path):
+    try:
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(base_path, relative_path)
+
+
+DEFAULT_WORDLIST_PATH = get_resource_path(os.path.join("src", "assets", "wordlists", "memorable.gpwl"))
+
+
+def parse_words(lines):
+    for line in lines:
+        parts = line.split()
+        # Поддерживается и формат EFF ("11111<TAB>abacus"), и одно слово на строку
+        if parts and not parts[-1].startswith("#"):
+            yield parts[-1].lower()
+
+
+def build_wordlist(words, path):
+    unique_words = list(dict.fromkeys(word.strip() for word in words if word.strip()))
+    if not unique_words:
+        raise ValueError("Словарь не содержит ни одного слова")
+
+    blob = bytearray()
+    offsets = array("I", [0])
+    for word in unique_words:
+        blob += word.encode("utf-8")
+        offsets.append(len(blob))
+    if sys.byteorder != "little":
+        offsets.byteswap()
+
+    with open(path, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, len(unique_words)))
+        file.write(offsets.tobytes())
+        file.write(blob)
+
+    return len(unique_words)
+
+
+_shared_lock = threading.Lock()
+_shared_wordlists = {}
+
+
+def shared_wordlist(path=None):
+    # Один экземпляр на файл в пределах процесса: генераторы в потоках и тестах
+    # не открывают словарь и не строят отфильтрованные индексы повторно
+    path = os.path.abspath(path or DEFAULT_WORDLIST_PATH)
+    with _shared_lock:
+        wordlist = _shared_wordlists.get(path)
+        if wordlist is None:
+            wordlist = _shared_wordlists[path] = WordList(path)
+        return wordlist
+
+
+class WordList:
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_WORDLIST_PATH
+        self._file = None
+        self._mmap = None
+        self._offsets = None
+        self._blob = None
+        self._count = None
+        self._views = {}
+        self._lock = threading.RLock()
+
+    def _open(self):
+        if self._mmap is not None:
+            return
+
+        with self._lock:
+            if self._mmap is None:
+                self._map_file()
+
+    def _map_file(self):
+        file = open(self.path, "rb")
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            file.close()
+            raise
+
+        magic, version, count = _HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC or version != VERSION:
+            mapped.close()
+            file.close()
+            raise ValueError(f"Неверный формат файла словаря: {self.path}")
+
+        table_end = _HEADER.size + 4 * (count + 1)
+        view = memoryview(mapped)
+        if sys.byteorder == "little":
+            offsets = view[_HEADER.size:table_end].cast("I")
+        else:
+            offsets = array("I", view[_HEADER.size:table_end])
+            offsets.byteswap()
+
+        self._file = file
+        self._offsets = offsets
+        self._blob = view[table_end:]
+        self._count = count
+        # Признак открытого словаря выставляется последним для чтения без блокировки
+        self._mmap = mapped
+
+    def close(self):
+        with self._lock:
+            if self._mmap is not None:
+                self._unmap_file()
+
+    def _unmap_file(self):
+        if isinstance(self._offsets, memoryview):
+            self._offsets.release()
+        self._blob.release()
+        self._mmap.close()
+        self._file.close()
+        self._file = self._mmap = self._offsets = self._blob = None
+
+    def __len__(self):
+        self._open()
+        return self._count
+
+    def __getitem__(self, index):
+        self._open()
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("Индекс слова вне словаря")
+        return str(self._blob[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def filtered(self, predicate, key=None):
+        if key is None:
+            return WordListView(self, array("I", (i for i, word in enumerate(self) if predicate(word))))
+
+        # Представление с ключом строится один раз и разделяется всеми пользователями словаря
+        view = self._views.get(key)
+        if view is None:
+            with self._lock:
+                view = self._views.get(key)
+                if view is None:
+                    view = self._views[key] = self.filtered(predicate)
+        return view
+
+
+class WordListView:
+    def __init__(self, wordlist, indices):
+        self.wordlist = wordlist
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, index):
+        return self.wordlist[self.indices[index]]
+
+    def __iter__(self):
+        for index in self.indices:
+            yield self.wordlist[index]
@@ -15,6 +15,10 @@ from src.gui.widgets.sidebar_buttons import SettingsButton, AboutButton, UUIDBut
 from src.gui.widgets.exit_dialog import ExitDialog
 from src.gui.widgets.system_tray import SystemTray
 from src.core.password_generator import PasswordGenerator
+from src.core.key_cache import session_cache
+
+# Период проверки срока жизни ключей в кэше мастер-пароля, мс
+KEY_CACHE_EXPIRE_INTERVAL = 30000
 
 def get_resource_path(relative_path):
     try:
@@ -51,6 +55,14 @@ class MainWindow(QMainWindow):
             self.password_algorithm = PasswordGenerator.ALGORITHM_SECRETS
             self.password_generator.set_algorithm(self.password_algorithm)
         
+        self.password_generator.set_exclude_similar(self.exclude_similar)
+        self.apply_passphrase_settings()
+        
+        # Просроченные ключи мастер-пароля затираются, даже если к кэшу не обращаются
+        self.key_cache_timer = QTimer(self)
+        self.key_cache_timer.timeout.connect(session_cache.expire)
+        self.key_cache_timer.start(KEY_CACHE_EXPIRE_INTERVAL)
+        
         self.tray_icon = None
         if QSystemTrayIcon.isSystemTrayAvailable() and self.minimize_to_tray:
             self.tray_icon = SystemTray(self)
@@ -69,7 +81,7 @@ class MainWindow(QMainWindow):
         use_digits = self.toggles['digits']._enabled
         use_special = self.toggles['special']._enabled
         
-        if self.password_algorithm == PasswordGenerator.ALGORITHM_MEMORABLE:
+        if self.password_algorithm in (PasswordGenerator.ALGORITHM_MEMORABLE, PasswordGenerator.ALGORITHM_PASSPHRASE):
             use_upper = True
             use_lower = True
         elif self.password_algorithm == PasswordGenerator.ALGORITHM_PHONETIC:
@@ -81,7 +93,8 @@ class MainWindow(QMainWindow):
             use_lower=use_lower,
             use_digits=use_digits,
             use_special=use_special,
-            algorithm=self.password_algorithm
+            algorithm=self.password_algorithm,
+            exclude_similar=self.exclude_similar
         )
         
         active_types = [use_upper, use_lower, use_digits, use_special]
@@ -89,41 +102,15 @@ class MainWindow(QMainWindow):
             strength = 0
             self.strength_label.setText("Сложность: 0%")
         else:
-            test_password = ""
-            if use_upper:
-                test_password += "A"
-            if use_lower:
-                test_password += "a"
-            if use_digits:
-                test_password += "1"
-            if use_special:
-                test_password += "!"
-            
-            remaining_length = length - len(test_password)
-            if remaining_length > 0:
-                if use_upper:
-                    test_password += "A" * remaining_length
-                elif use_lower:
-                    test_password += "a" * remaining_length
-                elif use_digits:
-                    test_password += "1" * remaining_length
-                elif use_special:
-                    test_password += "!" * remaining_length
-            
-            if self.password_algorithm == PasswordGenerator.ALGORITHM_MEMORABLE:
-                estimated_length = 12
-                if use_digits:
-                    estimated_length += 2  # Обычно 2 цифры
-                if use_special:
-                    estimated_length += 1  # Обычно 1 спецсимвол
-                
-                test_password = "TestPassword"
-                if use_digits:
-                    test_password += "12"
-                if use_special:
-                    test_password += "!"
-            
-            strength = self.password_generator.check_strength(test_password)
+            # Оценка строится по энтропии распределения паролей с учетом
+            # обязательных классов символов, а не по искусственному паролю.
+            # Для произносимых паролей она меньше log2 числа вариантов, так как
+            # цепь Маркова выбирает частые сочетания букв чаще редких
+            result = self.password_generator.search_space(
+                length, use_upper, use_lower, use_digits, use_special,
+                algorithm=self.password_algorithm, exclude_similar=self.exclude_similar
+            )
+            strength = self.password_generator.strength_from_bits(result.entropy)
             
             algorithm_info = ""
             if self.password_algorithm == PasswordGenerator.ALGORITHM_PHONETIC:
@@ -132,6 +119,8 @@ class MainWindow(QMainWindow):
                 algorithm_info = " (Шаблонный)"
             elif self.password_algorithm == PasswordGenerator.ALGORITHM_MEMORABLE:
                 algorithm_info = " (Запоминаемый)"
+            elif self.password_algorithm == PasswordGenerator.ALGORITHM_PASSPHRASE:
+                algorithm_info = " (Парольная фраза)"
                 
             self.strength_label.setText(f"Примерная сложность{algorithm_info}: {strength}%")
         
@@ -378,7 +367,7 @@ class MainWindow(QMainWindow):
             self.strength_label.setAlignment(Qt.AlignCenter)
             frame_layout.addWidget(self.strength_label)
             
-            self.combination_calculator = CombinationCalculator()
+            self.combination_calculator = CombinationCalculator(password_generator=self.password_generator)
             frame_layout.addWidget(self.combination_calculator)
             
             self.update_strength_indicator()
@@ -404,8 +393,8 @@ class MainWindow(QMainWindow):
 
     def generate_password(self):
         try:
-            if self.password_algorithm == PasswordGenerator.ALGORITHM_MEMORABLE:
-                password = self.password_generator.generate(
+            if self.password_algorithm in (PasswordGenerator.ALGORITHM_MEMORABLE, PasswordGenerator.ALGORITHM_PASSPHRASE):
+                result = self.password_generator.generate_result(
                     length=0,  
                     use_upper=True,     
                     use_lower=True,
@@ -413,7 +402,7 @@ class MainWindow(QMainWindow):
                     use_special=self.toggles['special']._enabled
                 )
             elif self.password_algorithm == PasswordGenerator.ALGORITHM_PHONETIC:
-                password = self.password_generator.generate(
+                result = self.password_generator.generate_result(
                     length=self.length_slider.value(),
                     use_upper=self.toggles['upper']._enabled,
                     use_lower=True,
@@ -421,7 +410,7 @@ class MainWindow(QMainWindow):
                     use_special=self.toggles['special']._enabled
                 )
             else:
-                password = self.password_generator.generate(
+                result = self.password_generator.generate_result(
                     length=self.length_slider.value(),
                     use_upper=self.toggles['upper']._enabled,
                     use_lower=self.toggles['lower']._enabled,
@@ -429,9 +418,11 @@ class MainWindow(QMainWindow):
                     use_special=self.toggles['special']._enabled
                 )
             
+            password = result.password
+            
             has_active_types = False
             
-            if self.password_algorithm == PasswordGenerator.ALGORITHM_MEMORABLE:
+            if self.password_algorithm in (PasswordGenerator.ALGORITHM_MEMORABLE, PasswordGenerator.ALGORITHM_PASSPHRASE):
                 has_active_types = True
             elif self.password_algorithm == PasswordGenerator.ALGORITHM_PHONETIC:
                 has_active_types = self.toggles['upper']._enabled or self.toggles['digits']._enabled or self.toggles['special']._enabled
@@ -455,7 +446,9 @@ class MainWindow(QMainWindow):
             if self.auto_copy:
                 QTimer.singleShot(len(password) * 50 + 200, self.auto_copy_to_clipboard)
             
-            strength = self.password_generator.check_strength(password)
+            # Пароль не надежнее распределения, из которого он выбран
+            strength = min(self.password_generator.check_strength(password),
+                           self.password_generator.strength_from_bits(result.entropy))
             
             algorithm_info = ""
             if self.password_algorithm == PasswordGenerator.ALGORITHM_PHONETIC:
@@ -464,6 +457,8 @@ class MainWindow(QMainWindow):
                 algorithm_info = " (Шаблонный)"
             elif self.password_algorithm == PasswordGenerator.ALGORITHM_MEMORABLE:
                 algorithm_info = " (Запоминаемый)"
+            elif self.password_algorithm == PasswordGenerator.ALGORITHM_PASSPHRASE:
+                algorithm_info = " (Парольная фраза)"
                 
             self.strength_label.setText(f"Фактическая сложность{algorithm_info}: {strength}%")
             
@@ -481,33 +476,26 @@ class MainWindow(QMainWindow):
                 font-weight: bold;
             """)
             
-            actual_length = len(password)
-            if self.password_algorithm == PasswordGenerator.ALGORITHM_MEMORABLE:
-                self.combination_calculator.update_combinations(
-                    length=actual_length,
-                    use_upper=True,
-                    use_lower=True,
-                    use_digits=self.toggles['digits']._enabled,
-                    use_special=self.toggles['special']._enabled,
-                    algorithm=self.password_algorithm
-                )
+            self.combination_calculator.show_result(result)
             
             QTimer.singleShot(5000, self.update_strength_indicator)
             
         except ValueError as e:
-            error_message = str(e) if str(e) else "Выберите хотя бы один тип символов"
-            self.password_field.setStyleSheet(f"""
-                QLabel {{
-                    background-color: {ERROR_COLOR};
-                    color: {TEXT_COLOR};
-                    padding: 5px;
-                    border-radius: 5px;
-                    font-family: {FONT_FAMILY};
-                    font-size: {FONT_SIZE_NORMAL}px;
-                }}
-            """)
-            self.password_field.setText(error_message)
-            QTimer.singleShot(1500, self.reset_password_field_style)
+            self.show_password_error(str(e) if str(e) else "Выберите хотя бы один тип символов")
+            
+    def show_password_error(self, message):
+        self.password_field.setStyleSheet(f"""
+            QLabel {{
+                background-color: {ERROR_COLOR};
+                color: {TEXT_COLOR};
+                padding: 5px;
+                border-radius: 5px;
+                font-family: {FONT_FAMILY};
+                font-size: {FONT_SIZE_NORMAL}px;
+            }}
+        """)
+        self.password_field.setText(message)
+        QTimer.singleShot(1500, self.reset_password_field_style)
             
     def auto_copy_to_clipboard(self):
         if self.current_password and not self.typewriter_timer.isActive():
@@ -572,6 +560,7 @@ class MainWindow(QMainWindow):
         dont_ask_again = self.settings.value("exit_dont_ask_again", False, type=bool)
         
         if dont_ask_again:
+            session_cache.clear()
             event.accept()
             return
             
@@ -579,11 +568,15 @@ class MainWindow(QMainWindow):
         result = dialog.exec_()
         
         if result == QDialog.Accepted:
+            session_cache.clear()
             event.accept()
         else:
             event.ignore()
     
     def changeEvent(self, event):
+        # Свернутое приложение считается заблокированным: кэш ключей очищается
+        if event.type() == QEvent.WindowStateChange and self.isMinimized():
+            session_cache.clear()
         if event.type() == QEvent.WindowStateChange and self.isMinimized() and self.minimize_to_tray and self.tray_icon:
             # Скрываем окно
             self.hide()
@@ -593,6 +586,11 @@ class MainWindow(QMainWindow):
         else:
             super().changeEvent(event)
 
+    def hideEvent(self, event):
+        # Окно скрывается при сворачивании в трей, в том числе из меню трея
+        session_cache.clear()
+        super().hideEvent(event)
+        
     def handle_minimize(self):
         if self.minimize_to_tray and self.tray_icon:
             self.hide()
@@ -613,6 +611,26 @@ class MainWindow(QMainWindow):
                 self.tray_icon.deleteLater()
                 self.tray_icon = None 
                 
+    def apply_passphrase_settings(self):
+        options = dict(
+            word_count=self.settings.value("passphrase_words", 6, type=int),
+            separators=self.settings.value("passphrase_separators", "-", type=str),
+            casing=self.settings.value("passphrase_casing", PasswordGenerator.CASING_CAPITALIZE, type=str),
+            injection=self.settings.value("passphrase_injection", PasswordGenerator.INJECT_END, type=str),
+        )
+        # Некорректное значение одной настройки не сбрасывает остальные,
+        # генератор сохраняет для нее прежнее значение
+        errors = []
+        for name, value in options.items():
+            try:
+                self.password_generator.set_passphrase_options(**{name: value})
+            except ValueError as e:
+                errors.append(str(e))
+        # При запуске поле пароля еще не создано, поэтому ошибка выводится
+        # после построения окна
+        if errors:
+            QTimer.singleShot(0, lambda: self.show_password_error("; ".join(errors)))
+
     def apply_algorithm_ui_restrictions(self):
         self.update_algorithm(self.password_algorithm)
         
@@ -627,6 +645,10 @@ class MainWindow(QMainWindow):
                 if toggle_key == 'upper' or toggle_key == 'lower' or toggle_key == 'digits':
                     feature_active = False
                     reason = "Всегда включено для алгоритма Запоминаемых паролей"
+            elif algorithm == PasswordGenerator.ALGORITHM_PASSPHRASE:
+                if toggle_key == 'upper' or toggle_key == 'lower':
+                    feature_active = False
+                    reason = "Регистр слов задается в настройках парольной фразы"
             elif algorithm == PasswordGenerator.ALGORITHM_PHONETIC:
                 if toggle_key == 'lower':
                     feature_active = False
@@ -747,6 +769,24 @@ class MainWindow(QMainWindow):
                 
                 self.update_toggle_visual_state()
                 
+            elif algorithm == PasswordGenerator.ALGORITHM_PASSPHRASE:
+                self.length_slider.setEnabled(False)
+                self.length_label.setText(f"Длина пароля: {self.password_generator.passphrase_word_count} слов (парольная фраза)")
+                
+                self.toggles['upper'].setEnabled(False)
+                self.toggles['lower'].setEnabled(False)
+                
+                if not self.toggles['upper']._enabled:
+                    self.toggles['upper'].mousePressEvent(None)
+                    
+                if not self.toggles['lower']._enabled:
+                    self.toggles['lower'].mousePressEvent(None)
+                
+                self.toggles['digits'].setEnabled(True)
+                self.toggles['special'].setEnabled(True)
+                
+                self.update_toggle_visual_state()
+                
             elif algorithm == PasswordGenerator.ALGORITHM_PHONETIC:
                 self.length_slider.setEnabled(True)
                 self.length_slider.setEnabled(True)
@@ -811,6 +851,8 @@ class MainWindow(QMainWindow):
         if dialog.exec_() == QDialog.Accepted:
             self.default_length = dialog.default_length
             self.exclude_similar = dialog.exclude_similar
+            self.password_generator.set_exclude_similar(self.exclude_similar)
+            self.apply_passphrase_settings()
             self.auto_copy = dialog.auto_copy
             self.clear_clipboard = dialog.clear_clipboard
             self.clipboard_timeout = dialog.clipboard_timeout
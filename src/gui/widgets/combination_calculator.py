@@ -4,6 +4,9 @@ from PyQt5.QtGui import QIcon
 from src.utils.styles import *
 from src.gui.widgets.custom_widgets import CloseButton
 from src.core.password_generator import PasswordGenerator
+from src.core.charset_profile import CharsetProfile
+from src.core import long_secret
+from src.core.combinatorics import format_combinations
 import os
 import sys
 
@@ -102,26 +105,30 @@ class FormulaExplanationDialog(QDialog):
         
         if self.algorithm == PasswordGenerator.ALGORITHM_SECRETS:
             formula_text = (
-                "Формула расчета:\n"
-                "C = N^L\n\n"
+                "Формула расчета (включения-исключения):\n"
+                "C = Σ (-1)^|S| × (N - N_S)^L\n\n"
                 "Пример расчета:\n"
-                "N = 26 + 26 + 10 + 33 = 95 символов\n"
-                "L = 8 символов\n"
-                "C = 95^8 ≈ 6.6 × 10^15 комбинаций"
+                "N = 26 + 26 + 10 + 26 = 88 символов, L = 8\n"
+                "C = 88^8 - 62^8 - 62^8 - 78^8 - 62^8 + ... ≈ 1.7 × 10^15"
             )
             
             explanation_text = (
                 "Где в формуле:\n\n"
                 "• N - общее количество символов в алфавите\n"
                 "• L - длина пароля в символах\n"
+                "• S - подмножество выбранных типов символов,\n"
+                "  N_S - количество символов этих типов\n"
                 "• C - количество возможных комбинаций\n\n"
+                "Генератор гарантирует хотя бы один символ каждого\n"
+                "выбранного типа, поэтому пароли без какого-либо\n"
+                "типа вычитаются из N^L.\n\n"
                 "Алфавит (N) состоит из:\n"
                 "• Прописные буквы (A-Z):   26 символов\n"
                 "• Строчные буквы (a-z):    26 символов\n"
                 "• Цифры (0-9):             10 символов\n"
-                "• Специальные символы:      33 символа\n\n"
+                "• Специальные символы:      26 символов\n\n"
                 "В примере выше показан расчет для случая,\n"
-                "когда выбраны все типы символов (N = 95)\n"
+                "когда выбраны все типы символов (N = 88)\n"
                 "и длина пароля 8 символов (L = 8).\n\n"
                 "Чем больше разных типов символов и длина пароля,\n"
                 "тем сложнее его взломать."
@@ -129,35 +136,33 @@ class FormulaExplanationDialog(QDialog):
         elif self.algorithm == PasswordGenerator.ALGORITHM_PHONETIC:
             formula_text = (
                 "Формула для фонетического алгоритма:\n"
-                "C = (21^(L/2)) × (5^(L/2)) × k\n\n"
-                "Пример расчета:\n"
-                "21 согласных, 5 гласных, L = 8 символов\n"
-                "k = 1.5 (коэффициент для цифр и спецсимволов)\n"
-                "C ≈ 21^4 × 5^4 × 1.5 ≈ 1.1 × 10^7 комбинаций"
+                "H = Hм(n) + Hр + log₂(L! / (n! × d! × s!)) + d × log₂10 + s × log₂Sp\n\n"
+                "Пример расчета (все типы символов, L = 8):\n"
+                "n = 4 буквы, d = 2 цифры, s = 2 спецсимвола\n"
+                "H ≈ 11.6 + 2.6 + 8.7 + 6.6 + 9.4 ≈ 39.0 бит"
             )
             
             explanation_text = (
                 "Где в формуле:\n\n"
-                "• 21 - количество согласных букв\n"
-                "• 5 - количество гласных букв\n"
-                "• L - длина пароля в символах\n"
-                "• k - коэффициент, учитывающий добавление цифр\n"
-                "  и специальных символов\n"
-                "• C - количество возможных комбинаций\n\n"
-                "Фонетический алгоритм чередует согласные и гласные,\n"
-                "что делает пароль легче произносимым, но снижает\n"
-                "количество возможных комбинаций по сравнению со\n"
-                "стандартным алгоритмом.\n\n"
-                "Добавление цифр и специальных символов увеличивает\n"
-                "энтропию, но в меньшей степени, чем в стандартном алгоритме."
+                "• Hм(n) - энтропия n букв марковской цепи\n"
+                "• Hр - выбор двух заглавных букв среди n\n"
+                "• L - длина пароля, d и s - число цифр и спецсимволов\n"
+                "• Sp - количество специальных символов\n"
+                "• H - энтропия пароля в битах, C = 2^H\n\n"
+                "Буквы выбираются по таблице переходов между\n"
+                "сочетаниями букв, обученной на словаре, поэтому\n"
+                "пароль похож на настоящие слова и легко произносится.\n\n"
+                "Вероятность каждого перехода известна точно, поэтому\n"
+                "энтропия и число различных паролей рассчитываются\n"
+                "без приближенных коэффициентов."
             )
         elif self.algorithm == PasswordGenerator.ALGORITHM_PATTERN:
             formula_text = (
                 "Формула для шаблонного алгоритма:\n"
-                "C = (26^Lu) × (26^Ll) × (10^D) × (33^S)\n\n"
+                "C = L!/(Lu!·Ll!·D!·S!) × 26^Lu × 26^Ll × 10^D × 26^S\n\n"
                 "Пример расчета (использованы все символы, L = 8):\n"
                 "Lu, Ll, D, S = 2 каждый (равномерное распределение)\n"
-                "C = 26^2 × 26^2 × 10^2 × 33^2 ≈ 7.5 × 10^8 комбинаций"
+                "C = 2520 × 26^2 × 26^2 × 10^2 × 26^2 ≈ 7.8 × 10^13"
             )
             
             explanation_text = (
@@ -166,6 +171,8 @@ class FormulaExplanationDialog(QDialog):
                 "• Ll - число строчных букв (a-z) в пароле\n"
                 "• D - число цифр (0-9) в пароле\n"
                 "• S - число спецсимволов в пароле\n"
+                "• L!/(Lu!·Ll!·D!·S!) - число различных расстановок\n"
+                "  типов символов после перемешивания шаблона\n"
                 "• C - количество возможных комбинаций\n\n"
                 "Шаблонный алгоритм создает равномерное распределение\n"
                 "различных типов символов. Это повышает случайность\n"
@@ -178,10 +185,10 @@ class FormulaExplanationDialog(QDialog):
         elif self.algorithm == PasswordGenerator.ALGORITHM_MEMORABLE:
             formula_text = (
                 "Формула для запоминаемого алгоритма:\n"
-                "C = W^2 × 10^Nd × 33^Ns\n\n"
+                "C = W^2 × 10^Nd × 26^Ns\n\n"
                 "Пример расчета:\n"
-                "W = 32 (словарь), Nd = 2 (цифры), Ns = 1 (спецсимволы)\n"
-                "C = 32^2 × 10^2 × 33^1 ≈ 3.5 × 10^6 комбинаций"
+                "W = 884 слова, Nd = 2 (цифры), Ns = 1 (спецсимволы)\n"
+                "C = 884^2 × 10^2 × 26^1 ≈ 2.0 × 10^9 (≈ 30.9 бит)"
             )
             
             explanation_text = (
@@ -197,6 +204,31 @@ class FormulaExplanationDialog(QDialog):
                 "Для повышения безопасности используются два слова\n"
                 "с измененным регистром первой буквы."
             )
+        elif self.algorithm == PasswordGenerator.ALGORITHM_PASSPHRASE:
+            formula_text = (
+                "Формула для парольной фразы:\n"
+                "C = W^N × R^N × S^(N-1) × (10 × P) × (Sp × P)\n\n"
+                "Пример расчета:\n"
+                "W = 884 слова, N = 6 слов, S = 1 разделитель,\n"
+                "цифра и спецсимвол в конце фразы (P = 1)\n"
+                "C = 884^6 × 10 × 25 ≈ 1.2 × 10^20 (≈ 66.7 бит)"
+            )
+            
+            explanation_text = (
+                "Где в формуле:\n\n"
+                "• W - размер словаря (количество слов)\n"
+                "• N - количество слов во фразе (от 4 до 10)\n"
+                "• R - 2 при случайном регистре слов, иначе 1\n"
+                "• S - количество разделителей между словами\n"
+                "• Sp - спецсимволы, не совпадающие с разделителями\n"
+                "• P - число возможных позиций вставки (1 или N)\n"
+                "• C - количество возможных комбинаций\n\n"
+                "Каждое слово выбирается криптографически стойким\n"
+                "генератором независимо от остальных, поэтому число\n"
+                "комбинаций и энтропия рассчитываются точно.\n\n"
+                "Длинная фраза из простых слов легко запоминается\n"
+                "и при 6 и более словах не уступает случайному паролю."
+            )
         
         formula = QLabel(formula_text)
         formula.setStyleSheet(f"""
@@ -220,9 +252,11 @@ class FormulaExplanationDialog(QDialog):
         frame_layout.addWidget(formula_container)
 
 class CombinationCalculator(QFrame):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, password_generator=None):
         super().__init__(parent)
         self.current_algorithm = PasswordGenerator.ALGORITHM_SECRETS
+        self.password_generator = password_generator or PasswordGenerator()
+        self.exclude_similar = False
         self.setup_ui()
         
     def setup_ui(self):
@@ -288,163 +322,134 @@ class CombinationCalculator(QFrame):
                    parent_center.y() - dialog.height() // 2)
         dialog.exec_()
         
-    def update_combinations(self, length, use_upper, use_lower, use_digits, use_special, algorithm=None):
+    def update_combinations(self, length, use_upper, use_lower, use_digits, use_special, algorithm=None,
+                            exclude_similar=None):
         if algorithm is not None:
             self.current_algorithm = algorithm
+        if exclude_similar is not None:
+            self.exclude_similar = exclude_similar
+        
+        try:
+            result = self.password_generator.search_space(
+                length, use_upper, use_lower, use_digits, use_special,
+                algorithm=self.current_algorithm, exclude_similar=self.exclude_similar
+            )
+        except ValueError:
+            self.formula_label.setText("C = 0")
+            self.result_label.setText("Выберите хотя бы один тип символов")
+            return
             
-        if self.current_algorithm == PasswordGenerator.ALGORITHM_SECRETS:
-            self._update_standard_combinations(length, use_upper, use_lower, use_digits, use_special)
-        elif self.current_algorithm == PasswordGenerator.ALGORITHM_PHONETIC:
-            self._update_phonetic_combinations(length, use_digits, use_special)
+        if self.current_algorithm == PasswordGenerator.ALGORITHM_PHONETIC:
+            formula_text = self._phonetic_formula(length, use_upper, use_digits, use_special, result)
         elif self.current_algorithm == PasswordGenerator.ALGORITHM_PATTERN:
-            self._update_pattern_combinations(length, use_upper, use_lower, use_digits, use_special)
+            formula_text = self._pattern_formula(length, use_upper, use_lower, use_digits, use_special)
         elif self.current_algorithm == PasswordGenerator.ALGORITHM_MEMORABLE:
-            self._update_memorable_combinations(use_digits, use_special)
+            formula_text = self._memorable_formula(use_digits, use_special)
+        elif self.current_algorithm == PasswordGenerator.ALGORITHM_PASSPHRASE:
+            formula_text = self._passphrase_formula(use_digits, use_special)
+        elif self.current_algorithm in PasswordGenerator.ENCODED_ALGORITHMS:
+            formula_text = self._encoded_formula(length)
+        else:
+            formula_text = self._standard_formula(length, use_upper, use_lower, use_digits, use_special)
             
-    def _update_standard_combinations(self, length, use_upper, use_lower, use_digits, use_special):
-        alphabet_size = 0
+        self.formula_label.setText(formula_text)
+        self.show_result(result)
+    
+    def show_result(self, result):
+        # Результат генерации уже содержит двоичный логарифм числа комбинаций
+        self.result_label.setText(f"Всего комбинаций: {format_combinations(result.bits, result.combinations)} "
+                                  f"({result.bits:.1f} бит)")
+    
+    def _standard_formula(self, length, use_upper, use_lower, use_digits, use_special):
         components = []
+        profile = CharsetProfile.get(exclude_similar=self.exclude_similar)
         
         if use_upper:
-            alphabet_size += 26
-            components.append("26 (A-Z)")
+            components.append(f"{len(profile.uppercase)} (A-Z)")
         if use_lower:
-            alphabet_size += 26
-            components.append("26 (a-z)")
+            components.append(f"{len(profile.lowercase)} (a-z)")
         if use_digits:
-            alphabet_size += 10
-            components.append("10 (0-9)")
+            components.append(f"{len(profile.digits)} (0-9)")
         if use_special:
-            alphabet_size += 33
-            components.append("33 (!@#)")
-            
-        if components:
-            formula = " + ".join(components)
-            total_combinations = alphabet_size ** length
-            
-            if total_combinations < 1000:
-                formatted_result = str(total_combinations)
-            elif total_combinations < 1_000_000:
-                formatted_result = f"{total_combinations:,}".replace(",", " ")
-            else:
-                power = len(str(total_combinations)) - 1
-                base = total_combinations / (10 ** power)
-                formatted_result = f"{base:.2f} × 10^{power}"
+            components.append(f"{len(profile.special)} (!@#)")
             
-            self.formula_label.setText(f"C = ({formula})^{length}")
-            self.result_label.setText(f"Всего комбинаций: {formatted_result}")
-        else:
-            self.formula_label.setText("C = 0")
-            self.result_label.setText("Выберите хотя бы один тип символов")
+        formula_text = f"C = ({' + '.join(components)})^{max(length, len(components))}"
+        if len(components) > 1:
+            # Вычитаются пароли без какого-либо из обязательных классов
+            formula_text += " − Σ(без класса) + …"
+        return formula_text
     
-    def _update_phonetic_combinations(self, length, use_digits, use_special):
-        # Расчет для фонетического алгоритма
-        consonants = 21 
-        vowels = 5 
-        
-        # Расчет комбинаций для чередования гласных и согласных
-        consonant_part = consonants ** (length // 2 + (length % 2))
-        vowel_part = vowels ** (length // 2)
-        
-        total_combinations = consonant_part * vowel_part
-        
-        digit_spec_multiplier = 1.0
-        if use_digits:
-            digit_spec_multiplier *= 1.2
-        if use_special:
-            digit_spec_multiplier *= 1.3
-            
-        total_combinations = int(total_combinations * digit_spec_multiplier)
-        
-        if total_combinations < 1000:
-            formatted_result = str(total_combinations)
-        elif total_combinations < 1_000_000:
-            formatted_result = f"{total_combinations:,}".replace(",", " ")
-        else:
-            power = len(str(total_combinations)) - 1
-            base = total_combinations / (10 ** power)
-            formatted_result = f"{base:.2f} × 10^{power}"
+    def _phonetic_formula(self, length, use_upper, use_digits, use_special, result):
+        # Формула для марковской модели произносимых паролей
+        letters, digits_count, special_count = self.password_generator._phonetic_layout(
+            length, use_digits, use_special
+        )
         
-        formula_text = f"C = (21^{length // 2 + (length % 2)}) × (5^{length // 2})"
-        if use_digits or use_special:
-            formula_text += f" × {digit_spec_multiplier:.1f}"
-            
-        self.formula_label.setText(formula_text)
-        self.result_label.setText(f"Всего комбинаций: {formatted_result}")
+        formula_text = f"H = Hм({letters})"
+        if use_upper:
+            formula_text += " + Hр"
+        if digits_count or special_count:
+            formula_text += f" + размещение {digits_count} цифр и {special_count} спецсимв."
+        return formula_text + f" ≈ {result.entropy:.1f} бит"
     
-    def _update_pattern_combinations(self, length, use_upper, use_lower, use_digits, use_special):
-        # Расчет для шаблонного алгоритма
-        types_count = sum([use_upper, use_lower, use_digits, use_special])
-        if types_count == 0:
-            self.formula_label.setText("C = 0")
-            self.result_label.setText("Выберите хотя бы один тип символов")
-            return
-            
-        base_chars_per_type = length // types_count
-        extra_chars = length % types_count
+    def _pattern_formula(self, length, use_upper, use_lower, use_digits, use_special):
+        profile = CharsetProfile.get(use_upper, use_lower, use_digits, use_special, self.exclude_similar)
+        pattern = profile.pattern(length)
         
         formula_parts = []
-        total_combinations = 1
+        counts = []
+        for symbol, alphabet in profile.pattern_alphabets().items():
+            count = pattern.count(symbol)
+            if count:
+                formula_parts.append(f"{len(alphabet)}^{count}")
+                counts.append(f"{count}!")
+        
+        if len(counts) > 1:
+            formula_parts.insert(0, f"{len(pattern)}!/({'·'.join(counts)})")
+        return f"C = {' × '.join(formula_parts)}"
+    
+    def _memorable_formula(self, use_digits, use_special):
+        words_count = len(self.password_generator.get_memorable_words(self.exclude_similar))
+        profile = CharsetProfile.get(exclude_similar=self.exclude_similar)
         
-        if use_upper:
-            upper_count = base_chars_per_type + (1 if extra_chars > 0 else 0)
-            extra_chars = max(0, extra_chars - 1)
-            total_combinations *= 26 ** upper_count
-            formula_parts.append(f"26^{upper_count}")
-            
-        if use_lower:
-            lower_count = base_chars_per_type + (1 if extra_chars > 0 else 0)
-            extra_chars = max(0, extra_chars - 1)
-            total_combinations *= 26 ** lower_count
-            formula_parts.append(f"26^{lower_count}")
-            
+        formula_parts = [f"{words_count}^2"]
         if use_digits:
-            digits_count = base_chars_per_type + (1 if extra_chars > 0 else 0)
-            extra_chars = max(0, extra_chars - 1)
-            total_combinations *= 10 ** digits_count
-            formula_parts.append(f"10^{digits_count}")
-            
+            formula_parts.append(f"{len(profile.digits)}^2")
         if use_special:
-            special_count = base_chars_per_type + (1 if extra_chars > 0 else 0)
-            total_combinations *= 33 ** special_count
-            formula_parts.append(f"33^{special_count}")
-            
-        if total_combinations < 1000:
-            formatted_result = str(total_combinations)
-        elif total_combinations < 1_000_000:
-            formatted_result = f"{total_combinations:,}".replace(",", " ")
-        else:
-            power = len(str(total_combinations)) - 1
-            base = total_combinations / (10 ** power)
-            formatted_result = f"{base:.2f} × 10^{power}"
+            formula_parts.append(f"{len(profile.special)}^1")
             
-        self.formula_label.setText(f"C = {' × '.join(formula_parts)}")
-        self.result_label.setText(f"Всего комбинаций: {formatted_result}")
-    
-    def _update_memorable_combinations(self, use_digits, use_special):
-        # Расчет для запоминаемого алгоритма
-        words_count = 32  
-        
-        total_combinations = words_count ** 2 
-        
-        formula_parts = [f"32^2"]
-        
+        return f"C = {' × '.join(formula_parts)}"
+
+    def _encoded_formula(self, length):
+        # Формула для кодировок случайных байтов (hex, base32, base64, z85)
+        if self.current_algorithm == PasswordGenerator.ALGORITHM_Z85:
+            full_groups, remainder = divmod(length, 5)
+            formula_text = f"C = 2^(32×{full_groups})"
+            if remainder:
+                formula_text += f" × ⌈2^32 / 85^{5 - remainder}⌉"
+            return formula_text
+        
+        alphabet_size = long_secret.ENCODINGS[self.current_algorithm][3]
+        return f"C = {alphabet_size}^{length}"
+
+    def _passphrase_formula(self, use_digits, use_special):
+        # Формула для парольной фразы из N независимо выбранных слов
+        generator = self.password_generator
+        word_count = generator.passphrase_word_count
+        words_count = len(generator.get_memorable_words(self.exclude_similar, generator.passphrase_casing))
+        separators_count = len(generator.get_passphrase_separators(self.exclude_similar))
+        positions = word_count if generator.passphrase_injection == PasswordGenerator.INJECT_RANDOM else 1
+        profile = CharsetProfile.get(exclude_similar=self.exclude_similar)
+        
+        formula_parts = [f"{words_count}^{word_count}"]
+        if generator.passphrase_casing == PasswordGenerator.CASING_RANDOM:
+            formula_parts.append(f"2^{word_count}")
+        if separators_count > 1:
+            formula_parts.append(f"{separators_count}^{word_count - 1}")
         if use_digits:
-            total_combinations *= 10 ** 2
-            formula_parts.append("10^2")
-            
+            formula_parts.append(f"{len(profile.digits)}" + (f"×{positions}" if positions > 1 else ""))
         if use_special:
-            total_combinations *= 33
-            formula_parts.append("33^1")
-            
-        if total_combinations < 1000:
-            formatted_result = str(total_combinations)
-        elif total_combinations < 1_000_000:
-            formatted_result = f"{total_combinations:,}".replace(",", " ")
-        else:
-            power = len(str(total_combinations)) - 1
-            base = total_combinations / (10 ** power)
-            formatted_result = f"{base:.2f} × 10^{power}"
-            
-        self.formula_label.setText(f"C = {' × '.join(formula_parts)}")
-        self.result_label.setText(f"Всего комбинаций: {formatted_result}") 
\ No newline at end of file
+            symbols_count = len(generator.get_passphrase_symbols(self.exclude_similar))
+            formula_parts.append(f"{symbols_count}" + (f"×{positions}" if positions > 1 else ""))
+        
+        return f"C = {' × '.join(formula_parts)}"
@@ -1,17 +1,20 @@
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, 
                              QLabel, QLineEdit, QPushButton, QWidget, QApplication,
-                             QFrame, QScrollArea)
-from PyQt5.QtCore import Qt, QSize, QTimer
+                             QFrame, QScrollArea, QComboBox, QSpinBox, QCheckBox, QCompleter)
+from PyQt5.QtCore import Qt, QSize, QTimer, QObject, QRunnable, QThreadPool, QSettings, QStringListModel, pyqtSignal
 from PyQt5.QtGui import QIcon
 import os
 import sys
 import hashlib
 import secrets
-import string
-import base64
-from hashlib import pbkdf2_hmac
+import sqlite3
 from src.utils.styles import *
 from src.gui.widgets.custom_widgets import CloseButton
+from src.core.master_password import (LEGACY_KDF, SiteProfile, canonical_domain, derive_password, kdf_from_params,
+                                      SCHEME_V1, SCHEME_V2, LEGACY_LENGTH, MIN_LENGTH, MAX_LENGTH, CLASS_ALL)
+from src.core.charset_profile import CharsetProfile
+from src.core.profile_store import ProfileStore
+from src.core.key_cache import session_cache, DEFAULT_TTL
 
 def get_resource_path(relative_path):
     try:
@@ -20,6 +23,40 @@ def get_resource_path(relative_path):
         base_path = "."
     return os.path.join(base_path, relative_path)
 
+class DerivationSignals(QObject):
+    finished = pyqtSignal(int, str)
+    failed = pyqtSignal(int, str)
+    done = pyqtSignal(int)
+
+class DerivationTask(QRunnable):
+    # PBKDF2 и scrypt в hashlib отпускают GIL, поэтому вычисление в пуле потоков
+    # не мешает циклу событий перерисовывать и перетаскивать окно
+    def __init__(self, request_id, master, profile):
+        super().__init__()
+        self.request_id = request_id
+        self.master = master
+        self.profile = profile
+        self.cancelled = False
+        self.signals = DerivationSignals()
+        
+    def cancel(self):
+        # Уже запущенный PBKDF2 прервать нельзя: его результат просто отбрасывается
+        self.cancelled = True
+        
+    def run(self):
+        try:
+            if self.cancelled:
+                return
+            password = derive_password(self.master, self.profile, session_cache)
+            if not self.cancelled:
+                self.signals.finished.emit(self.request_id, password)
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.failed.emit(self.request_id, str(e))
+        finally:
+            # Сигнал завершения приходит всегда, даже для отмененной задачи
+            self.signals.done.emit(self.request_id)
+
 class MasterPasswordHelpDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -117,7 +154,7 @@ class MasterPasswordHelpDialog(QDialog):
              "Домен - это название сайта или сервиса, для которого вы хотите сгенерировать пароль. Например: 'google', 'facebook', 'twitter'. Важно использовать одинаковое название домена при повторной генерации пароля."),
             
             ("3. Как работает генерация?",
-             "1. Мы объединяем ваш мастер-пароль и домен\n2. Используем алгоритм PBKDF2 для создания криптографически стойкого ключа\n3. На основе этого ключа генерируем 16-символьный пароль, включающий:\n   • 4 заглавные буквы\n   • 4 строчные буквы\n   • 4 цифры\n   • 4 специальных символа\n\nПример:\nМастер-пароль: MyPassword123\nДомен: google\nРезультат: Xb7!Kd9@Pf3#Rz5$"),
+             "1. Мы объединяем ваш мастер-пароль и домен\n2. Используем алгоритм PBKDF2 для создания криптографически стойкого ключа\n3. На основе этого ключа генерируем 16-символьный пароль, включающий:\n   • 4 заглавные буквы\n   • 4 строчные буквы\n   • 4 цифры\n   • 4 специальных символа\n\nПример:\nМастер-пароль: MyPassword123\nДомен: google\nРезультат: Xb7!Kd9@Pf3#Rz5$\n\nСхема 2 растягивает ключ через HKDF и выбирает символы без смещения: длину (от 4 до 128) и типы символов можно задать для каждого сайта. Схема 1 оставлена для паролей, созданных ранее."),
             
             ("4. Преимущества этого метода",
              "• Безопасность: используется криптографически стойкий алгоритм PBKDF2\n• Повторяемость: одинаковые мастер-пароль и домен всегда дают одинаковый результат\n• Уникальность: каждый сайт получает свой уникальный пароль\n• Надежность: генерируются сложные пароли, соответствующие всем требованиям безопасности\n• Локальность: все вычисления происходят только на вашем устройстве"),
@@ -180,14 +217,34 @@ class MasterPasswordHelpDialog(QDialog):
             event.accept()
 
 class MasterPasswordDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, settings=None, store=None):
         super().__init__(parent)
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.Dialog)
         self.setAttribute(Qt.WA_TranslucentBackground)
-        self.setFixedSize(500, 440) 
+        self.setFixedSize(500, 480) 
         self.dragPos = None
         self.title_bar = None
+        self.thread_pool = QThreadPool.globalInstance()
+        self.request_id = 0
+        self.running_task = None
+        self.pending_task = None
+        # Настройки и хранилище профилей можно передать извне, чтобы проверки
+        # не трогали данные пользователя
+        self.settings = settings if settings is not None else QSettings("GenPass", "PasswordGenerator")
+        self.kdf = self.load_kdf()
+        self.scheme = self.settings.value("master_scheme", SCHEME_V1, type=int)
+        self.policy_length = self.settings.value("master_length", LEGACY_LENGTH, type=int)
+        self.policy_classes = self.settings.value("master_classes", CLASS_ALL, type=int)
+        # Переданное хранилище принадлежит вызывающему коду и не закрывается диалогом
+        self.owns_store = store is None
+        self.store = store if store is not None else self.open_store()
+        self.site_profile = None
+        self.requested_profile = None
+        self.show_cache_stats = self.settings.value("master_cache_debug", False, type=bool)
+        session_cache.set_ttl(self.settings.value("master_cache_ttl", DEFAULT_TTL, type=int))
         self.initUI()
+        if self.show_cache_stats:
+            self.setFixedSize(500, 510)
         
     def initUI(self):
         layout = QVBoxLayout(self)
@@ -348,6 +405,83 @@ class MasterPasswordDialog(QDialog):
         """)
         frame_layout.addWidget(self.domain_input)
         
+        # Автодополнение по сохраненным сайтам: варианты отбирает хранилище
+        # по префиксу, поэтому QCompleter их не фильтрует повторно
+        self.completion_model = QStringListModel(self)
+        completer = QCompleter(self.completion_model, self)
+        completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        completer.setCaseSensitivity(Qt.CaseInsensitive)
+        self.domain_input.setCompleter(completer)
+        self.domain_input.setToolTip("В схеме 2 можно вставить адрес страницы: он сводится к регистрируемому домену")
+        self.domain_input.textEdited.connect(self.update_completions)
+        self.domain_input.textChanged.connect(self.load_site_profile)
+        
+        # Политика пароля: схема 1 сохраняет прежние пароли (16 символов всех
+        # классов), в схеме 2 длина и классы символов настраиваются
+        policy_layout = QHBoxLayout()
+        policy_layout.setSpacing(7)
+        control_style = f"""
+            QComboBox, QSpinBox {{
+                background-color: {DARK_SECONDARY};
+                color: {TEXT_COLOR};
+                border: none;
+                border-radius: 4px;
+                padding: 4px;
+                font-family: {FONT_FAMILY};
+            }}
+            QComboBox QAbstractItemView {{
+                background-color: {DARK_SECONDARY};
+                color: {TEXT_COLOR};
+                selection-background-color: {ACCENT_COLOR};
+            }}
+            QCheckBox {{
+                color: {TEXT_COLOR};
+                font-family: {FONT_FAMILY};
+            }}
+            QCheckBox:disabled, QSpinBox:disabled {{
+                color: {BUTTON_HOVER};
+            }}
+        """
+        
+        self.scheme_combo = QComboBox()
+        self.scheme_combo.addItem("Схема 1 (16 симв.)", SCHEME_V1)
+        self.scheme_combo.addItem("Схема 2", SCHEME_V2)
+        self.scheme_combo.setStyleSheet(control_style)
+        self.scheme_combo.setToolTip("Схема 1 дает те же пароли, что и прежние версии GenPass")
+        policy_layout.addWidget(self.scheme_combo)
+        
+        self.length_spinner = QSpinBox()
+        self.length_spinner.setRange(MIN_LENGTH, MAX_LENGTH)
+        self.length_spinner.setValue(self.policy_length)
+        self.length_spinner.setStyleSheet(control_style)
+        self.length_spinner.setToolTip("Длина пароля")
+        self.length_spinner.valueChanged.connect(self.save_policy)
+        policy_layout.addWidget(self.length_spinner)
+        
+        self.class_checks = {}
+        for bit, text in ((CharsetProfile.CLASS_UPPER, "A-Z"), (CharsetProfile.CLASS_LOWER, "a-z"),
+                          (CharsetProfile.CLASS_DIGITS, "0-9"), (CharsetProfile.CLASS_SPECIAL, "#$%")):
+            check = QCheckBox(text)
+            check.setChecked(bool(self.policy_classes & bit))
+            check.setStyleSheet(control_style)
+            check.stateChanged.connect(self.save_policy)
+            self.class_checks[bit] = check
+            policy_layout.addWidget(check)
+        policy_layout.addStretch()
+        
+        self.counter_spinner = QSpinBox()
+        self.counter_spinner.setRange(1, 999)
+        self.counter_spinner.setPrefix("№")
+        self.counter_spinner.setStyleSheet(control_style)
+        self.counter_spinner.setToolTip("Номер пароля для сайта: увеличьте, чтобы сменить пароль")
+        policy_layout.addWidget(self.counter_spinner)
+        
+        index = self.scheme_combo.findData(self.scheme)
+        self.scheme_combo.setCurrentIndex(index if index >= 0 else 0)
+        self.scheme_combo.currentIndexChanged.connect(self.save_policy)
+        self.update_policy_controls()
+        frame_layout.addLayout(policy_layout)
+        
         result_container = QWidget()
         result_layout = QHBoxLayout(result_container)
         result_layout.setContentsMargins(0, 0, 0, 0)
@@ -398,6 +532,7 @@ class MasterPasswordDialog(QDialog):
         frame_layout.addWidget(result_container)
         
         generate_button = QPushButton("СГЕНЕРИРОВАТЬ")
+        self.generate_button = generate_button
         generate_button.setCursor(Qt.PointingHandCursor)
         generate_button.clicked.connect(self.generate_password)
         generate_button.setStyleSheet(f"""
@@ -416,6 +551,18 @@ class MasterPasswordDialog(QDialog):
         """)
         frame_layout.addWidget(generate_button)
         
+        # Отладочная панель со статистикой кэша ключей, включается в настройках
+        self.cache_stats_label = QLabel()
+        self.cache_stats_label.setStyleSheet(f"""
+            color: {TEXT_COLOR};
+            font-family: {FONT_FAMILY};
+            font-size: {FONT_SIZE_SMALL}px;
+        """)
+        self.cache_stats_label.setAlignment(Qt.AlignCenter)
+        self.cache_stats_label.setVisible(self.show_cache_stats)
+        self.update_cache_stats()
+        frame_layout.addWidget(self.cache_stats_label)
+        
         layout.addWidget(main_frame)
         
     def generate_password(self):
@@ -425,54 +572,179 @@ class MasterPasswordDialog(QDialog):
         if not master or not domain:
             self.result_label.setText("Введите мастер-пароль и домен")
             return
-            
-        # Комбинируем мастер-пароль и домен
-        combined = f"{master}:{domain}"
-        
-        salt = domain.encode()
-        key = pbkdf2_hmac(
-            'sha256',
-            master.encode(),
-            salt,
-            iterations=100000,
-            dklen=32
-        )
-        
-        key_hex = base64.b16encode(key).decode().lower()
-        
-        uppercase = string.ascii_uppercase
-        lowercase = string.ascii_lowercase
-        digits = string.digits
-        special_chars = "!@#$%^&*()_+-=[]{}|;:,.<>?"
-        
-        password = ""
-        
-        for i in range(0, 8, 2):
-            idx = int(key_hex[i:i+2], 16) % len(uppercase)
-            password += uppercase[idx]
-        
-        for i in range(8, 16, 2):
-            idx = int(key_hex[i:i+2], 16) % len(lowercase)
-            password += lowercase[idx]
-        
-        for i in range(16, 24, 2):
-            idx = int(key_hex[i:i+2], 16) % len(digits)
-            password += digits[idx]
         
-        for i in range(24, 32, 2):
-            idx = int(key_hex[i:i+2], 16) % len(special_chars)
-            password += special_chars[idx]
+        try:
+            profile = self.current_profile(domain)
+        except ValueError as e:
+            self.result_label.setText(str(e))
+            return
         
-        password_chars = list(password)
-        for i in range(len(password_chars) - 1):
-            # Используем каждый байт ключа для определения индекса обмена
-            # Важно: j всегда > i, чтобы обеспечить детерминированность
-            j = i + 1 + (int(key_hex[i % 16], 16) % (len(password_chars) - i - 1))
-            password_chars[i], password_chars[j] = password_chars[j], password_chars[i]
+        self.request_id += 1
+        self.requested_profile = profile
+        task = DerivationTask(self.request_id, master, profile)
+        task.signals.finished.connect(self.on_derivation_finished)
+        task.signals.failed.connect(self.on_derivation_failed)
+        task.signals.done.connect(self.on_task_done)
+        
+        # Частые нажатия схлопываются: выполняется не более одной задачи,
+        # а из ожидающих остается только последняя
+        if self.pending_task is not None:
+            self.pending_task.cancel()
+        if self.running_task is None:
+            self.start_task(task)
+        else:
+            self.running_task.cancel()
+            self.pending_task = task
+        
+        self.set_busy(True)
+        
+    def load_kdf(self):
+        # Параметры функции формирования ключа хранятся в настройках в виде JSON;
+        # по умолчанию используется исходная схема PBKDF2 со 100 000 итераций
+        params = self.settings.value("master_kdf", "", type=str)
+        if not params:
+            return LEGACY_KDF
+        try:
+            return kdf_from_params(params)
+        except ValueError as e:
+            print(f"Ошибка загрузки параметров KDF: {e}")
+            return LEGACY_KDF
+        
+    def open_store(self):
+        try:
+            return ProfileStore()
+        except (sqlite3.Error, OSError, ValueError) as e:
+            print(f"Ошибка открытия хранилища профилей: {e}")
+            return None
+        
+    def update_completions(self, text):
+        if self.store is not None:
+            self.completion_model.setStringList(self.store.complete(text))
+        
+    def load_site_profile(self, text):
+        # Сохраненный сайт подставляет свою схему, длину, классы, номер и KDF
+        self.site_profile = self.store.get(text) if self.store is not None and text.strip() else None
+        if self.site_profile is None:
+            self.counter_spinner.setValue(1)
+            return
         
-        password = ''.join(password_chars)
+        widgets = [self.scheme_combo, self.length_spinner, self.counter_spinner] + list(self.class_checks.values())
+        for widget in widgets:
+            widget.blockSignals(True)
+        index = self.scheme_combo.findData(self.site_profile.scheme)
+        self.scheme_combo.setCurrentIndex(index if index >= 0 else 0)
+        self.length_spinner.setValue(self.site_profile.length)
+        self.counter_spinner.setValue(self.site_profile.counter)
+        for bit, check in self.class_checks.items():
+            check.setChecked(bool(self.site_profile.classes & bit))
+        for widget in widgets:
+            widget.blockSignals(False)
+        
+        self.scheme = self.site_profile.scheme
+        self.policy_length = self.site_profile.length
+        self.policy_classes = self.site_profile.classes
+        self.update_policy_controls()
+        
+    def current_profile(self, domain):
+        # Для сохраненного сайта солью остается домен в том виде, в котором
+        # он был сохранен, даже если сейчас он набран в другом регистре.
+        # Схема 1 солится строкой как есть, поэтому найденный по регистрируемому
+        # домену профиль схемы 2 не подменяет набранный домен
+        site = self.site_profile
+        if site is not None and (self.scheme != SCHEME_V1 or site.scheme == SCHEME_V1):
+            domain = site.domain
+        domain = canonical_domain(domain, self.scheme)
+        kdf = site.kdf if site is not None else self.kdf
+        return SiteProfile(domain, kdf, self.scheme, self.policy_length, self.policy_classes,
+                           self.counter_spinner.value())
+        
+    def update_policy_controls(self):
+        editable = self.scheme == SCHEME_V2
+        self.length_spinner.setEnabled(editable)
+        for check in self.class_checks.values():
+            check.setEnabled(editable)
+        
+    def save_policy(self, *args):
+        self.scheme = self.scheme_combo.currentData()
+        self.policy_length = self.length_spinner.value()
+        self.policy_classes = 0
+        for bit, check in self.class_checks.items():
+            if check.isChecked():
+                self.policy_classes |= bit
+        # Изменения для сохраненного сайта не становятся настройками по умолчанию
+        if self.site_profile is None:
+            self.settings.setValue("master_scheme", self.scheme)
+            self.settings.setValue("master_length", self.policy_length)
+            self.settings.setValue("master_classes", self.policy_classes)
+        self.update_policy_controls()
+        
+    def start_task(self, task):
+        self.running_task = task
+        self.pending_task = None
+        self.thread_pool.start(task)
+        
+    def on_derivation_finished(self, request_id, password):
+        # Результаты устаревших запросов отбрасываются
+        if request_id == self.request_id:
+            self.result_label.setText(f"Ваш пароль: {password}")
+            self.remember_site(self.requested_profile)
+            
+    def remember_site(self, profile):
+        if self.store is None or profile is None:
+            return
+        try:
+            self.store.save(profile)
+        except sqlite3.Error as e:
+            print(f"Ошибка сохранения профиля сайта: {e}")
+            return
+        self.site_profile = profile
         
-        self.result_label.setText(f"Ваш пароль: {password}")
+    def on_derivation_failed(self, request_id, message):
+        if request_id == self.request_id:
+            self.result_label.setText(f"Ошибка генерации: {message}")
+            
+    def on_task_done(self, request_id):
+        if self.running_task is not None and self.running_task.request_id == request_id:
+            self.running_task = None
+            if self.pending_task is not None:
+                self.start_task(self.pending_task)
+        if self.running_task is None:
+            self.set_busy(False)
+        self.update_cache_stats()
+        
+    def update_cache_stats(self):
+        if self.show_cache_stats:
+            self.cache_stats_label.setText(
+                f"Кэш ключей: попаданий {session_cache.hits}, промахов {session_cache.misses}, "
+                f"записей {len(session_cache)}/{session_cache.max_entries}, срок {session_cache.ttl} с")
+        
+    def set_busy(self, busy):
+        if busy:
+            self.result_label.setText("Вычисление ключа...")
+            self.generate_button.setText("ВЫЧИСЛЕНИЕ...")
+            self.setCursor(Qt.BusyCursor)
+        else:
+            self.generate_button.setText("СГЕНЕРИРОВАТЬ")
+            self.unsetCursor()
+            
+    def cancel_derivation(self):
+        for task in (self.pending_task, self.running_task):
+            if task is not None:
+                task.cancel()
+        self.pending_task = None
+        self.running_task = None
+        self.request_id += 1
+        
+    def done(self, result):
+        self.cancel_derivation()
+        if self.store is not None and self.owns_store:
+            self.store.close()
+        self.store = None
+        super().done(result)
+        
+    def closeEvent(self, event):
+        self.cancel_derivation()
+        super().closeEvent(event)
         
     def copy_to_clipboard(self):
         text = self.result_label.text()
@@ -1,14 +1,16 @@
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, 
                            QLabel, QFrame, QComboBox, QWidget, QSlider,
-                           QCheckBox, QSpinBox, QPushButton, QTabWidget,
+                           QCheckBox, QSpinBox, QPushButton, QTabWidget, QLineEdit,
                            QScrollArea, QApplication, QColorDialog, QGridLayout, QMessageBox)
-from PyQt5.QtCore import Qt, QSettings, QSize, pyqtSignal
+from PyQt5.QtCore import Qt, QSettings, QSize, QObject, QRunnable, QThreadPool, pyqtSignal
 from PyQt5.QtGui import QIcon, QColor
 import os
 import sys
 from src.utils.styles import *
 from src.gui.widgets.custom_widgets import CloseButton, CustomSlider
 from src.core.password_generator import PasswordGenerator
+from src.core import master_password
+from src.core.key_cache import session_cache, DEFAULT_TTL
 
 def get_resource_path(relative_path):
     try:
@@ -17,6 +19,34 @@ def get_resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
+class CalibrationSignals(QObject):
+    finished = pyqtSignal(str, float)
+    failed = pyqtSignal(str)
+
+class CalibrationTask(QRunnable):
+    # Калибровка scrypt и Argon2id с повторами длится секунды, поэтому
+    # выполняется в пуле потоков, как и вычисление мастер-пароля
+    def __init__(self, name, target_ms, memory_mb):
+        super().__init__()
+        self.name = name
+        self.target_ms = target_ms
+        self.memory_mb = memory_mb
+        self.cancelled = False
+        self.signals = CalibrationSignals()
+        
+    def cancel(self):
+        self.cancelled = True
+        
+    def run(self):
+        try:
+            kdf, elapsed = master_password.calibrate(self.name, self.target_ms, self.memory_mb)
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.failed.emit(str(e))
+            return
+        if not self.cancelled:
+            self.signals.finished.emit(kdf.to_json(), elapsed)
+
 class SettingsDialog(QDialog):
     tray_setting_changed = pyqtSignal(bool)
     algorithm_changed = pyqtSignal(str)
@@ -28,6 +58,7 @@ class SettingsDialog(QDialog):
         self.dragPos = None
         self.title_bar = None
         self.settings = QSettings("GenPass", "PasswordGenerator")
+        self.calibration_task = None
         
         self.auto_copy = self.settings.value("auto_copy", False, type=bool)
         self.clear_clipboard = self.settings.value("clear_clipboard", True, type=bool)
@@ -37,6 +68,16 @@ class SettingsDialog(QDialog):
         self.show_exit_dialog = not self.settings.value("exit_dont_ask_again", False, type=bool)
         self.minimize_to_tray = self.settings.value("minimize_to_tray", False, type=bool)
         self.password_algorithm = self.settings.value("password_algorithm", PasswordGenerator.ALGORITHM_SECRETS, type=str)
+        self.passphrase_words = self.settings.value("passphrase_words", 6, type=int)
+        self.passphrase_separators = self.settings.value("passphrase_separators", "-", type=str)
+        self.passphrase_casing = self.settings.value("passphrase_casing", PasswordGenerator.CASING_CAPITALIZE, type=str)
+        self.passphrase_injection = self.settings.value("passphrase_injection", PasswordGenerator.INJECT_END, type=str)
+        self.master_kdf = self.settings.value("master_kdf", "", type=str)
+        self.master_kdf_name = self.settings.value("master_kdf_name", master_password.KDF_PBKDF2, type=str)
+        self.master_kdf_target_ms = self.settings.value("master_kdf_target_ms", master_password.CALIBRATION_TARGET_MS, type=int)
+        self.master_kdf_memory_mb = self.settings.value("master_kdf_memory_mb", master_password.CALIBRATION_MEMORY_MB, type=int)
+        self.master_cache_ttl = self.settings.value("master_cache_ttl", DEFAULT_TTL, type=int)
+        self.master_cache_debug = self.settings.value("master_cache_debug", False, type=bool)
         
         self.setup_ui()
         
@@ -131,6 +172,7 @@ class SettingsDialog(QDialog):
         algorithm_combo.addItem("Фонетический (произносимый)", PasswordGenerator.ALGORITHM_PHONETIC)
         algorithm_combo.addItem("Шаблонный (равномерный)", PasswordGenerator.ALGORITHM_PATTERN)
         algorithm_combo.addItem("Запоминающийся (слова+цифры)", PasswordGenerator.ALGORITHM_MEMORABLE)
+        algorithm_combo.addItem("Парольная фраза (N слов)", PasswordGenerator.ALGORITHM_PASSPHRASE)
         
         index = algorithm_combo.findData(self.password_algorithm)
         if index >= 0:
@@ -207,7 +249,59 @@ class SettingsDialog(QDialog):
         length_layout.addWidget(length_spinner)
         general_layout.addLayout(length_layout)
         
-        exclude_similar_check = QCheckBox("Исключать похожие символы (1, l, I, 0, O)")
+        passphrase_layout = QHBoxLayout()
+        passphrase_label = QLabel("Парольная фраза: слов, разделители, регистр, вставка:")
+        passphrase_label.setStyleSheet(f"color: {TEXT_COLOR}; font-family: {FONT_FAMILY};")
+        
+        words_spinner = QSpinBox()
+        words_spinner.setRange(PasswordGenerator.PASSPHRASE_MIN_WORDS, PasswordGenerator.PASSPHRASE_MAX_WORDS)
+        words_spinner.setValue(self.passphrase_words)
+        words_spinner.setStyleSheet(length_spinner.styleSheet())
+        words_spinner.valueChanged.connect(self.save_passphrase_words)
+        
+        separators_edit = QLineEdit(self.passphrase_separators)
+        separators_edit.setMaxLength(8)
+        separators_edit.setFixedWidth(60)
+        separators_edit.setStyleSheet(f"""
+            QLineEdit {{
+                background-color: {DARK_SECONDARY};
+                color: {TEXT_COLOR};
+                border: 1px solid {BUTTON_HOVER};
+                border-radius: 4px;
+                padding: 4px;
+            }}
+        """)
+        separators_edit.textChanged.connect(self.save_passphrase_separators)
+        
+        casing_combo = QComboBox()
+        casing_combo.addItem("Слово", PasswordGenerator.CASING_CAPITALIZE)
+        casing_combo.addItem("слово", PasswordGenerator.CASING_LOWER)
+        casing_combo.addItem("СЛОВО", PasswordGenerator.CASING_UPPER)
+        casing_combo.addItem("Случайно", PasswordGenerator.CASING_RANDOM)
+        index = casing_combo.findData(self.passphrase_casing)
+        if index >= 0:
+            casing_combo.setCurrentIndex(index)
+        casing_combo.setStyleSheet(algorithm_combo.styleSheet())
+        casing_combo.currentIndexChanged.connect(self.save_passphrase_casing)
+        
+        injection_combo = QComboBox()
+        injection_combo.addItem("В конце", PasswordGenerator.INJECT_END)
+        injection_combo.addItem("После случайного слова", PasswordGenerator.INJECT_RANDOM)
+        index = injection_combo.findData(self.passphrase_injection)
+        if index >= 0:
+            injection_combo.setCurrentIndex(index)
+        injection_combo.setStyleSheet(algorithm_combo.styleSheet())
+        injection_combo.currentIndexChanged.connect(self.save_passphrase_injection)
+        
+        passphrase_layout.addWidget(passphrase_label)
+        passphrase_layout.addStretch()
+        passphrase_layout.addWidget(words_spinner)
+        passphrase_layout.addWidget(separators_edit)
+        passphrase_layout.addWidget(casing_combo)
+        passphrase_layout.addWidget(injection_combo)
+        general_layout.addLayout(passphrase_layout)
+        
+        exclude_similar_check = QCheckBox("Исключать похожие символы (1, l, I, |, 0, O)")
         exclude_similar_check.setChecked(self.exclude_similar)
         exclude_similar_check.setStyleSheet(f"""
             QCheckBox {{
@@ -367,8 +461,120 @@ class SettingsDialog(QDialog):
         info_label.setAlignment(Qt.AlignCenter)
         advanced_layout.addWidget(info_label)
         
+        master_tab = QWidget()
+        master_layout = QVBoxLayout(master_tab)
+        master_layout.setContentsMargins(10, 10, 10, 10)
+        master_layout.setSpacing(10)
+        
+        kdf_label = QLabel("Функция формирования ключа")
+        kdf_label.setStyleSheet(exit_label.styleSheet())
+        master_layout.addWidget(kdf_label)
+        
+        kdf_layout = QHBoxLayout()
+        kdf_name_label = QLabel("Алгоритм:")
+        kdf_name_label.setStyleSheet(f"color: {TEXT_COLOR}; font-family: {FONT_FAMILY};")
+        
+        self.kdf_combo = QComboBox()
+        self.kdf_combo.addItem("PBKDF2-HMAC-SHA256", master_password.KDF_PBKDF2)
+        self.kdf_combo.addItem("scrypt", master_password.KDF_SCRYPT)
+        if master_password.ARGON2_AVAILABLE:
+            self.kdf_combo.addItem("Argon2id", master_password.KDF_ARGON2ID)
+        index = self.kdf_combo.findData(self.master_kdf_name)
+        if index >= 0:
+            self.kdf_combo.setCurrentIndex(index)
+        self.kdf_combo.setStyleSheet(algorithm_combo.styleSheet())
+        self.kdf_combo.currentIndexChanged.connect(self.save_master_kdf_name)
+        
+        kdf_layout.addWidget(kdf_name_label)
+        kdf_layout.addStretch()
+        kdf_layout.addWidget(self.kdf_combo)
+        master_layout.addLayout(kdf_layout)
+        
+        target_layout = QHBoxLayout()
+        target_label = QLabel("Целевое время вычисления (мс):")
+        target_label.setStyleSheet(f"color: {TEXT_COLOR}; font-family: {FONT_FAMILY};")
+        
+        target_spinner = QSpinBox()
+        target_spinner.setRange(50, 5000)
+        target_spinner.setSingleStep(50)
+        target_spinner.setValue(self.master_kdf_target_ms)
+        target_spinner.setStyleSheet(length_spinner.styleSheet())
+        target_spinner.valueChanged.connect(self.save_master_kdf_target)
+        
+        target_layout.addWidget(target_label)
+        target_layout.addStretch()
+        target_layout.addWidget(target_spinner)
+        master_layout.addLayout(target_layout)
+        
+        memory_layout = QHBoxLayout()
+        memory_label = QLabel("Бюджет памяти (МиБ):")
+        memory_label.setStyleSheet(f"color: {TEXT_COLOR}; font-family: {FONT_FAMILY};")
+        
+        memory_spinner = QSpinBox()
+        memory_spinner.setRange(8, 1024)
+        memory_spinner.setSingleStep(8)
+        memory_spinner.setValue(self.master_kdf_memory_mb)
+        memory_spinner.setStyleSheet(length_spinner.styleSheet())
+        memory_spinner.valueChanged.connect(self.save_master_kdf_memory)
+        
+        memory_layout.addWidget(memory_label)
+        memory_layout.addStretch()
+        memory_layout.addWidget(memory_spinner)
+        master_layout.addLayout(memory_layout)
+        
+        self.kdf_info_label = QLabel()
+        self.kdf_info_label.setStyleSheet(self.algorithm_info_label.styleSheet())
+        self.kdf_info_label.setWordWrap(True)
+        self.update_kdf_info()
+        master_layout.addWidget(self.kdf_info_label)
+        
+        kdf_buttons_layout = QHBoxLayout()
+        calibrate_button = QPushButton("Калибровать")
+        calibrate_button.setCursor(Qt.PointingHandCursor)
+        calibrate_button.clicked.connect(self.calibrate_master_kdf)
+        self.calibrate_button = calibrate_button
+        
+        legacy_button = QPushButton("Исходная схема")
+        legacy_button.setCursor(Qt.PointingHandCursor)
+        legacy_button.clicked.connect(self.reset_master_kdf)
+        
+        kdf_buttons_layout.addWidget(calibrate_button)
+        kdf_buttons_layout.addStretch()
+        kdf_buttons_layout.addWidget(legacy_button)
+        master_layout.addLayout(kdf_buttons_layout)
+        
+        cache_layout = QHBoxLayout()
+        cache_label = QLabel("Хранить ключи в памяти (минут, 0 - не хранить):")
+        cache_label.setStyleSheet(f"color: {TEXT_COLOR}; font-family: {FONT_FAMILY};")
+        
+        cache_spinner = QSpinBox()
+        cache_spinner.setRange(0, 120)
+        cache_spinner.setValue(self.master_cache_ttl // 60)
+        cache_spinner.setStyleSheet(length_spinner.styleSheet())
+        cache_spinner.valueChanged.connect(self.save_master_cache_ttl)
+        
+        cache_layout.addWidget(cache_label)
+        cache_layout.addStretch()
+        cache_layout.addWidget(cache_spinner)
+        master_layout.addLayout(cache_layout)
+        
+        cache_debug_check = QCheckBox("Показывать статистику кэша ключей")
+        cache_debug_check.setChecked(self.master_cache_debug)
+        cache_debug_check.setStyleSheet(exit_dialog_check.styleSheet())
+        cache_debug_check.stateChanged.connect(self.save_master_cache_debug)
+        master_layout.addWidget(cache_debug_check)
+        
+        master_layout.addStretch()
+        
+        kdf_warning_label = QLabel("Пароли по мастер-паролю зависят от параметров ключа: после калибровки для тех же домена и мастер-пароля будут получены другие пароли.")
+        kdf_warning_label.setStyleSheet(f"color: {TEXT_COLOR}; font-family: {FONT_FAMILY};")
+        kdf_warning_label.setWordWrap(True)
+        kdf_warning_label.setAlignment(Qt.AlignCenter)
+        master_layout.addWidget(kdf_warning_label)
+        
         tab_widget.addTab(general_tab, "Основные")
         tab_widget.addTab(advanced_tab, "Дополнительно")
+        tab_widget.addTab(master_tab, "Мастер-пароль")
         
         frame_layout.addWidget(tab_widget)
         
@@ -408,6 +614,9 @@ class SettingsDialog(QDialog):
         """)
         ok_button.clicked.connect(self.accept)
         
+        calibrate_button.setStyleSheet(default_button.styleSheet())
+        legacy_button.setStyleSheet(default_button.styleSheet())
+        
         button_layout.addWidget(default_button)
         button_layout.addStretch()
         button_layout.addWidget(ok_button)
@@ -429,6 +638,8 @@ class SettingsDialog(QDialog):
             self.algorithm_info_label.setText("Шаблонный алгоритм - равномерно распределяет разные типы символов в пароле, обеспечивая хороший баланс между типами символов.")
         elif algorithm == PasswordGenerator.ALGORITHM_MEMORABLE:
             self.algorithm_info_label.setText("Алгоритм запоминаемых паролей - создаёт пароли на основе слов со специальными символами и цифрами. Легко запомнить, но длиннее обычных паролей.")
+        elif algorithm == PasswordGenerator.ALGORITHM_PASSPHRASE:
+            self.algorithm_info_label.setText("Парольная фраза - от 4 до 10 случайных слов словаря с разделителями, выбранным регистром и необязательными цифрой и спецсимволом. Число комбинаций рассчитывается точно.")
             
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
@@ -468,6 +679,110 @@ class SettingsDialog(QDialog):
         self.exclude_similar = (state == Qt.Checked)
         self.settings.setValue("exclude_similar", self.exclude_similar)
     
+    def save_passphrase_words(self, value):
+        self.passphrase_words = value
+        self.settings.setValue("passphrase_words", value)
+    
+    def save_passphrase_separators(self, text):
+        self.passphrase_separators = text
+        self.settings.setValue("passphrase_separators", text)
+    
+    def save_passphrase_casing(self, index):
+        self.passphrase_casing = self.sender().itemData(index)
+        self.settings.setValue("passphrase_casing", self.passphrase_casing)
+    
+    def save_passphrase_injection(self, index):
+        self.passphrase_injection = self.sender().itemData(index)
+        self.settings.setValue("passphrase_injection", self.passphrase_injection)
+    
+    def save_master_kdf_name(self, index):
+        self.master_kdf_name = self.kdf_combo.itemData(index)
+        self.settings.setValue("master_kdf_name", self.master_kdf_name)
+    
+    def save_master_kdf_target(self, value):
+        self.master_kdf_target_ms = value
+        self.settings.setValue("master_kdf_target_ms", value)
+    
+    def save_master_kdf_memory(self, value):
+        self.master_kdf_memory_mb = value
+        self.settings.setValue("master_kdf_memory_mb", value)
+    
+    def save_master_cache_ttl(self, value):
+        self.master_cache_ttl = value * 60
+        self.settings.setValue("master_cache_ttl", self.master_cache_ttl)
+        session_cache.set_ttl(self.master_cache_ttl)
+        if not self.master_cache_ttl:
+            session_cache.clear()
+    
+    def save_master_cache_debug(self, state):
+        self.master_cache_debug = (state == Qt.Checked)
+        self.settings.setValue("master_cache_debug", self.master_cache_debug)
+    
+    def update_kdf_info(self, elapsed=None):
+        if not self.master_kdf:
+            text = "Используется исходная схема: PBKDF2-HMAC-SHA256, 100 000 итераций."
+        else:
+            try:
+                kdf = master_password.kdf_from_params(self.master_kdf)
+                text = f"Текущие параметры: {kdf!r}."
+            except ValueError as e:
+                text = f"Ошибка параметров KDF: {e}"
+        if elapsed is not None:
+            text += f" Время вычисления на этом компьютере: {elapsed:.0f} мс."
+        self.kdf_info_label.setText(text)
+    
+    def calibrate_master_kdf(self):
+        self.calibrate_button.setEnabled(False)
+        self.calibrate_button.setText("Калибровка...")
+        self.calibration_task = CalibrationTask(self.master_kdf_name, self.master_kdf_target_ms,
+                                                self.master_kdf_memory_mb)
+        self.calibration_task.signals.finished.connect(self.on_calibration_finished)
+        self.calibration_task.signals.failed.connect(self.on_calibration_failed)
+        QThreadPool.globalInstance().start(self.calibration_task)
+    
+    def finish_calibration(self):
+        self.calibration_task = None
+        self.calibrate_button.setEnabled(True)
+        self.calibrate_button.setText("Калибровать")
+    
+    def on_calibration_failed(self, message):
+        self.finish_calibration()
+        QMessageBox.warning(self, "Калибровка", f"Не удалось подобрать параметры: {message}")
+    
+    def on_calibration_finished(self, params, elapsed):
+        self.finish_calibration()
+        if not self.confirm_master_kdf_change(params):
+            return
+        self.master_kdf = params
+        self.settings.setValue("master_kdf", self.master_kdf)
+        self.update_kdf_info(elapsed)
+    
+    def confirm_master_kdf_change(self, params):
+        # Параметры по умолчанию применяются ко всем сайтам, которых еще нет
+        # в списке профилей, поэтому их пароли после смены изменятся
+        if params == self.master_kdf:
+            return True
+        answer = QMessageBox.question(
+            self, "Параметры KDF",
+            "Новые параметры изменят пароли всех сайтов, которые еще не сохранены в списке профилей. "
+            "Сохраненные сайты сохранят свои параметры.\n\nПрименить новые параметры?",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        return answer == QMessageBox.Yes
+    
+    def reset_master_kdf(self):
+        if not self.confirm_master_kdf_change(""):
+            return
+        self.master_kdf = ""
+        self.settings.setValue("master_kdf", "")
+        self.update_kdf_info()
+    
+    def done(self, result):
+        # Результат калибровки после закрытия окна отбрасывается
+        if self.calibration_task is not None:
+            self.calibration_task.cancel()
+            self.calibration_task = None
+        super().done(result)
+    
     def save_exit_dialog(self, state):
         self.show_exit_dialog = (state == Qt.Checked)
         self.settings.setValue("exit_dont_ask_again", not (state == Qt.Checked))
@@ -503,6 +818,16 @@ class SettingsDialog(QDialog):
         self.settings.setValue("exit_dont_ask_again", False)
         self.settings.setValue("minimize_to_tray", False)
         self.settings.setValue("password_algorithm", PasswordGenerator.ALGORITHM_SECRETS)
+        self.settings.setValue("passphrase_words", 6)
+        self.settings.setValue("passphrase_separators", "-")
+        self.settings.setValue("passphrase_casing", PasswordGenerator.CASING_CAPITALIZE)
+        self.settings.setValue("passphrase_injection", PasswordGenerator.INJECT_END)
+        self.settings.setValue("master_kdf", "")
+        self.settings.setValue("master_kdf_name", master_password.KDF_PBKDF2)
+        self.settings.setValue("master_kdf_target_ms", master_password.CALIBRATION_TARGET_MS)
+        self.settings.setValue("master_kdf_memory_mb", master_password.CALIBRATION_MEMORY_MB)
+        self.settings.setValue("master_cache_ttl", DEFAULT_TTL)
+        self.settings.setValue("master_cache_debug", False)
         
         self.auto_copy = False
         self.clear_clipboard = True
@@ -512,6 +837,18 @@ class SettingsDialog(QDialog):
         self.show_exit_dialog = True
         self.minimize_to_tray = False
         self.password_algorithm = PasswordGenerator.ALGORITHM_SECRETS
+        self.passphrase_words = 6
+        self.passphrase_separators = "-"
+        self.passphrase_casing = PasswordGenerator.CASING_CAPITALIZE
+        self.passphrase_injection = PasswordGenerator.INJECT_END
+        self.master_kdf = ""
+        self.master_kdf_name = master_password.KDF_PBKDF2
+        self.master_kdf_target_ms = master_password.CALIBRATION_TARGET_MS
+        self.master_kdf_memory_mb = master_password.CALIBRATION_MEMORY_MB
+        self.master_cache_ttl = DEFAULT_TTL
+        self.master_cache_debug = False
+        session_cache.set_ttl(DEFAULT_TTL)
+        self.update_kdf_info()
         
         if old_minimize_to_tray != self.minimize_to_tray:
             self.tray_setting_changed.emit(self.minimize_to_tray)
@@ -5,6 +5,7 @@ from PyQt5.QtWidgets import QApplication
 from PyQt5.QtGui import QIcon
 from PyQt5.QtCore import Qt
 from src.gui.main_window import MainWindow
+from src import cli
 
 def get_resource_path(relative_path):
     try:
@@ -15,6 +16,10 @@ def get_resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 def main():
+    # Команды командной строки выполняются без создания окна
+    if len(sys.argv) > 1 and sys.argv[1] in cli.COMMANDS:
+        sys.exit(cli.main(sys.argv[1:]))
+    
     try:
         myappid = 'genpass.password.generator.1.0.1'
         ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(myappid)